@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Throughput benchmark of the batch API (`Session.validate_many` and siblings)
+against a plain loop calling the single image operation.
+
+Usage:
+    python benchmarks/bench_batch.py --images 200 --pool-size 4 --operation validate
+    python benchmarks/bench_batch.py --simulated --latency 0.01
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from cryptonets_python_sdk.library import PrivIDFaceLib
+from cryptonets_python_sdk.session import Session, ImageInputArg
+from cryptonets_python_sdk.session_pool import SessionPool
+from cryptonets_python_sdk.simulated_library import SimulatedLibraryLoadStrategy
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    SessionSettings,
+    Collection,
+    OperationConfig,
+)
+
+BASE_URL = os.getenv("CRYPTONETS_BASE_URL", "https://xxxxxxxxxxxxxxxxxxx")
+API_KEY = os.getenv("CRYPTONETS_API_KEY", "xxxxxxxxxxxxxxxx")
+
+
+def create_settings() -> SessionSettings:
+    """Create session settings from the environment."""
+    return SessionSettings(
+        collections={"default": Collection(named_urls={"base_url": BASE_URL})},
+        session_token=API_KEY,
+    )
+
+
+def load_images(image_path: str, count: int, width: int, height: int) -> list[np.ndarray]:
+    """Load `count` copies of an image, or random frames when no path is given."""
+    if image_path:
+        image = ImageInputArg(image_path, "rgb", zero_copy=True)
+        return [image.image_array] * count
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    return [frame] * count
+
+
+def run_loop(session: Session, operation: str, images: list[np.ndarray], config: OperationConfig) -> float:
+    """Per-image loop: build ImageInputArg and call the operation for every image."""
+    method = getattr(session, operation)
+    start = time.perf_counter()
+    for array in images:
+        method(ImageInputArg(array, "rgb"), config)
+    return time.perf_counter() - start
+
+
+def run_batch(session: Session, operation: str, images: list[np.ndarray], config: OperationConfig,
+              pool: SessionPool | None) -> float:
+    """Batch API, optionally spread over a session pool."""
+    method = getattr(session, f"{operation}_many")
+    start = time.perf_counter()
+    for _ in method(images, config, image_format="rgb", pool=pool):
+        pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operation", choices=["validate", "estimate_age", "anti_spoofing"], default="validate")
+    parser.add_argument("--images", type=int, default=100, help="number of images to process")
+    parser.add_argument("--image", default="", help="image file, random frames are used when empty")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--pool-size", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--simulated", action="store_true", help="use the simulated native library")
+    parser.add_argument("--latency", type=float, default=0.0, help="latency of the simulated operations in seconds")
+    args = parser.parse_args()
+
+    PrivIDFaceLib.initialize(SimulatedLibraryLoadStrategy(latency=args.latency) if args.simulated else None)
+    settings = create_settings()
+    session = Session(settings)
+    pool = SessionPool(settings, size=args.pool_size)
+    images = load_images(args.image, args.images, args.width, args.height)
+    config = OperationConfig()
+
+    print(f"{args.operation} on {args.images} images ({images[0].shape[1]}x{images[0].shape[0]})")
+    runs = [
+        ("per-image loop", lambda: run_loop(session, args.operation, images, config)),
+        ("batch, single session", lambda: run_batch(session, args.operation, images, config, None)),
+        (f"batch, pool of {args.pool_size}", lambda: run_batch(session, args.operation, images, config, pool)),
+    ]
+    baseline = None
+    for name, run in runs:
+        elapsed = run()
+        throughput = args.images / elapsed
+        baseline = baseline or throughput
+        print(f"  {name:<24} {throughput:10.1f} images/s  x{throughput / baseline:.2f}")
+
+    pool.close()
+    session.close()
+    PrivIDFaceLib.shutdown()
+
+
+if __name__ == "__main__":
+    main()
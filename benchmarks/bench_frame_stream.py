@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Latency of the results on a simulated camera: a loop calling `Session.validate` on every frame against
+`FrameStream` (latest frame wins, optional adaptive sampling).
+
+The camera captures a frame every 1/fps seconds; a frame is stamped with its capture time and can be read
+from then on. When the operation is slower than the camera, the loop falls behind and the latency of its
+results grows with the stream length, while FrameStream drops the stale frames and keeps it bounded.
+
+Usage:
+    python benchmarks/bench_frame_stream.py --fps 30 --seconds 5
+    python benchmarks/bench_frame_stream.py --simulated --latency 0.05 --target-latency 0.08
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from cryptonets_python_sdk.frame_stream import FrameStream
+from cryptonets_python_sdk.library import PrivIDFaceLib
+from cryptonets_python_sdk.session import ImageInputArg, Session
+from cryptonets_python_sdk.simulated_library import SimulatedLibraryLoadStrategy
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    SessionSettings,
+    Collection,
+    OperationConfig,
+)
+
+BASE_URL = os.getenv("CRYPTONETS_BASE_URL", "https://xxxxxxxxxxxxxxxxxxx")
+API_KEY = os.getenv("CRYPTONETS_API_KEY", "xxxxxxxxxxxxxxxx")
+
+
+def create_settings() -> SessionSettings:
+    """Create session settings from the environment."""
+    return SessionSettings(
+        collections={"default": Collection(named_urls={"base_url": BASE_URL})},
+        session_token=API_KEY,
+    )
+
+
+def camera(fps: float, seconds: float, width: int, height: int):
+    """Yield (capture time, frame) tuples at `fps`, from a reused capture buffer."""
+    buffer = np.random.default_rng(0).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    start = time.monotonic()
+    for index in range(int(fps * seconds)):
+        captured = start + index / fps
+        delay = captured - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        yield captured, buffer
+
+
+def report(name: str, latencies: list, elapsed: float, extra: str = ""):
+    latencies = np.array(latencies) * 1000
+    print(f"{name:<14}{len(latencies):>9}{len(latencies) / elapsed:>11.1f}{latencies.mean():>12.1f}"
+          f"{np.percentile(latencies, 95):>12.1f}{latencies.max():>12.1f}  {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--target-latency", type=float, default=None, help="FrameStream target latency in seconds")
+    parser.add_argument("--simulated", action="store_true", help="use the simulated native library")
+    parser.add_argument("--latency", type=float, default=0.05, help="latency of the simulated operations in seconds")
+    args = parser.parse_args()
+
+    PrivIDFaceLib.initialize(SimulatedLibraryLoadStrategy(latency=args.latency) if args.simulated else None)
+    session = Session(create_settings())
+    config = OperationConfig()
+
+    print(f"{'':<14}{'results':>9}{'results/s':>11}{'mean (ms)':>12}{'p95 (ms)':>12}{'max (ms)':>12}")
+    latencies = []
+    start = time.monotonic()
+    for captured, frame in camera(args.fps, args.seconds, args.width, args.height):
+        session.validate(ImageInputArg(frame, "rgb"), config)
+        latencies.append(time.monotonic() - captured)
+    report("every frame", latencies, time.monotonic() - start)
+
+    stream = FrameStream(session, config, target_latency=args.target_latency)
+    start = time.monotonic()
+    latencies = [result.latency for result in stream.process(camera(args.fps, args.seconds, args.width, args.height))]
+    report("FrameStream", latencies, time.monotonic() - start,
+           f"dropped {stream.dropped}, skipped {stream.skipped}")
+    session.close()
+    PrivIDFaceLib.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Image decode benchmark: decode time per source megapixel and peak memory of
+`ImageDecoder` for each installed backend, against the original full-size
+Pillow decode.
+
+Peak memory is measured with tracemalloc: it covers numpy and Python buffers
+but not the private allocations of the decoder libraries.
+
+Usage:
+    python benchmarks/bench_image_decode.py --width 4000 --height 3000 --max-side 0 1280 640
+    python benchmarks/bench_image_decode.py --image photo.jpg
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from cryptonets_python_sdk.img_utils import ImageDecoder
+
+
+def create_jpeg(directory: str, width: int, height: int) -> str:
+    """Write a synthetic photo-like JPEG (smooth gradients and noise)."""
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)
+    array = np.empty((height, width, 3), dtype=np.uint8)
+    array[..., 0] = x[None, :]
+    array[..., 1] = y[:, None]
+    array[..., 2] = rng.integers(0, 64, size=(height, width), dtype=np.uint8)
+    path = os.path.join(directory, f"bench_{width}x{height}.jpg")
+    Image.fromarray(array).save(path, quality=90)
+    return path
+
+
+def decode_legacy(image_path: str) -> np.ndarray:
+    """Original pipeline: full-size Pillow decode and `np.array` copy."""
+    with Image.open(image_path) as image:
+        return np.array(image)
+
+
+def megapixels_to_bytes(megapixels: float) -> int:
+    """Size of an RGB buffer large enough for the source image."""
+    return int(megapixels * 1e6) * 3 + 3
+
+
+def measure(decode, repeat: int) -> tuple[float, int]:
+    """Return the best decode time in seconds and the peak traced memory in bytes."""
+    decode()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    decode()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", default="", help="JPEG file, a synthetic image is generated when empty")
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--max-side", type=int, nargs="+", default=[0, 1280, 640], help="0 decodes at full size")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = args.image or create_jpeg(directory, args.width, args.height)
+        with Image.open(image_path) as image:
+            megapixels = image.width * image.height / 1e6
+            print(f"{image_path}: {image.width}x{image.height} ({megapixels:.1f} MP)")
+
+        runs = [("legacy pil, full size", lambda: decode_legacy(image_path))]
+        for backend in ImageDecoder.available_backends():
+            decoder = ImageDecoder(backend)
+            for max_side in args.max_side:
+                runs.append((f"{backend}, max side {max_side or 'full'}",
+                             lambda d=decoder, m=max_side or None: d.decode(image_path, "rgb", max_side=m)))
+                out = np.empty(megapixels_to_bytes(megapixels), dtype=np.uint8)
+                runs.append((f"{backend}, max side {max_side or 'full'}, out",
+                             lambda d=decoder, m=max_side or None, o=out: d.decode(image_path, "rgb", max_side=m,
+                                                                                    out=o)))
+
+        print(f"  {'decoder':<36} {'ms/MP':>8} {'ms':>8} {'peak MiB':>9}")
+        for name, decode in runs:
+            elapsed, peak = measure(decode, args.repeat)
+            print(f"  {name:<36} {elapsed * 1e3 / megapixels:8.2f} {elapsed * 1e3:8.1f} {peak / 2 ** 20:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
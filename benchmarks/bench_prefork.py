@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Memory of forked workers with and without the pre-fork mode (`cryptonets_python_sdk.prefork`).
+
+Forks `--workers` processes that create a session and run a few operations, then reads the
+proportional set size (PSS: shared pages divided among the processes sharing them) and the private
+memory of every process from /proc/<pid>/smaps_rollup (Linux only):
+
+- per-worker: every worker calls PrivIDFaceLib.initialize and loads its own models
+- prefork: the master calls prefork.prepare, the workers inherit the loaded models
+
+Usage:
+    python benchmarks/bench_prefork.py --workers 8
+    python benchmarks/bench_prefork.py --simulated --model-size 256 --workers 16
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+
+import numpy as np
+
+from cryptonets_python_sdk import prefork
+from cryptonets_python_sdk.library import PrivIDFaceLib
+from cryptonets_python_sdk.session import ImageInputArg, Session
+from cryptonets_python_sdk.simulated_library import SimulatedLibraryLoadStrategy
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    SessionSettings,
+    Collection,
+    OperationConfig,
+)
+
+BASE_URL = os.getenv("CRYPTONETS_BASE_URL", "https://xxxxxxxxxxxxxxxxxxx")
+API_KEY = os.getenv("CRYPTONETS_API_KEY", "xxxxxxxxxxxxxxxx")
+MIB = 1 << 20
+
+
+def create_settings() -> SessionSettings:
+    """Create session settings from the environment."""
+    return SessionSettings(
+        collections={"default": Collection(named_urls={"base_url": BASE_URL})},
+        session_token=API_KEY,
+    )
+
+
+def read_memory(pid: int) -> dict:
+    """Return the PSS and private memory of a process in bytes."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) == 3 and fields[2] == "kB":
+                values[fields[0].rstrip(":")] = int(fields[1]) * 1024
+    return {"pss": values["Pss"], "private": values["Private_Clean"] + values["Private_Dirty"]}
+
+
+def worker(ready_fd: int, strategy_factory, initialize: bool):
+    """Worker body: initialize if needed, run operations, report and wait to be measured."""
+    try:
+        if initialize:
+            PrivIDFaceLib.initialize(strategy_factory())
+        else:
+            prefork.post_fork()
+        session = Session(create_settings())
+        image = ImageInputArg(np.full((480, 640, 3), 128, dtype=np.uint8), "rgb", zero_copy=True)
+        for operation in prefork.WARM_UP_OPERATIONS:
+            getattr(session, operation)(image, OperationConfig())
+        os.write(ready_fd, b"1")
+    except BaseException as e:
+        print(f"worker {os.getpid()} failed: {e!r}", file=sys.stderr)
+        os.write(ready_fd, b"0")
+        os._exit(1)
+    signal.pause()
+    os._exit(0)
+
+
+def run(mode: str, workers: int, strategy_factory) -> dict:
+    """Fork the workers in a child master process, measure every process and return the totals."""
+    result_read, result_write = os.pipe()
+    master = os.fork()
+    if master == 0:
+        os.close(result_read)
+        if mode == "prefork":
+            prefork.prepare(create_settings(), strategy_factory())
+        ready_read, ready_write = os.pipe()
+        children = []
+        for _ in range(workers):
+            pid = os.fork()
+            if pid == 0:
+                worker(ready_write, strategy_factory, initialize=mode == "per-worker")
+            children.append(pid)
+        ok = all(os.read(ready_read, 1) == b"1" for _ in children)
+        memories = [read_memory(pid) for pid in [os.getpid()] + children]
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+        os.write(result_write, json.dumps([ok, memories]).encode())
+        os._exit(0)
+    os.close(result_write)
+    with os.fdopen(result_read) as f:
+        ok, memories = json.loads(f.read())
+    os.waitpid(master, 0)
+    if not ok:
+        raise RuntimeError(f"{mode}: a worker failed")
+    return {
+        "mode": mode,
+        "master_pss": memories[0]["pss"],
+        "total_pss": sum(memory["pss"] for memory in memories),
+        "worker_private": sum(memory["private"] for memory in memories[1:]) / workers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--simulated", action="store_true", help="use the simulated native library")
+    parser.add_argument("--model-size", type=int, default=256, help="simulated model size in MiB")
+    args = parser.parse_args()
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        parser.error("/proc/<pid>/smaps_rollup is required (Linux 4.14+)")
+
+    if args.simulated:
+        def strategy_factory():
+            return SimulatedLibraryLoadStrategy(model_size=args.model_size * MIB)
+    else:
+        def strategy_factory():
+            return None
+
+    results = [run(mode, args.workers, strategy_factory) for mode in ("per-worker", "prefork")]
+    print(f"{'mode':<12}{'workers':>8}{'total PSS (MiB)':>18}{'master PSS (MiB)':>18}{'private/worker (MiB)':>22}")
+    for result in results:
+        print(f"{result['mode']:<12}{args.workers:>8}{result['total_pss'] / MIB:>18.1f}"
+              f"{result['master_pss'] / MIB:>18.1f}{result['worker_private'] / MIB:>22.1f}")
+    saved = results[0]["total_pss"] - results[1]["total_pss"]
+    print(f"\nprefork saves {saved / MIB:.1f} MiB ({saved / results[0]['total_pss']:.0%}) "
+          f"for {args.workers} workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Throughput of the batch operations from 1 to N cores: threads sharing a `SessionPool` against
+`ProcessPoolSession` worker processes.
+
+Threads run the native calls in parallel but serialize on the GIL for the Python work around them
+(configuration encoding, result decoding); worker processes do not, but every image costs a copy to
+shared memory and a pipe round trip. Processes pay off when the cores outnumber the threads the GIL
+lets run, i.e. with many cores and a large share of Python work per call.
+
+Usage:
+    python benchmarks/bench_process_pool.py --max-workers 8 --images 400
+    python benchmarks/bench_process_pool.py --simulated --latency 0.002
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from cryptonets_python_sdk.library import PrivIDFaceLib
+from cryptonets_python_sdk.process_pool_session import ProcessPoolSession
+from cryptonets_python_sdk.session import Session
+from cryptonets_python_sdk.session_pool import SessionPool
+from cryptonets_python_sdk.simulated_library import SimulatedLibraryLoadStrategy
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    SessionSettings,
+    Collection,
+    OperationConfig,
+)
+
+BASE_URL = os.getenv("CRYPTONETS_BASE_URL", "https://xxxxxxxxxxxxxxxxxxx")
+API_KEY = os.getenv("CRYPTONETS_API_KEY", "xxxxxxxxxxxxxxxx")
+
+
+def create_settings() -> SessionSettings:
+    """Create session settings from the environment."""
+    return SessionSettings(
+        collections={"default": Collection(named_urls={"base_url": BASE_URL})},
+        session_token=API_KEY,
+    )
+
+
+def run_threads(session: Session, operation: str, images: list, workers: int) -> float:
+    """Batch operation spread over a session pool of `workers` sessions, return the images per second."""
+    with SessionPool(create_settings(), size=workers) as pool:
+        method = getattr(session, f"{operation}_many")
+        start = time.perf_counter()
+        for _ in method(images, OperationConfig(), pool=pool):
+            pass
+        return len(images) / (time.perf_counter() - start)
+
+
+def run_processes(strategy, operation: str, images: list, workers: int) -> float:
+    """Batch operation spread over `workers` processes, return the images per second."""
+    with ProcessPoolSession(create_settings(), workers=workers, load_strategy=strategy) as pool:
+        method = getattr(pool, f"{operation}_many")
+        # first call of every worker (segment growth, configuration compilation) is not measured
+        for _ in method(images[:workers], OperationConfig()):
+            pass
+        start = time.perf_counter()
+        for _ in method(images, OperationConfig()):
+            pass
+        return len(images) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operation", choices=["validate", "estimate_age", "anti_spoofing"], default="validate")
+    parser.add_argument("--images", type=int, default=400, help="number of images to process")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--simulated", action="store_true", help="use the simulated native library")
+    parser.add_argument("--latency", type=float, default=0.002, help="latency of the simulated operations in seconds")
+    args = parser.parse_args()
+
+    strategy = SimulatedLibraryLoadStrategy(latency=args.latency) if args.simulated else None
+    # the parent library is only used by the thread pool runs, the workers initialize their own
+    PrivIDFaceLib.initialize(SimulatedLibraryLoadStrategy(latency=args.latency) if args.simulated else None)
+    session = Session(create_settings())
+    frame = np.random.default_rng(0).integers(0, 255, size=(args.height, args.width, 3), dtype=np.uint8)
+    images = [frame] * args.images
+
+    counts = sorted({1, 2, 4, 8, 16, 32, 64, args.max_workers} & set(range(1, args.max_workers + 1)))
+    print(f"{'workers':>8}{'threads (img/s)':>18}{'processes (img/s)':>20}{'speedup':>10}")
+    for workers in counts:
+        threads = run_threads(session, args.operation, images, workers)
+        processes = run_processes(strategy, args.operation, images, workers)
+        print(f"{workers:>8}{threads:>18.1f}{processes:>20.1f}{processes / threads:>10.2f}")
+    session.close()
+    PrivIDFaceLib.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark suite of the Python wrapper overhead.
+
+Every benchmark reports the throughput (ops/s, best of several repeats), the
+peak memory allocated by one operation (tracemalloc) and the number of CFFI
+cells (`ffi.new`) allocated by one operation in steady state. The native library is
+replaced by the simulated one (`SimulatedLibraryLoadStrategy`, no latency), so
+the round trip benchmarks measure the Python layer only.
+
+Results can be stored as a baseline and compared with a later run. A benchmark
+regresses when its throughput drops, or its peak allocation grows, by more than
+the threshold; the exit status is then 1.
+
+Usage:
+    python benchmarks/bench_suite.py                      # run and compare with the machine baseline, if any
+    python benchmarks/bench_suite.py --save               # run and store the machine baseline
+    python benchmarks/bench_suite.py --filter decode --threshold 0.1
+    python benchmarks/bench_suite.py --baseline other.json --quick
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from typing import Callable, Dict
+
+import msgspec
+import numpy as np
+from PIL import Image
+
+from cryptonets_python_sdk.img_utils import ImageUtils
+from cryptonets_python_sdk.instrumentation import Instrumentation, MetricsRegistry
+from cryptonets_python_sdk.library import PrivIDFaceLib
+from cryptonets_python_sdk.compiled_config import CompiledOperationConfig
+from cryptonets_python_sdk.predict_cache import PredictCache
+from cryptonets_python_sdk.result_views import FacesView, PredictView
+from cryptonets_python_sdk.session import ImageInputArg, Session
+from cryptonets_python_sdk.simulated_library import SimulatedLibrary, SimulatedLibraryLoadStrategy
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    AgeData,
+    BarCodeData,
+    BarcodeDetectionResult,
+    BarCodeDetectionStatus,
+    BoxF,
+    CallResult,
+    CallResultHeader,
+    Collection,
+    Color,
+    Depth,
+    DocumentData,
+    DocumentOcrAgeData,
+    DocumentResult,
+    DocumentTraits,
+    FaceGeometry,
+    FaceId,
+    FaceMetric,
+    FaceResult,
+    FaceTraitsFlags,
+    Image as ImageStruct,
+    ImageInfo,
+    OperationConfig,
+    PointF,
+    PredictData,
+    PredictResponse,
+    PredictUserInformation,
+    ReturnStatus,
+    SessionSettings,
+    SpoofStatus,
+    TrapezeF,
+)
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+# name -> factory(fixtures) returning the callable to measure
+BENCHMARKS: Dict[str, Callable[["Fixtures"], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark factory."""
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+
+class Fixtures:
+    """Inputs shared by the benchmarks, created on first use."""
+
+    def __init__(self):
+        self._directory = tempfile.mkdtemp(prefix="cryptonets_bench_")
+        self._cache = {}
+        self._teardowns = []
+        # Freeing a large block raises the glibc mmap threshold, as the image decode benchmarks do when they
+        # run first: without it, the output images of face_iso and doc_scan_face are mmapped and unmapped on
+        # every call and their throughput depends on the benchmarks selected by --filter.
+        bytearray(16 << 20)
+
+    def _get(self, name: str, create):
+        if name not in self._cache:
+            self._cache[name] = create()
+        return self._cache[name]
+
+    @property
+    def frame(self) -> np.ndarray:
+        """640x480 rgb frame"""
+        return self._get("frame", lambda: np.random.default_rng(0).integers(0, 255, size=(480, 640, 3),
+                                                                              dtype=np.uint8))
+
+    @property
+    def jpeg_path(self) -> str:
+        """1920x1440 JPEG photo with an EXIF orientation"""
+        def create():
+            path = os.path.join(self._directory, "photo.jpg")
+            y, x = np.mgrid[0:1440, 0:1920]
+            array = np.dstack([(x % 256), (y % 256), ((x + y) % 256)]).astype(np.uint8)
+            exif = Image.Exif()
+            exif[0x0112] = 6
+            Image.fromarray(array).save(path, quality=90, exif=exif)
+            return path
+        return self._get("jpeg_path", create)
+
+    @property
+    def session(self) -> Session:
+        """Session on the simulated native library"""
+        def create():
+            PrivIDFaceLib.initialize(SimulatedLibraryLoadStrategy())
+            return Session(SessionSettings(collections={"default": Collection(named_urls={"base_url": "http://x"})},
+                                           session_token="token"))
+        return self._get("session", create)
+
+    def add_teardown(self, teardown: Callable[[], object]):
+        """Register a callable run once the current benchmark is measured."""
+        self._teardowns.append(teardown)
+
+    def teardown(self):
+        while self._teardowns:
+            self._teardowns.pop()()
+
+    def close(self):
+        self.teardown()
+        session = self._cache.pop("session", None)
+        if session is not None:
+            session.close()
+            PrivIDFaceLib.shutdown()
+        shutil.rmtree(self._directory, ignore_errors=True)
+
+
+# ---------------------------------------------------------------- payloads
+
+
+def operation_config() -> OperationConfig:
+    """Configuration with the fields usually set by the applications."""
+    return OperationConfig(collection_name="default", conf_score_thr_enroll=0.2, conf_score_thr_predict=0.2,
+                           threshold_profile_enroll=0.6, threshold_profile_predict=0.65, blur_threshold_enroll_pred=40.0,
+                           anti_spoofing_threshold=0.9, face_thresholds_min=0.9, face_thresholds_med=1.0,
+                           face_thresholds_max=1.1, fetch_timeout_ms=5000, disable_predict_mf=True,
+                           neighbors=3, identifier="benchmark")
+
+
+def _header() -> CallResultHeader:
+    return CallResultHeader(return_status=ReturnStatus.API_NO_ERROR, operation_id=42, operation_type_id=4,
+                            return_message="", mf_token="x" * 64)
+
+
+def _face(index: int) -> FaceResult:
+    point = PointF(x=100.0 + index, y=120.0 + index)
+    return FaceResult(
+        geometry=FaceGeometry(bounding_box=BoxF(top_left=point, bottom_right=PointF(x=300.0, y=360.0)),
+                              eye_left=point, eye_right=point, face_confidence_score=0.98),
+        face_traits_flags=FaceTraitsFlags.FT_FACE_NO_TRAIT,
+        spoof_status=SpoofStatus.AS_NO_SPOOF_DETECTED,
+        ids=FaceId(puid=f"puid-{index:028d}", guid=f"guid-{index:028d}"),
+        scores=[FaceMetric(name=name, value=0.5) for name in ("blur", "yaw", "pitch", "roll", "brightness")],
+        age_data=AgeData(age_confidence_score=0.9, estimated_age=31.5),
+        cropped_image_info=ImageStruct(info=ImageInfo(width=224, height=224, channels=3, depth=Depth.P_CV_8U,
+                                                      color=Color.P_RGB)),
+    )
+
+
+def faces_payload() -> bytes:
+    """Predict result with three faces and ten candidates"""
+    return msgspec.json.encode(CallResult(
+        call_status=_header(),
+        faces=[_face(i) for i in range(3)],
+        predict=PredictData(predict_performed=True, message="ok", api_response=PredictResponse(
+            status=0, puid="puid-1", guid="guid-1", score=0.97,
+            PI_list=[PredictUserInformation(guid=f"guid-{i}", puid=f"puid-{i}", score=0.9 - i / 100)
+                     for i in range(10)])),
+    ))
+
+
+def document_payload() -> bytes:
+    """Document scan result with a face, document data and a parsed barcode"""
+    corner = PointF(x=10.0, y=20.0)
+    trapeze = TrapezeF(top_left=corner, top_right=corner, bottom_right=corner, bottom_lef=corner)
+    barcode_fields = {field: "VALUE" for field in BarCodeData.__struct_fields__}
+    return msgspec.json.encode(CallResult(
+        call_status=_header(),
+        faces=[_face(0)],
+        document=DocumentResult(
+            detected_document=DocumentData(document_box=trapeze, document_box_center=corner, confidence_score=0.97,
+                                           document_traits=DocumentTraits.DT_DOC_NO_TRAIT,
+                                           mrz_data=["P<UTOERIKSSON<<ANNA<MARIA<<<<<<<<<<<<<<<<<<<"] * 2,
+                                           ocr_age_data=DocumentOcrAgeData(dob="1990-01-01", age=35)),
+            cropped_document_image_info=ImageStruct(info=ImageInfo(width=1000, height=630, channels=3,
+                                                                   depth=Depth.P_CV_8U, color=Color.P_RGB))),
+        barcode=BarcodeDetectionResult(confidence_score=0.99, barcode_box_center=corner,
+                                       non_cropped_barcode_box=trapeze, cropped_barcode_box=trapeze,
+                                       bar_code_detection_status=BarCodeDetectionStatus.BS_SUCCESS,
+                                       barcode_data=BarCodeData(**barcode_fields)),
+    ))
+
+
+# ---------------------------------------------------------------- benchmarks
+
+
+@benchmark("image_input.from_array")
+def image_input_from_array(fixtures: Fixtures):
+    frame = fixtures.frame
+    return lambda: ImageInputArg(frame, "rgb")
+
+
+@benchmark("image_input.from_array.zero_copy")
+def image_input_from_array_zero_copy(fixtures: Fixtures):
+    frame = fixtures.frame
+    return lambda: ImageInputArg(frame, "rgb", zero_copy=True)
+
+
+@benchmark("image_input.from_path")
+def image_input_from_path(fixtures: Fixtures):
+    path = fixtures.jpeg_path
+    return lambda: ImageInputArg(path, "rgb")
+
+
+@benchmark("image_input.from_path.max_side_640")
+def image_input_from_path_max_side(fixtures: Fixtures):
+    path = fixtures.jpeg_path
+    return lambda: ImageInputArg(path, "rgb", max_side=640)
+
+
+@benchmark("image_utils.decode_rotate")
+def image_utils_decode_rotate(fixtures: Fixtures):
+    path = fixtures.jpeg_path
+    return lambda: ImageUtils.image_path_to_numpy_array(path, "rgb", apply_rotation=True)
+
+
+@benchmark("image_utils.rotate_contiguous")
+def image_utils_rotate(fixtures: Fixtures):
+    frame = fixtures.frame
+    return lambda: np.ascontiguousarray(ImageUtils._rotate_array(frame, 6))
+
+
+@benchmark("config.encode")
+def config_encode(fixtures: Fixtures):
+    config = operation_config()
+    return lambda: Session._encoder.encode(config)
+
+
+@benchmark("config.encode.compiled")
+def config_encode_compiled(fixtures: Fixtures):
+    compiled = CompiledOperationConfig(operation_config(), image_formats=["rgb"])
+    return lambda: compiled.encode("rgb")
+
+
+@benchmark("result.decode.faces")
+def result_decode_faces(fixtures: Fixtures):
+    payload = faces_payload()
+    return lambda: Session._result_decoder.decode(payload)
+
+
+@benchmark("result.decode.faces.predict_view")
+def result_decode_faces_view(fixtures: Fixtures):
+    payload = faces_payload()
+    decoder = Session._result_decoder_for(PredictView)
+    return lambda: decoder.decode(payload)
+
+
+@benchmark("result.decode.document")
+def result_decode_document(fixtures: Fixtures):
+    payload = document_payload()
+    return lambda: Session._result_decoder.decode(payload)
+
+
+@benchmark("session.validate")
+def session_validate(fixtures: Fixtures):
+    session, image, config = fixtures.session, ImageInputArg(fixtures.frame, "rgb"), operation_config()
+    return lambda: session.validate(image, config)
+
+
+@benchmark("session.validate.zero_copy_compiled_view")
+def session_validate_fast(fixtures: Fixtures):
+    session = fixtures.session
+    image = ImageInputArg(fixtures.frame, "rgb", zero_copy=True)
+    config = CompiledOperationConfig(operation_config(), image_formats=["rgb"])
+    return lambda: session.validate(image, config, result_view=FacesView)
+
+
+@benchmark("session.validate.instrumented")
+def session_validate_instrumented(fixtures: Fixtures):
+    session, image, config = fixtures.session, ImageInputArg(fixtures.frame, "rgb"), operation_config()
+    registry = MetricsRegistry()
+    Instrumentation.add_listener(registry)
+    fixtures.add_teardown(lambda: Instrumentation.remove_listener(registry))
+    return lambda: session.validate(image, config)
+
+
+@benchmark("session.face_predict_onefa")
+def session_predict(fixtures: Fixtures):
+    session, image, config = fixtures.session, ImageInputArg(fixtures.frame, "rgb"), operation_config()
+    return lambda: session.face_predict_onefa(image, config)
+
+
+@benchmark("session.face_predict_onefa.cached")
+def session_predict_cached(fixtures: Fixtures):
+    session, image, config = fixtures.session, ImageInputArg(fixtures.frame, "rgb"), operation_config()
+    session.predict_cache = PredictCache()
+    fixtures.add_teardown(lambda: setattr(session, "predict_cache", None))
+    return lambda: session.face_predict_onefa(image, config)
+
+
+@benchmark("session.face_iso")
+def session_face_iso(fixtures: Fixtures):
+    session, image, config = fixtures.session, ImageInputArg(fixtures.frame, "rgb"), operation_config()
+    return lambda: session.face_iso(image, config)
+
+
+@benchmark("session.doc_scan_face")
+def session_doc_scan_face(fixtures: Fixtures):
+    session, image, config = fixtures.session, ImageInputArg(fixtures.frame, "rgb"), operation_config()
+    return lambda: session.doc_scan_face(image, config)
+
+
+@benchmark("session.validate_many.16")
+def session_validate_many(fixtures: Fixtures):
+    session, frames, config = fixtures.session, [fixtures.frame] * 16, operation_config()
+    return lambda: list(session.validate_many(frames, config))
+
+
+# ---------------------------------------------------------------- runner
+
+
+def measure(function: Callable[[], object], min_time: float, repeat: int) -> Dict[str, float]:
+    """Return the throughput and the peak memory allocated by one call of `function`."""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number))
+
+    tracemalloc.start()
+    try:
+        function()
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        function()
+        peak = tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    return {"ops_per_sec": number / best, "peak_alloc_bytes": max(0, peak),
+            "ffi_allocs_per_op": count_ffi_allocations(function)}
+
+
+def count_ffi_allocations(function: Callable[[], object], calls: int = 100) -> float:
+    """Return the number of `ffi.new` calls made by one call of `function`, once warmed up.
+
+    The output buffers allocated by the simulated library stand for the native allocations and are not counted.
+    """
+    ffi = PrivIDFaceLib._ffibuilder
+    if ffi is None:
+        return 0.0
+    function()
+    count = 0
+    new = ffi.new
+
+    def counting_new(*args, **kwargs):
+        nonlocal count
+        if sys._getframe(1).f_globals.get("__name__") != SimulatedLibrary.__module__:
+            count += 1
+        return new(*args, **kwargs)
+
+    ffi.new = counting_new
+    try:
+        for _ in range(calls):
+            function()
+    finally:
+        del ffi.new
+    return count / calls
+
+
+def machine_key() -> str:
+    """Name of the baseline file of this machine."""
+    return f"{platform.system()}-{platform.machine()}-py{sys.version_info[0]}.{sys.version_info[1]}".lower()
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> Dict[str, str]:
+    """Return the regressions of `results` against `baseline`, by benchmark name.
+
+    Peak allocations are allowed to grow by 1 KiB on top of the threshold, to absorb allocator noise
+    on small benchmarks. CFFI allocations are deterministic and must not grow at all.
+    """
+    regressions = {}
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result["ops_per_sec"] < reference["ops_per_sec"] * (1 - threshold):
+            regressions[name] = (f"throughput {result['ops_per_sec']:.0f} ops/s < baseline "
+                                 f"{reference['ops_per_sec']:.0f} ops/s")
+        elif result["peak_alloc_bytes"] > reference["peak_alloc_bytes"] * (1 + threshold) + 1024:
+            regressions[name] = (f"peak allocation {result['peak_alloc_bytes']:.0f} B > baseline "
+                                 f"{reference['peak_alloc_bytes']:.0f} B")
+        elif result.get("ffi_allocs_per_op", 0) > reference.get("ffi_allocs_per_op", float("inf")):
+            regressions[name] = (f"{result['ffi_allocs_per_op']:g} CFFI allocations per operation > baseline "
+                                 f"{reference['ffi_allocs_per_op']:g}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="regular expression selecting the benchmarks")
+    parser.add_argument("--baseline", default=os.path.join(BASELINES_DIR, f"{machine_key()}.json"),
+                        help="baseline file (default: baselines/<machine>.json)")
+    parser.add_argument("--save", action="store_true", help="store the results as baseline")
+    parser.add_argument("--threshold", type=float, default=0.3, help="allowed relative regression")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum duration of one repeat in seconds")
+    parser.add_argument("--quick", action="store_true", help="short run, for smoke tests")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if re.search(args.filter, name)]
+    if args.list:
+        print("\n".join(names))
+        return 0
+    if args.quick:
+        args.repeat, args.min_time = 2, 0.02
+
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    fixtures = Fixtures()
+    results = {}
+    try:
+        print(f"  {'benchmark':<44} {'ops/s':>12} {'peak alloc':>12} {'ffi.new/op':>11} {'vs baseline':>12}")
+        for name in names:
+            try:
+                results[name] = measure(BENCHMARKS[name](fixtures), args.min_time, args.repeat)
+            finally:
+                fixtures.teardown()
+            reference = baseline.get(name)
+            ratio = f"x{results[name]['ops_per_sec'] / reference['ops_per_sec']:.2f}" if reference else "-"
+            print(f"  {name:<44} {results[name]['ops_per_sec']:12.1f} "
+                  f"{results[name]['peak_alloc_bytes'] / 1024:10.1f} K {results[name]['ffi_allocs_per_op']:11g} "
+                  f"{ratio:>12}")
+    finally:
+        fixtures.close()
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": machine_key(), "processor": platform.processor(),
+                       "date": time.strftime("%Y-%m-%d"), "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, reason in regressions.items():
+        print(f"REGRESSION {name}: {reason}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
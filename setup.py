@@ -49,6 +49,17 @@ REQUIRES = [
     "pyyaml >= 6.0.2"
 ]
 
+# Optional faster image decoder backends (see ImageDecoder)
+FAST_DECODE_REQUIRES = [
+    "PyTurboJPEG >= 1.7.0",
+    "opencv-python-headless >= 4.5.0",
+]
+
+# Optional OpenTelemetry exporter of the operation metrics (see instrumentation)
+OPENTELEMETRY_REQUIRES = [
+    "opentelemetry-api >= 1.20.0",
+]
+
 # Additional packages for development and testing
 DEV_REQUIRES = [    
     "pytest >= 6.2.0",
@@ -111,6 +122,8 @@ setup(
     install_requires=REQUIRES,
     extras_require={
         "dev": DEV_REQUIRES,
+        "fast-decode": FAST_DECODE_REQUIRES,
+        "opentelemetry": OPENTELEMETRY_REQUIRES,
     },
     python_requires=">=3.10",
     package_dir={"": "src"},
@@ -0,0 +1,188 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from cryptonets_python_sdk.session import ImageInputArg, SessionError
+from cryptonets_python_sdk.compiled_config import OperationConfigArg
+from cryptonets_python_sdk.session_pool import SessionPool
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    CallResult,
+    SessionSettings,
+)
+
+_DEFAULT = object()
+
+
+class AsyncSessionBusyError(SessionError):
+    """Raised when the call queue is full and the session is configured to reject calls"""
+    pass
+
+
+class AsyncSession:
+    """asyncio front end for `Session` operations.
+
+    Operations run in a bounded thread pool executor, each call on a session leased from a
+    `SessionPool`, so the event loop is never blocked by native inference or by the network
+    round-trips made by the native library.
+
+    At most `max_pending` calls are queued or running at once. When the queue is full, new calls
+    wait for a free slot (backpressure) or, with `reject_when_full=True`, fail immediately with
+    `AsyncSessionBusyError`.
+
+    Every operation accepts a `timeout` in seconds covering the queue wait and the execution.
+    When a call is cancelled or times out before it started it is removed from the queue. A native
+    call that already started cannot be interrupted: it runs to completion, its result is dropped
+    and its queue slot is released only then, so the bound on native work stays accurate.
+
+    Example:
+        >>> async with AsyncSession(settings, pool_size=4) as session:
+        ...     op_id, result = await session.validate(image, config, timeout=2.0)
+    """
+
+    def __init__(self, settings: Optional[SessionSettings] = None, pool_size: int = 4,
+                 max_pending: Optional[int] = None, timeout: Optional[float] = None,
+                 reject_when_full: bool = False, pool: Optional[SessionPool] = None):
+        """Create the asynchronous session.
+
+        Args:
+            settings: Settings used to create the native sessions (ignored when `pool` is given)
+            pool_size: Number of native sessions, which is also the number of concurrent native calls
+            max_pending: Maximum number of queued or running calls (defaults to 4 x pool size)
+            timeout: Default per-call timeout in seconds, None for no timeout
+            reject_when_full: Fail with `AsyncSessionBusyError` instead of waiting when the queue is full
+            pool: Existing pool to use, it is not closed by `close()`
+
+        Raises:
+            SessionError: If the native sessions cannot be created
+        """
+        if pool is None:
+            if settings is None:
+                raise ValueError("Either settings or pool must be provided")
+            pool = SessionPool(settings, size=pool_size)
+            self._owns_pool = True
+        else:
+            self._owns_pool = False
+        self._pool = pool
+        self._executor = ThreadPoolExecutor(max_workers=pool.max_size, thread_name_prefix='cryptonets-async')
+        self._max_pending = max_pending if max_pending is not None else 4 * pool.max_size
+        if self._max_pending < 1:
+            raise ValueError(f"max_pending must be positive, got {self._max_pending}")
+        self._slots = asyncio.Semaphore(self._max_pending)
+        self._pending = 0
+        self._timeout = timeout
+        self._reject_when_full = reject_when_full
+
+    @property
+    def pool(self) -> SessionPool:
+        """Pool of native sessions used to run the operations"""
+        return self._pool
+
+    @property
+    def pending(self) -> int:
+        """Number of calls queued or running in the executor"""
+        return self._pending
+
+    async def _call(self, operation: str, *args, timeout=_DEFAULT, **kwargs):
+        if timeout is _DEFAULT:
+            timeout = self._timeout
+        if timeout is None:
+            return await self._dispatch(operation, args, kwargs)
+        return await asyncio.wait_for(self._dispatch(operation, args, kwargs), timeout)
+
+    async def _dispatch(self, operation: str, args, kwargs):
+        if self._reject_when_full and self._slots.locked():
+            raise AsyncSessionBusyError(f"Too many pending calls ({self._max_pending})")
+        await self._slots.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(self._pool.run, operation, *args, timeout=None, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        self._pending += 1
+        # the slot is released once the executor is done with the call, not when the caller stops waiting
+        future.add_done_callback(lambda _: self._call_soon_threadsafe(loop, self._release_slot))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    @staticmethod
+    def _call_soon_threadsafe(loop: asyncio.AbstractEventLoop, callback):
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            # event loop already closed
+            pass
+
+    def _release_slot(self):
+        self._pending -= 1
+        self._slots.release()
+
+    async def validate(self, image: ImageInputArg, config: OperationConfigArg, *,
+                       result_view: type = CallResult, timeout=_DEFAULT) -> Tuple[int, CallResult]:
+        """Awaitable version of `Session.validate`."""
+        return await self._call('validate', image, config, result_view=result_view, timeout=timeout)
+
+    async def enroll_onefa(self, image: ImageInputArg, config: OperationConfigArg, *,
+                           result_view: type = CallResult, timeout=_DEFAULT) -> Tuple[int, CallResult]:
+        """Awaitable version of `Session.enroll_onefa`."""
+        return await self._call('enroll_onefa', image, config, result_view=result_view, timeout=timeout)
+
+    async def face_predict_onefa(self, image: ImageInputArg, config: OperationConfigArg, *,
+                                 result_view: type = CallResult, timeout=_DEFAULT) -> Tuple[int, CallResult]:
+        """Awaitable version of `Session.face_predict_onefa`."""
+        return await self._call('face_predict_onefa', image, config, result_view=result_view, timeout=timeout)
+
+    async def face_compare_files(self, image_a: ImageInputArg, image_b: ImageInputArg,
+                                 config: OperationConfigArg, *,
+                                 result_view: type = CallResult, timeout=_DEFAULT) -> Tuple[int, CallResult]:
+        """Awaitable version of `Session.face_compare_files`."""
+        return await self._call('face_compare_files', image_a, image_b, config, result_view=result_view,
+                                timeout=timeout)
+
+    async def estimate_age(self, image: ImageInputArg, config: OperationConfigArg, *,
+                           result_view: type = CallResult, timeout=_DEFAULT) -> Tuple[int, CallResult]:
+        """Awaitable version of `Session.estimate_age`."""
+        return await self._call('estimate_age', image, config, result_view=result_view, timeout=timeout)
+
+    async def face_iso(self, image: ImageInputArg, config: OperationConfigArg, *,
+                       result_view: type = CallResult, as_array: bool = False,
+                       timeout=_DEFAULT) -> Tuple[int, CallResult, bytes]:
+        """Awaitable version of `Session.face_iso`."""
+        return await self._call('face_iso', image, config, result_view=result_view, as_array=as_array,
+                                timeout=timeout)
+
+    async def anti_spoofing(self, image: ImageInputArg, config: OperationConfigArg, *,
+                            result_view: type = CallResult, timeout=_DEFAULT) -> Tuple[int, CallResult]:
+        """Awaitable version of `Session.anti_spoofing`."""
+        return await self._call('anti_spoofing', image, config, result_view=result_view, timeout=timeout)
+
+    async def doc_scan_face(self, image: ImageInputArg, config: OperationConfigArg, *,
+                            result_view: type = CallResult, as_array: bool = False,
+                            timeout=_DEFAULT) -> Tuple[int, CallResult, bytes, bytes]:
+        """Awaitable version of `Session.doc_scan_face`."""
+        return await self._call('doc_scan_face', image, config, result_view=result_view, as_array=as_array,
+                                timeout=timeout)
+
+    async def user_delete(self, puid: str, config: OperationConfigArg, *,
+                          result_view: type = CallResult, timeout=_DEFAULT) -> Tuple[int, CallResult]:
+        """Awaitable version of `Session.user_delete`."""
+        return await self._call('user_delete', puid, config, result_view=result_view, timeout=timeout)
+
+    def close(self, wait: bool = True):
+        """Shutdown the executor and close the pool when it was created by this session.
+
+        Args:
+            wait: Wait for the running native calls to complete
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        if self._owns_pool:
+            self._pool.close()
+
+    async def aclose(self):
+        """Close the session without blocking the event loop."""
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self) -> 'AsyncSession':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
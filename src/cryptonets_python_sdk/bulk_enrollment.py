@@ -0,0 +1,388 @@
+import csv
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Set, Tuple
+
+import msgspec
+import numpy as np
+
+from cryptonets_python_sdk.img_utils import ImageUtils
+from cryptonets_python_sdk.library import PrivIDError
+from cryptonets_python_sdk.result_views import EnrollView
+from cryptonets_python_sdk.session import ImageInputArg
+from cryptonets_python_sdk.session_pool import SessionPool
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    OperationConfig,
+    ReturnStatus,
+    SessionSettings,
+)
+
+ENROLLED = 'enrolled'
+FAILED = 'failed'
+
+
+class BulkEnrollmentError(PrivIDError):
+    """Raised when the manifest or the checkpoint cannot be read or written"""
+    pass
+
+
+class ManifestRow(msgspec.Struct, frozen=True):
+    """One image to enroll: its position in the manifest, its path and the identifier of its user."""
+    index: int
+    path: str
+    identifier: str
+
+
+class CheckpointRecord(msgspec.Struct, omit_defaults=True):
+    """Outcome of one manifest row, one JSON line of the checkpoint."""
+    index: int
+    path: str
+    identifier: str
+    status: str
+    puid: Optional[str] = None
+    op_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkEnrollmentReport:
+    """Progress of a bulk enrollment run.
+
+    `enrolled`, `failed` and `processed` count the rows of this run, `skipped` the rows completed by
+    previous runs. `rate` is in rows per second and `eta` in seconds, None until it can be estimated.
+    """
+    __slots__ = ('total', 'processed', 'enrolled', 'failed', 'skipped', 'elapsed', 'rate', 'eta')
+
+    def __init__(self, total: Optional[int], enrolled: int, failed: int, skipped: int, elapsed: float):
+        self.total = total
+        self.enrolled = enrolled
+        self.failed = failed
+        self.processed = enrolled + failed
+        self.skipped = skipped
+        self.elapsed = elapsed
+        self.rate = self.processed / elapsed if elapsed > 0 else 0.0
+        remaining = total - skipped - self.processed if total is not None else None
+        self.eta = remaining / self.rate if remaining is not None and self.rate > 0 else None
+
+    def __repr__(self) -> str:
+        total = '?' if self.total is None else self.total
+        eta = '?' if self.eta is None else f"{self.eta:.0f} s"
+        return (f"BulkEnrollmentReport({self.skipped + self.processed}/{total} rows, enrolled={self.enrolled}, "
+                f"failed={self.failed}, skipped={self.skipped}, {self.rate:.1f} rows/s, eta={eta})")
+
+
+def read_manifest(path: str, path_column: str = 'path',
+                  identifier_column: str = 'identifier') -> Iterator[ManifestRow]:
+    """Stream the rows of a manifest.
+
+    CSV manifests (``.csv``) have a header naming their columns, JSON Lines manifests (``.jsonl``,
+    ``.ndjson``) hold one object per line. Relative image paths are resolved against the directory
+    of the manifest. Blank lines are ignored, but still counted in the row indexes.
+
+    Args:
+        path: Path of the manifest
+        path_column: Column (or key) of the image paths
+        identifier_column: Column (or key) of the user identifiers, optional in the manifest
+
+    Raises:
+        BulkEnrollmentError: If the manifest format is unknown or a row has no image path
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in ('.csv', '.jsonl', '.ndjson'):
+        raise BulkEnrollmentError(f"Unknown manifest format {extension!r}, expected .csv, .jsonl or .ndjson")
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, newline='', encoding='utf-8') as f:
+        if extension == '.csv':
+            entries = csv.DictReader(f)
+        else:
+            decoder = msgspec.json.Decoder(Dict[str, Any])
+            entries = (decoder.decode(line) if line.strip() else None for line in f)
+        for index, entry in enumerate(entries):
+            if not entry:
+                continue
+            image_path = entry.get(path_column)
+            if not image_path:
+                raise BulkEnrollmentError(f"Row {index} of {path} has no {path_column!r} value")
+            yield ManifestRow(index, os.path.join(base, image_path), str(entry.get(identifier_column) or ''))
+
+
+def load_checkpoint(path: str) -> Dict[Tuple[str, str], CheckpointRecord]:
+    """Return the last record of every (path, identifier) of a checkpoint.
+
+    An empty dict is returned when the checkpoint does not exist. A truncated last line, left by a
+    crash while it was written, is ignored.
+
+    Raises:
+        BulkEnrollmentError: If a line other than the last one cannot be decoded
+    """
+    records = {}
+    if not os.path.exists(path):
+        return records
+    decoder = msgspec.json.Decoder(CheckpointRecord)
+    with open(path, 'rb') as f:
+        lines = f.read().split(b'\n')
+    for number, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            record = decoder.decode(line)
+        except msgspec.DecodeError as e:
+            if number == len(lines) - 1:
+                break
+            raise BulkEnrollmentError(f"Invalid record on line {number + 1} of {path}: {e}")
+        records[(record.path, record.identifier)] = record
+    return records
+
+
+def _truncate_partial_line(path: str):
+    """Drop the truncated last line of a checkpoint, so that the next records start on a line of their own."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+        # the records are short: read back by chunks until the previous line end
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            chunk = f.read(end - start)
+            newline = chunk.rfind(b'\n')
+            if newline >= 0:
+                f.truncate(start + newline + 1)
+                return
+            end = start
+        f.truncate(0)
+
+
+def _decode(path: str, image_format: str, max_side: Optional[int]) -> np.ndarray:
+    """Decode an image file, in a decode worker process."""
+    pixels, _ = ImageUtils.image_path_to_numpy_array(path, image_format, True, max_side)
+    return np.ascontiguousarray(pixels)
+
+
+class BulkEnrollment:
+    """Enroll the images of a manifest with `Session.enroll_onefa`, resumable after a crash.
+
+    The manifest is streamed, never loaded whole. Images are decoded by a pool of worker processes
+    (`decode_workers`) and enrolled by one thread per session of a `SessionPool` (`pool_size`), at
+    most `max_in_flight` rows being decoded or enrolled at a time. The configuration is used with
+    the `identifier` of each row.
+
+    The outcome of every row is appended to the checkpoint, a JSON Lines file of `CheckpointRecord`,
+    as soon as it is known: the PUID of the enrolled rows, the error of the failed ones. A new run
+    with the same checkpoint skips the enrolled rows, and the failed ones unless `retry_failed`.
+
+    Progress (throughput and ETA, see `BulkEnrollmentReport`) is sent to the `progress` callable every
+    `progress_interval` seconds and once at the end.
+
+    Example:
+        >>> enrollment = BulkEnrollment(settings, OperationConfig(collection_name="default"), "gallery.ckpt.jsonl",
+        ...                             pool_size=8, progress=print)
+        >>> report = enrollment.run("gallery.csv")  # run again after a crash: completed rows are skipped
+    """
+
+    def __init__(self, settings: SessionSettings, config: OperationConfig, checkpoint: str,
+                 pool_size: int = 4, decode_workers: Optional[int] = None, image_format: str = 'rgb',
+                 max_side: Optional[int] = None, max_in_flight: Optional[int] = None, retry_failed: bool = True,
+                 progress: Optional[Callable[[BulkEnrollmentReport], Any]] = None, progress_interval: float = 5.0,
+                 start_method: str = 'spawn', pool: Optional[SessionPool] = None):
+        """Create the enrollment engine.
+
+        Args:
+            settings: Settings of the native sessions (ignored when `pool` is given)
+            config: Enrollment configuration, usually naming the collection
+            checkpoint: Path of the checkpoint, created when it does not exist
+            pool_size: Number of native sessions, i.e. of concurrent enrollments
+            decode_workers: Number of decode processes, defaults to the CPU count; 0 decodes in the
+                enrollment threads
+            image_format: Pixel format the images are decoded to
+            max_side: Downscale the images at decode time so that their longest side is at most this
+            max_in_flight: Maximum number of rows decoded or enrolled at once (defaults to 4 x the
+                number of sessions plus decode processes)
+            retry_failed: Enroll again the rows that failed in a previous run
+            progress: Callable receiving a BulkEnrollmentReport
+            progress_interval: Seconds between two progress reports
+            start_method: multiprocessing start method of the decode processes
+            pool: Existing session pool to use, it is not closed by `run`
+
+        Raises:
+            ValueError: If a size is invalid
+        """
+        if pool_size < 1:
+            raise ValueError(f"pool_size must be positive, got {pool_size}")
+        if decode_workers is None:
+            decode_workers = os.cpu_count() or 1
+        if decode_workers < 0:
+            raise ValueError(f"decode_workers must not be negative, got {decode_workers}")
+        ImageUtils.check_image_format(image_format)
+        self._settings = settings
+        self._config = config
+        self._checkpoint = checkpoint
+        self._pool_size = pool.max_size if pool is not None else pool_size
+        self._decode_workers = decode_workers
+        self._image_format = image_format
+        self._max_side = max_side
+        self._max_in_flight = max_in_flight or 4 * (self._pool_size + decode_workers)
+        if self._max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be positive, got {self._max_in_flight}")
+        self._retry_failed = retry_failed
+        self._progress = progress
+        self._progress_interval = progress_interval
+        self._start_method = start_method
+        self._pool = pool
+        self._encoder = msgspec.json.Encoder()
+        self._lock = threading.Lock()
+        # state of the current run, written by the enrollment threads under the lock
+        self._counts = {ENROLLED: 0, FAILED: 0}
+        self._fatal: Optional[BaseException] = None
+
+    def _completed(self) -> Set[Tuple[str, str]]:
+        """Return the (path, identifier) of the rows the checkpoint marks as done."""
+        statuses = (ENROLLED,) if self._retry_failed else (ENROLLED, FAILED)
+        return {key for key, record in load_checkpoint(self._checkpoint).items() if record.status in statuses}
+
+    def run(self, manifest: str, path_column: str = 'path', identifier_column: str = 'identifier',
+            count_rows: bool = True) -> BulkEnrollmentReport:
+        """Enroll the rows of a manifest that are not completed yet.
+
+        Args:
+            manifest: Path of the CSV or JSON Lines manifest (see `read_manifest`)
+            path_column: Column of the image paths
+            identifier_column: Column of the user identifiers
+            count_rows: Count the manifest rows first, to estimate the ETA
+
+        Returns:
+            The final BulkEnrollmentReport
+
+        Raises:
+            BulkEnrollmentError: If the manifest or the checkpoint cannot be read or written
+        """
+        completed = self._completed()
+        try:
+            _truncate_partial_line(self._checkpoint)
+        except OSError as e:
+            raise BulkEnrollmentError(f"Cannot write the checkpoint {self._checkpoint}: {e}") from e
+        total = None
+        if count_rows:
+            total = sum(1 for _ in read_manifest(manifest, path_column, identifier_column))
+        # imported here, like the pooled batch operations of Session
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        pool = self._pool if self._pool is not None else SessionPool(self._settings, size=self._pool_size)
+        decoder = None
+        if self._decode_workers:
+            import multiprocessing
+            decoder = ProcessPoolExecutor(self._decode_workers, mp_context=multiprocessing.get_context(
+                self._start_method))
+        enroller = ThreadPoolExecutor(self._pool_size, thread_name_prefix='cryptonets-enroll')
+        slots = threading.BoundedSemaphore(self._max_in_flight)
+        self._counts = {ENROLLED: 0, FAILED: 0}
+        self._fatal = None
+        skipped = 0
+        start = last_report = time.monotonic()
+
+        def report() -> BulkEnrollmentReport:
+            with self._lock:
+                counts = dict(self._counts)
+            return BulkEnrollmentReport(total, counts[ENROLLED], counts[FAILED], skipped, time.monotonic() - start)
+
+        def wait_slot():
+            nonlocal last_report
+            while not slots.acquire(timeout=self._progress_interval):
+                self._report(report())
+            if time.monotonic() - last_report >= self._progress_interval:
+                last_report = time.monotonic()
+                self._report(report())
+
+        def decoded(future, row: ManifestRow):
+            # called by the decode pool; rows cancelled by an interrupted run are left to the next run
+            if future.cancelled():
+                slots.release()
+            else:
+                enroller.submit(self._enroll_row, pool, checkpoint, row, future, slots)
+
+        try:
+            with open(self._checkpoint, 'ab') as checkpoint:
+                try:
+                    for row in read_manifest(manifest, path_column, identifier_column):
+                        if (row.path, row.identifier) in completed:
+                            skipped += 1
+                            continue
+                        wait_slot()
+                        if self._fatal is not None:
+                            slots.release()
+                            break
+                        if decoder is None:
+                            enroller.submit(self._enroll_row, pool, checkpoint, row, None, slots)
+                        else:
+                            future = decoder.submit(_decode, row.path, self._image_format, self._max_side)
+                            future.add_done_callback(lambda future, row=row: decoded(future, row))
+                    # wait for the rows in flight
+                    for _ in range(self._max_in_flight):
+                        wait_slot()
+                finally:
+                    if decoder is not None:
+                        decoder.shutdown(wait=True, cancel_futures=True)
+                    enroller.shutdown(wait=True)
+                checkpoint.flush()
+                os.fsync(checkpoint.fileno())
+        except OSError as e:
+            raise BulkEnrollmentError(f"Cannot write the checkpoint {self._checkpoint}: {e}") from e
+        finally:
+            if self._pool is None:
+                pool.close()
+        if self._fatal is not None:
+            raise BulkEnrollmentError(f"Cannot write the checkpoint {self._checkpoint}: {self._fatal}")
+        final = report()
+        self._report(final)
+        return final
+
+    def _report(self, report: BulkEnrollmentReport):
+        if self._progress is not None:
+            self._progress(report)
+
+    def _enroll_row(self, pool: SessionPool, checkpoint, row: ManifestRow, decoded, slots: threading.Semaphore):
+        """Enroll one row and append its record to the checkpoint, in an enrollment thread."""
+        try:
+            try:
+                if decoded is None:
+                    pixels = _decode(row.path, self._image_format, self._max_side)
+                else:
+                    pixels = decoded.result()
+                config = self._config
+                if row.identifier:
+                    config = msgspec.structs.replace(config, identifier=row.identifier)
+                with pool.session() as session:
+                    op_id, result = session.enroll_onefa(ImageInputArg(pixels, self._image_format, zero_copy=True),
+                                                         config, result_view=EnrollView)
+                record = self._record(row, op_id, result)
+            except Exception as e:
+                record = CheckpointRecord(row.index, row.path, row.identifier, FAILED, error=f"{type(e).__name__}: {e}")
+            line = self._encoder.encode(record) + b'\n'
+            with self._lock:
+                checkpoint.write(line)
+                checkpoint.flush()
+                self._counts[record.status] += 1
+        except BaseException as e:
+            self._fatal = e
+        finally:
+            slots.release()
+
+    @staticmethod
+    def _record(row: ManifestRow, op_id: int, result: EnrollView) -> CheckpointRecord:
+        """Return the checkpoint record of an enrollment result."""
+        enroll = result.enroll or None
+        response = enroll.api_response if enroll else None
+        if result.call_status.return_status == ReturnStatus.API_NO_ERROR and enroll and enroll.enroll_performed \
+                and response and response.puid:
+            return CheckpointRecord(row.index, row.path, row.identifier, ENROLLED, puid=response.puid, op_id=op_id)
+        messages = [result.call_status.return_message, enroll.message if enroll else None,
+                    response.message if response else None]
+        error = '; '.join(message for message in messages if isinstance(message, str) and message)
+        return CheckpointRecord(row.index, row.path, row.identifier, FAILED, op_id=op_id,
+                                error=error or result.call_status.return_status.name)
@@ -0,0 +1,116 @@
+from typing import Iterable, Optional, Union
+
+import msgspec
+
+from cryptonets_python_sdk.idl.gen.privateid_types import OperationConfig
+
+
+class CompiledOperationConfig:
+    """Immutable operation configuration with its JSON encoding computed once.
+
+    `Session` operations set `input_image_format` from the input image before encoding the
+    configuration. A compiled configuration keeps a private snapshot of the `OperationConfig`
+    and caches one encoded buffer per image format, so passing it to any `Session` operation
+    skips the msgspec encoding on the hot path. It is never mutated and can be shared between
+    threads, sessions and pools.
+
+    Example:
+        >>> compiled = CompiledOperationConfig(OperationConfig(collection_name="default"), image_formats=["rgb"])
+        >>> op_id, result = session.face_predict_onefa(image, compiled)
+    """
+    __slots__ = ('_config', '_encoded', '_msgpack')
+
+    _encoder = msgspec.json.Encoder()
+    _msgpack_encoder = msgspec.msgpack.Encoder()
+
+    def __init__(self, config: OperationConfig, image_formats: Iterable[str] = ()):
+        """Compile a configuration.
+
+        Args:
+            config: Configuration to compile, later changes to it are not reflected
+            image_formats: Image formats to encode upfront (others are encoded on first use)
+        """
+        if not isinstance(config, OperationConfig):
+            raise TypeError(f"config must be an OperationConfig, got {type(config).__name__}")
+        object.__setattr__(self, '_config', msgspec.structs.replace(config))
+        object.__setattr__(self, '_encoded', {})
+        object.__setattr__(self, '_msgpack', None)
+        for image_format in image_formats:
+            self.encode(image_format)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    @property
+    def config(self) -> OperationConfig:
+        """Copy of the compiled configuration"""
+        return msgspec.structs.replace(self._config)
+
+    @property
+    def input_image_format(self):
+        """Image format of the compiled configuration (usually UNSET)"""
+        return self._config.input_image_format
+
+    @property
+    def collection_name(self):
+        """Collection name of the compiled configuration"""
+        return self._config.collection_name
+
+    def encode(self, image_format: Optional[str] = None) -> bytes:
+        """Return the JSON encoding of the configuration for an image format.
+
+        Args:
+            image_format: Value of `input_image_format`, None keeps the compiled value
+
+        Returns:
+            bytes: UTF-8 encoded JSON configuration
+        """
+        encoded = self._encoded.get(image_format)
+        if encoded is None:
+            config = self._config
+            if image_format is not None:
+                config = msgspec.structs.replace(config, input_image_format=image_format)
+            encoded = CompiledOperationConfig._encoder.encode(config)
+            self._encoded[image_format] = encoded
+        return encoded
+
+    def encode_msgpack(self) -> bytes:
+        """Return the msgpack encoding of the configuration, computed once.
+
+        Used to send the configuration to other processes, e.g. the workers of a `ProcessPoolSession`.
+        The compiled `input_image_format` is kept.
+
+        Returns:
+            bytes: msgpack encoded configuration
+        """
+        encoded = self._msgpack
+        if encoded is None:
+            encoded = CompiledOperationConfig._msgpack_encoder.encode(self._config)
+            object.__setattr__(self, '_msgpack', encoded)
+        return encoded
+
+    def __repr__(self) -> str:
+        return f"CompiledOperationConfig({self._config!r})"
+
+
+# Configuration accepted by the Session operations
+OperationConfigArg = Union[OperationConfig, CompiledOperationConfig]
+
+
+def encode_operation_config(encoder: msgspec.json.Encoder, config: OperationConfigArg,
+                            image_format: Optional[str] = None) -> bytes:
+    """Encode a plain or compiled configuration for an image format without mutating it.
+
+    Args:
+        encoder: Encoder used for plain configurations
+        config: Plain or compiled configuration
+        image_format: Value of `input_image_format`, None keeps the configuration value
+
+    Returns:
+        bytes: UTF-8 encoded JSON configuration
+    """
+    if isinstance(config, CompiledOperationConfig):
+        return config.encode(image_format)
+    if image_format is not None:
+        config = msgspec.structs.replace(config, input_image_format=image_format)
+    return encoder.encode(config)
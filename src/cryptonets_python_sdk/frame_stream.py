@@ -0,0 +1,233 @@
+import inspect
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from cryptonets_python_sdk.compiled_config import CompiledOperationConfig, OperationConfigArg
+from cryptonets_python_sdk.session import ImageInputArg, Session
+from cryptonets_python_sdk.idl.gen.privateid_types import CallResult
+
+
+class FrameResult:
+    """Result of the operation run on one frame of a stream.
+
+    `index` is the position of the frame in the source, `timestamp` its capture time and `latency`
+    the time from its capture to its result, in seconds.
+    """
+    __slots__ = ('index', 'timestamp', 'op_id', 'result', 'latency')
+
+    def __init__(self, index: int, timestamp: float, op_id: int, result: Any, latency: float):
+        self.index = index
+        self.timestamp = timestamp
+        self.op_id = op_id
+        self.result = result
+        self.latency = latency
+
+    def __repr__(self) -> str:
+        return (f"FrameResult(index={self.index}, timestamp={self.timestamp:.6f}, op_id={self.op_id}, "
+                f"latency={self.latency:.6f})")
+
+
+class FrameStream:
+    """Run `Session.validate` or `Session.anti_spoofing` on a stream of video frames in real time.
+
+    A reader thread pulls the frames from the source and copies them into three preallocated buffers
+    of the frame shape (triple buffering), each wrapped once in a zero-copy `ImageInputArg`: one
+    buffer is read by the native call, one holds the latest frame and one receives the next frame.
+    When the native call is slower than the source the latest frame wins: a frame replaced by a
+    newer one before it was processed is dropped. Every frame is copied once, so the source may
+    reuse its own buffer (e.g. a camera capture buffer) as soon as the frame is yielded.
+
+    With a `target_latency`, frame sampling adapts to keep the latency of the results (from the
+    capture of a frame to its result) under the target: each result above the target doubles the
+    minimum interval between the timestamps of the processed frames, each result below it shrinks
+    the interval by a fifth. The frames arriving before the interval elapsed are skipped, which
+    leaves the CPU to the rest of the application (capture, decoding, display) on small machines.
+
+    Example:
+        >>> stream = FrameStream(session, OperationConfig(), operation='anti_spoofing', target_latency=0.1)
+        >>> for frame_result in stream.process(camera_frames()):
+        ...     show(frame_result.timestamp, frame_result.result.faces)
+    """
+
+    OPERATIONS = ('validate', 'anti_spoofing')
+    # bounds of the sampling interval, in seconds
+    MIN_SAMPLE_INTERVAL = 0.001
+    MAX_SAMPLE_INTERVAL = 1.0
+
+    def __init__(self, session: Session, config: OperationConfigArg, operation: str = 'validate',
+                 image_format: str = 'rgb', target_latency: Optional[float] = None,
+                 result_view: type = CallResult, clock: Callable[[], float] = time.monotonic):
+        """Create the stream processor.
+
+        Args:
+            session: Session running the operation, used by one frame at a time
+            config: Operation configuration, compiled once for `image_format`
+            operation: 'validate' or 'anti_spoofing'
+            image_format: Pixel format of the frames
+            target_latency: Latency to keep the results under by sampling the frames, in seconds,
+                None to process the latest frame as soon as the previous one is done; it must be above
+                the duration of one call on an idle machine, or the sampling falls to one frame a second
+            result_view: Type to decode the results into, CallResult or a slim view from result_views
+            clock: Clock stamping the frames yielded without timestamp and measuring the latency;
+                the timestamps yielded by the source must come from the same clock
+
+        Raises:
+            ValueError: If the operation or the target latency is invalid
+        """
+        if operation not in self.OPERATIONS:
+            raise ValueError(f"operation must be one of {self.OPERATIONS}, got {operation!r}")
+        if target_latency is not None and target_latency <= 0:
+            raise ValueError(f"target_latency must be positive, got {target_latency}")
+        if not isinstance(config, CompiledOperationConfig):
+            config = CompiledOperationConfig(config, image_formats=[image_format])
+        self._call = getattr(session, operation)
+        self._config = config
+        self._image_format = image_format
+        self._target_latency = target_latency
+        self._result_view = result_view
+        self._clock = clock
+        self._sample_interval = 0.0
+        self.processed = 0
+        self.dropped = 0
+        self.skipped = 0
+
+    @property
+    def sample_interval(self) -> float:
+        """Current minimum interval between the timestamps of the processed frames, in seconds"""
+        return self._sample_interval
+
+    def process(self, frames: Iterable) -> Iterator[FrameResult]:
+        """Process a stream of frames, yielding the results in frame order.
+
+        The source is read by a background thread as fast as it yields, so it should be paced by
+        the capture (a camera, a decoder); a source replaying a file should sleep between frames.
+        Stopping the iteration stops the reader after its next frame.
+
+        Args:
+            frames: Iterable of frames, as (height, width, channels) uint8 arrays of a fixed shape or
+                (timestamp, array) tuples; bare arrays are stamped with the clock when read
+
+        Yields:
+            FrameResult of the processed frames
+
+        Raises:
+            ValueError: If a frame does not have the shape of the first one
+            Exception: Any exception raised by the source, once the frames read before it are processed
+        """
+        reader = _FrameReader(self, frames)
+        reader.start()
+        last_timestamp = None
+        try:
+            while True:
+                frame = reader.take()
+                if frame is None:
+                    return
+                index, timestamp, slot = frame
+                try:
+                    if last_timestamp is not None and timestamp - last_timestamp < self._sample_interval:
+                        self.skipped += 1
+                        continue
+                    op_id, result = self._call(reader.images[slot], self._config, result_view=self._result_view)
+                finally:
+                    reader.release(slot)
+                last_timestamp = timestamp
+                latency = self._clock() - timestamp
+                self.processed += 1
+                self._adapt(latency)
+                yield FrameResult(index, timestamp, op_id, result, latency)
+        finally:
+            reader.stop()
+
+    def _adapt(self, latency: float):
+        """Update the sampling interval from the latency of the last result."""
+        if self._target_latency is None:
+            return
+        if latency > self._target_latency:
+            self._sample_interval = min(max(2 * self._sample_interval, self.MIN_SAMPLE_INTERVAL),
+                                        self.MAX_SAMPLE_INTERVAL)
+        else:
+            self._sample_interval *= 0.8
+            if self._sample_interval < self.MIN_SAMPLE_INTERVAL:
+                self._sample_interval = 0.0
+
+
+class _FrameReader:
+    """Reader thread of `FrameStream`, copying the frames into three buffers."""
+
+    def __init__(self, stream: FrameStream, frames: Iterable):
+        self._stream = stream
+        self._frames = frames
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='cryptonets-frames', daemon=True)
+        self._buffers: List[np.ndarray] = []
+        self.images: List[ImageInputArg] = []
+        self._free = [0, 1, 2]
+        # (index, timestamp, slot) of the latest frame not taken yet
+        self._ready = None
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._stopped = False
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Ask the thread to stop, it exits after its current frame."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def take(self):
+        """Wait for the latest frame and return its (index, timestamp, slot), None at the end of the source."""
+        with self._condition:
+            while self._ready is None and not self._done:
+                self._condition.wait()
+            frame, self._ready = self._ready, None
+            if frame is None and self._error is not None:
+                raise self._error
+            return frame
+
+    def release(self, slot: int):
+        """Give back the buffer of a frame once processed."""
+        with self._condition:
+            self._free.append(slot)
+
+    def _allocate(self, frame: np.ndarray):
+        self._buffers = [np.empty_like(frame, order='C') for _ in range(3)]
+        self.images = [ImageInputArg(buffer, self._stream._image_format, zero_copy=True) for buffer in self._buffers]
+
+    def _run(self):
+        try:
+            for index, frame in enumerate(self._frames):
+                if isinstance(frame, tuple):
+                    timestamp, frame = frame
+                else:
+                    timestamp = self._stream._clock()
+                if not self._buffers:
+                    self._allocate(frame)
+                elif frame.shape != self._buffers[0].shape:
+                    raise ValueError(f"Frame {index} has shape {frame.shape}, the stream frames have shape "
+                                     f"{self._buffers[0].shape}")
+                with self._condition:
+                    if self._stopped:
+                        break
+                    slot = self._free.pop()
+                np.copyto(self._buffers[slot], frame)
+                with self._condition:
+                    if self._ready is not None:
+                        self._free.append(self._ready[2])
+                        self._stream.dropped += 1
+                    self._ready = (index, timestamp, slot)
+                    self._condition.notify_all()
+        except BaseException as e:
+            self._error = e
+        finally:
+            # a generator stopped early releases its resources (e.g. a camera) here, in its own thread
+            if inspect.isgenerator(self._frames):
+                self._frames.close()
+            with self._condition:
+                self._done = True
+                self._condition.notify_all()
@@ -1,42 +1,47 @@
-from typing import Any
+import io
+from typing import Any, BinaryIO, Optional, Union, TYPE_CHECKING
 
 import numpy as np
-from PIL import Image
-import exifread
 import os
 
+# Pillow and exifread are imported when an image is decoded, the SDK can be used with numpy inputs only
+if TYPE_CHECKING:
+    from PIL import Image
+
 from numpy import ndarray, dtype
 from numpy._core.multiarray import scalar
 
+# DCT scaling denominators supported by every JPEG decoder backend
+_JPEG_SCALE_DENOMINATORS = (8, 4, 2, 1)
+_EXIF_ORIENTATION_TAG = 0x0112
+
+# Encoded image accepted by ImageDecoder: file path, in-memory bytes or binary file-like object
+ImageSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
 
 class ImageUtils:
     @staticmethod
-    def _get_exif_orientation(image_path):
-        with open(image_path, 'rb') as f:
-            tags = exifread.process_file(f)
+    def _get_exif_orientation(image: 'Image.Image', source: Union[str, bytes, memoryview, None] = None):
+        """
+        Returns the EXIF orientation of an open image (1 when missing).
+
+        The EXIF block already read with the image header is used. Only when Pillow cannot parse it,
+        the file path or encoded bytes (`source`) are read again with exifread, stopping at the orientation tag.
+        """
+        try:
+            return image.getexif().get(_EXIF_ORIENTATION_TAG, 1)
+        except Exception:
+            # malformed EXIF block
+            if source is None:
+                return 1
+        import exifread
+        with open(source, 'rb') if isinstance(source, str) else io.BytesIO(source) as f:
+            tags = exifread.process_file(f, stop_tag='Orientation', details=False)
         # Exifread uses 'Image Orientation' to store the orientation data
         orientation_tag = 'Image Orientation'
         if orientation_tag in tags:
-            # Convert the value to an integer
-            orientation_value = tags[orientation_tag].values[0]
-            # Return the orientation value
-            return orientation_value
-        else:
-            # No orientation tag found, return a default value
-            return 1
-
-    @staticmethod
-    def _apply_rotation(image, orientation):       
-        """
-        Applies rotation to the image based on the EXIF orientation.
-        """
-        if orientation == 3:
-            image = image.rotate(180, expand=True)
-        elif orientation == 6:
-            image = image.rotate(270, expand=True)
-        elif orientation == 8:
-            image = image.rotate(90, expand=True)
-        return image
+            return tags[orientation_tag].values[0]
+        return 1
 
     @staticmethod
     def check_image_format(image_input_format: str): 
@@ -60,29 +65,316 @@ class ImageUtils:
                 raise ValueError("Image array must be a 3D array with 3 channels")
     
     @staticmethod
-    def image_path_to_numpy_array(image_path:str,input_format:str='',apply_rotation: bool = True) -> list[
-        ndarray[tuple[Any, ...], dtype[scalar]] | str]:
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image file not found: {image_path}")
-        # open file
-        input_format = input_format.lower()
-        image = Image.open(image_path)
-        # read pixel format 
-        pixel_format = image.mode.lower()
-
-        # if caller specified a specfic format that is different from the pixel format, convert it
-        if input_format != '' and ImageUtils.check_image_format(input_format):
-            if pixel_format != input_format:
-                image = image.convert(input_format.upper())
-                pixel_format = input_format
-        else:
-            # check if the pixel format is supported
+    def image_path_to_numpy_array(image_path:str,input_format:str='',apply_rotation: bool = True,
+                                  max_side: Optional[int] = None, out: Optional[np.ndarray] = None,
+                                  backend: str = 'auto') -> list[ndarray[tuple[Any, ...], dtype[scalar]] | str]:
+        """Decode an image file to a (height, width, channels) uint8 array.
+
+        Args:
+            image_path: Path of the image file
+            input_format: Pixel format of the array ("rgb", "bgr" or "rgba"), empty to keep the file format
+            apply_rotation: Apply the EXIF orientation
+            max_side: Downscale the image so that its longest side is at most `max_side` pixels
+            out: Preallocated uint8 buffer receiving the pixels (see `ImageDecoder.decode`)
+            backend: Decoder backend, see `ImageDecoder`
+
+        Returns:
+            [array, pixel_format]: The decoded pixels, which may be read-only, and their format
+        """
+        return list(ImageDecoder(backend).decode(image_path, input_format, apply_rotation, max_side, out))
+
+    @staticmethod
+    def _rotate_array(image_array: np.ndarray, orientation) -> np.ndarray:
+        """
+        Applies the EXIF orientation to an array as a view, without copying the pixels.
+        """
+        if orientation == 3:
+            return np.rot90(image_array, 2)
+        elif orientation == 6:
+            return np.rot90(image_array, 3)
+        elif orientation == 8:
+            return np.rot90(image_array, 1)
+        return image_array
+
+
+class ImageDecoder:
+    """Image decode engine.
+
+    Decodes image files, in-memory bytes and streams straight to the pixel format expected by the
+    native library, optionally at a reduced resolution: face detection does not need the full 12 MP
+    of a phone photo. JPEG images are decoded with DCT scaling (1/2, 1/4 or 1/8 of the size) so the
+    full-size frame is never built, then resized to the requested `max_side`.
+
+    Backends:
+        - "pil": Pillow (always available), JPEG draft mode.
+        - "turbojpeg": libjpeg-turbo through PyTurboJPEG, JPEG only (other files fall back to Pillow).
+        - "opencv": OpenCV `imread`/`imdecode` with the `IMREAD_REDUCED_*` flags, rgb and bgr outputs only.
+        - "auto": turbojpeg for JPEG files, then opencv, then Pillow, depending on what is installed.
+
+    The EXIF orientation is handled the same way by every backend.
+
+    Example:
+        >>> decoder = ImageDecoder()
+        >>> array, pixel_format = decoder.decode("photo.jpg", "rgb", max_side=1280)
+    """
+    BACKENDS = ('auto', 'pil', 'turbojpeg', 'opencv')
+
+    _turbojpeg = None
+    _turbojpeg_error = None
+    # PyTurboJPEG >= 2.0 decodes into a preallocated array (`dst`)
+    _turbojpeg_dst = False
+
+    def __init__(self, backend: str = 'auto'):
+        """Create a decoder.
+
+        Args:
+            backend: One of `ImageDecoder.BACKENDS`
+
+        Raises:
+            ValueError: If the backend is unknown
+            ImportError: If the requested backend is not installed
+        """
+        if backend not in ImageDecoder.BACKENDS:
+            raise ValueError(f"Invalid image decoder backend: {backend}")
+        if backend == 'turbojpeg' and ImageDecoder._load_turbojpeg() is None:
+            raise ImportError(f"turbojpeg backend is not available: {ImageDecoder._turbojpeg_error}")
+        if backend == 'opencv' and ImageDecoder._load_opencv() is None:
+            raise ImportError("opencv backend is not available, install opencv-python-headless")
+        self.backend = backend
+
+    @staticmethod
+    def _load_turbojpeg():
+        if ImageDecoder._turbojpeg is None and ImageDecoder._turbojpeg_error is None:
+            try:
+                import inspect
+                from turbojpeg import TurboJPEG
+                ImageDecoder._turbojpeg = TurboJPEG()
+                ImageDecoder._turbojpeg_dst = 'dst' in inspect.signature(TurboJPEG.decode).parameters
+            except (ImportError, OSError, RuntimeError) as e:
+                # python package or libturbojpeg shared library missing
+                ImageDecoder._turbojpeg_error = e
+        return ImageDecoder._turbojpeg
+
+    @staticmethod
+    def _load_opencv():
+        try:
+            import cv2
+        except ImportError:
+            return None
+        return cv2
+
+    @staticmethod
+    def available_backends() -> list[str]:
+        """Return the backends that can be used in this environment"""
+        backends = ['pil']
+        if ImageDecoder._load_turbojpeg() is not None:
+            backends.append('turbojpeg')
+        if ImageDecoder._load_opencv() is not None:
+            backends.append('opencv')
+        return backends
+
+    @staticmethod
+    def _target_size(width: int, height: int, max_side: Optional[int]) -> tuple[int, int]:
+        if max_side is None or max(width, height) <= max_side:
+            return width, height
+        scale = max_side / max(width, height)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    @staticmethod
+    def _scale_denominator(width: int, height: int, target: tuple[int, int]) -> int:
+        """Largest DCT scaling denominator keeping the image at least as large as the target"""
+        for denominator in _JPEG_SCALE_DENOMINATORS:
+            if -(-width // denominator) >= target[0] and -(-height // denominator) >= target[1]:
+                return denominator
+        return 1
+
+    def decode(self, source: ImageSource, image_format: str = '', apply_rotation: bool = True,
+               max_side: Optional[int] = None, out: Optional[np.ndarray] = None) -> tuple[np.ndarray, str]:
+        """Decode an encoded image.
+
+        Args:
+            source: Path of the image file, encoded image bytes (bytes, bytearray, memoryview or any
+                buffer) or a binary file-like object, read until its end
+            image_format: Pixel format of the array ("rgb", "bgr" or "rgba"), empty to keep the file format
+                (which must then be RGB or RGBA)
+            apply_rotation: Apply the EXIF orientation
+            max_side: Downscale the image so that its longest side is at most `max_side` pixels
+            out: Preallocated C-contiguous uint8 buffer of any shape, at least as large as the decoded image.
+                The pixels are written to its beginning and the returned array is a view of it, so one
+                buffer can be reused for images of different sizes. PyTurboJPEG >= 2.0 decodes and OpenCV
+                resizes or converts straight into it; otherwise (Pillow, rotated images, PyTurboJPEG < 2.0)
+                the decoded pixels are copied to it once.
+
+        Returns:
+            Tuple of (array, pixel_format). Without `out` the array may be read-only.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            PIL.UnidentifiedImageError: If the image format is not recognized
+            ValueError: If the pixel format is not supported or `out` is too small
+        """
+        source = ImageDecoder._source_data(source)
+        image_format = image_format.lower()
+        if image_format != '':
+            ImageUtils.check_image_format(image_format)
+        if max_side is not None and max_side < 1:
+            raise ValueError(f"max_side must be positive, got {max_side}")
+
+        from PIL import Image
+        image = Image.open(source if isinstance(source, str) else io.BytesIO(source))
+        try:
+            # only the header (including the EXIF block) has been read so far
+            orientation = ImageUtils._get_exif_orientation(image, source) if apply_rotation else 1
+            target = ImageDecoder._target_size(image.width, image.height, max_side)
+            pixel_format = image_format or image.mode.lower()
+            # check if the pixel format of the file is supported
             ImageUtils.check_image_format(pixel_format)
+            dst = None
+            if out is not None:
+                shape = (target[1], target[0], 4 if pixel_format == 'rgba' else 3)
+                if orientation in (6, 8):
+                    shape = (shape[1], shape[0], shape[2])
+                dst = ImageDecoder._out_view(out, shape)
+            # a rotated image cannot be decoded in place: it is decoded, then copied rotated to `out`
+            decode_dst = dst if orientation not in (3, 6, 8) else None
+            image_array = None
+            if image_format != '':
+                backend = self._array_backend(image.format, image_format)
+                if backend == 'turbojpeg':
+                    image_array = self._decode_turbojpeg(source, image.size, target, image_format, decode_dst)
+                elif backend == 'opencv':
+                    image_array = self._decode_opencv(source, image.size, target, image_format, decode_dst)
+            if image_array is None:
+                image_array, image_format = self._decode_pil(image, target, image_format, decode_dst)
+        finally:
+            image.close()
+
+        image_array = ImageUtils._rotate_array(image_array, orientation)
+        if dst is not None and decode_dst is None:
+            np.copyto(dst, image_array)
+            image_array = dst
+        return image_array, image_format
+
+    @staticmethod
+    def _source_data(source: ImageSource) -> Union[str, bytes, memoryview]:
+        """Return the file path or the encoded bytes of a source, without copying in-memory buffers"""
+        if isinstance(source, (str, os.PathLike)):
+            image_path = os.fspath(source)
+            if not os.path.exists(image_path):
+                raise FileNotFoundError(f"Image file not found: {image_path}")
+            return image_path
+        if isinstance(source, bytes):
+            return source
+        if hasattr(source, 'read'):
+            return source.read()
+        # bytearray, memoryview, numpy array ...
+        return memoryview(source).cast('B')
+
+    def _array_backend(self, file_format: Optional[str], image_format: str) -> str:
+        if self.backend in ('auto', 'turbojpeg') and file_format == 'JPEG' \
+                and ImageDecoder._load_turbojpeg() is not None:
+            return 'turbojpeg'
+        if self.backend in ('auto', 'opencv') and image_format in ('rgb', 'bgr') \
+                and ImageDecoder._load_opencv() is not None:
+            return 'opencv'
+        return 'pil'
+
+    @staticmethod
+    def _decode_pil(image: 'Image.Image', target: tuple[int, int], image_format: str,
+                    dst: Optional[np.ndarray] = None) -> tuple[np.ndarray, str]:
+        from PIL import Image
+        if target != image.size:
+            # JPEG: let the decoder scale the DCT blocks instead of decoding the full frame
+            image.draft(None, target)
+            if image.size != target:
+                image = image.resize(target, Image.Resampling.BILINEAR)
+        if image_format == '':
+            image_format = image.mode.lower()
+        else:
+            mode = 'RGBA' if image_format == 'rgba' else 'RGB'
+            if image.mode != mode:
+                image = image.convert(mode)
+        # single copy from the Pillow frame, read-only as it shares the memory of the returned bytes
+        image_array = np.asarray(image)
+        if image_format == 'bgr':
+            image_array = image_array[..., ::-1]
+        if dst is not None:
+            # Pillow has no public API writing its frame to a caller buffer: one more copy
+            np.copyto(dst, image_array)
+            return dst, image_format
+        return image_array, image_format
+
+    @staticmethod
+    def _decode_turbojpeg(source: Union[str, bytes, memoryview], size: tuple[int, int], target: tuple[int, int],
+                          image_format: str, dst: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        import turbojpeg
+        pixel_format = {'rgb': turbojpeg.TJPF_RGB, 'bgr': turbojpeg.TJPF_BGR, 'rgba': turbojpeg.TJPF_RGBA}
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                data = f.read()
+        else:
+            data = source
+        denominator = ImageDecoder._scale_denominator(size[0], size[1], target)
+        # libjpeg-turbo rounds the scaled sizes up
+        scaled = (-(-size[0] // denominator), -(-size[1] // denominator))
+        options = {}
+        if dst is not None and scaled == target and ImageDecoder._turbojpeg_dst:
+            options['dst'] = dst
+        try:
+            image_array = ImageDecoder._turbojpeg.decode(data, pixel_format=pixel_format[image_format],
+                                                         scaling_factor=(1, denominator), **options)
+        except OSError:
+            # e.g. CMYK JPEG, decoded by Pillow instead
+            return None
+        if image_array is dst:
+            return dst
+        return ImageDecoder._resize_array(image_array, target, dst)
 
-        if apply_rotation:
-            rotation = ImageUtils._get_exif_orientation(image_path)
-            image=ImageUtils._apply_rotation(image,rotation)
+    @staticmethod
+    def _decode_opencv(source: Union[str, bytes, memoryview], size: tuple[int, int], target: tuple[int, int],
+                       image_format: str, dst: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        cv2 = ImageDecoder._load_opencv()
+        flags = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4,
+                 8: cv2.IMREAD_REDUCED_COLOR_8}[ImageDecoder._scale_denominator(size[0], size[1], target)]
+        # the EXIF orientation is applied afterwards, consistently with the other backends
+        flags |= cv2.IMREAD_IGNORE_ORIENTATION
+        if isinstance(source, str):
+            image_array = cv2.imread(source, flags)
+        else:
+            image_array = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), flags)
+        if image_array is None:
+            # format not supported by OpenCV
+            return None
+        # the last processing step (resize or channel swap) writes to `dst`
+        if image_format == 'rgb':
+            image_array = ImageDecoder._resize_array(image_array, target)
+            return cv2.cvtColor(image_array, cv2.COLOR_BGR2RGB, dst=dst)
+        return ImageDecoder._resize_array(image_array, target, dst)
 
-        return [np.array(image),pixel_format]
-        
+    @staticmethod
+    def _resize_array(image_array: np.ndarray, target: tuple[int, int],
+                      dst: Optional[np.ndarray] = None) -> np.ndarray:
+        if (image_array.shape[1], image_array.shape[0]) == target:
+            if dst is not None:
+                np.copyto(dst, image_array)
+                return dst
+            return image_array
+        cv2 = ImageDecoder._load_opencv()
+        if cv2 is not None:
+            return cv2.resize(image_array, target, dst=dst, interpolation=cv2.INTER_AREA)
+        from PIL import Image
+        image_array = np.asarray(Image.fromarray(image_array).resize(target, Image.Resampling.BILINEAR))
+        if dst is not None:
+            np.copyto(dst, image_array)
+            return dst
+        return image_array
 
+    @staticmethod
+    def _out_view(out: np.ndarray, shape: tuple[int, int, int]) -> np.ndarray:
+        """Return the view of the beginning of `out` receiving an image of the given shape."""
+        if out.dtype != np.uint8 or not out.flags.c_contiguous or not out.flags.writeable:
+            raise ValueError("out must be a writable C-contiguous np.uint8 array")
+        size = shape[0] * shape[1] * shape[2]
+        if out.size < size:
+            raise ValueError(f"out is too small: {out.size} bytes, {size} needed")
+        return out.reshape(-1)[:size].reshape(shape)
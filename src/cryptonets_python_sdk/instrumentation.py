@@ -0,0 +1,376 @@
+"""Opt-in per-operation instrumentation of `Session`.
+
+Every `Session` operation (and every image of the batch operations) can produce an `OperationRecord`
+holding the duration of each phase of the call, the bytes passed to and returned by the native library,
+the operation id and the returned status:
+
+- ``encode``: configuration encoding and argument preparation, up to the native call
+- ``native``: the native library call itself
+- ``copy``: copy of the output images and of the result buffer to Python objects
+- ``decode``: decoding of the JSON result (msgspec)
+- ``total``: the whole operation
+
+Records are sent to the listeners registered with `Instrumentation.add_listener`. Instrumentation is
+enabled while at least one listener is registered; when it is disabled an operation only pays one
+attribute lookup.
+
+`MetricsRegistry` aggregates the records into latency histograms and counters and renders them in the
+Prometheus text format. `OpenTelemetryExporter` records them with an OpenTelemetry meter.
+
+Example:
+    >>> registry = MetricsRegistry()
+    >>> Instrumentation.add_listener(registry)
+    >>> op_id, result = session.face_predict_onefa(image, config)
+    >>> print(registry.prometheus_text())
+"""
+
+import functools
+import os
+import threading
+import time
+import warnings
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from cryptonets_python_sdk.idl.gen.privateid_types import ReturnStatus
+
+PHASES = ('encode', 'native', 'copy', 'decode', 'total')
+
+# Latency histogram buckets in seconds, from 100 us to 10 s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0)
+
+
+class OperationRecord:
+    """Measurements of one operation.
+
+    Durations are in seconds. Phases that did not run (e.g. the native call of an operation whose
+    arguments were rejected) are 0. `return_status` and `operation_type_id` are None when the result
+    could not be decoded, `error` then holds the name of the raised exception.
+    """
+    __slots__ = ('operation', 'op_id', 'return_status', 'operation_type_id', 'bytes_in', 'bytes_out', 'error',
+                 'encode', 'native', 'copy', 'decode', 'total',
+                 '_start', '_native_start', '_native_end', '_decode_start', '_decode_end')
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.op_id: Optional[int] = None
+        self.return_status: Optional[ReturnStatus] = None
+        self.operation_type_id: Optional[int] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.error: Optional[str] = None
+        self.encode = self.native = self.copy = self.decode = self.total = 0.0
+        self._start = time.perf_counter()
+        self._native_start = self._native_end = self._decode_start = self._decode_end = None
+
+    def _finish(self):
+        """Compute the phase durations from the timestamps taken during the call."""
+        end = time.perf_counter()
+        self.total = end - self._start
+        if self._native_start is not None:
+            self.encode = self._native_start - self._start
+            self.native = self._native_end - self._native_start
+        if self._decode_start is not None:
+            self.copy = self._decode_start - (self._native_end or self._start)
+            self.decode = self._decode_end - self._decode_start
+
+    def phases(self) -> Dict[str, float]:
+        """Return the duration of every phase, by phase name"""
+        return {phase: getattr(self, phase) for phase in PHASES}
+
+    @property
+    def status_label(self) -> str:
+        """Name of the returned status, or of the raised exception"""
+        if self.return_status is not None:
+            return self.return_status.name
+        return self.error or 'UNKNOWN'
+
+    def __repr__(self) -> str:
+        return (f"OperationRecord(operation={self.operation!r}, op_id={self.op_id}, status={self.status_label}, "
+                f"total={self.total:.6f}, bytes_in={self.bytes_in}, bytes_out={self.bytes_out})")
+
+
+# Callable receiving the record of every instrumented operation
+Listener = Callable[[OperationRecord], Any]
+
+
+class Instrumentation:
+    """Process wide registry of the instrumentation listeners.
+
+    Listeners are called synchronously, on the thread that ran the operation, after the operation
+    completed. They must be thread-safe and fast; exceptions they raise are reported as warnings and
+    never fail the operation.
+    """
+    # Read without lock on every operation, only rebound under _lock
+    enabled = False
+    _listeners: Tuple[Listener, ...] = ()
+    _lock = threading.Lock()
+    _active = threading.local()
+
+    @classmethod
+    def add_listener(cls, listener: Listener):
+        """Register a listener and enable the instrumentation."""
+        with cls._lock:
+            cls._listeners = cls._listeners + (listener,)
+            cls.enabled = True
+
+    @classmethod
+    def remove_listener(cls, listener: Listener):
+        """Unregister a listener; the instrumentation is disabled with the last one.
+
+        Raises:
+            ValueError: If the listener is not registered
+        """
+        with cls._lock:
+            listeners = list(cls._listeners)
+            listeners.remove(listener)
+            cls._listeners = tuple(listeners)
+            cls.enabled = bool(listeners)
+
+    @classmethod
+    def clear(cls):
+        """Unregister every listener and disable the instrumentation."""
+        with cls._lock:
+            cls._listeners = ()
+            cls.enabled = False
+
+    @classmethod
+    def _after_fork_in_child(cls):
+        # the lock may have been held by another thread of the parent at fork time
+        cls._lock = threading.Lock()
+
+    @classmethod
+    def current(cls) -> Optional[OperationRecord]:
+        """Return the record of the operation running on this thread, if any."""
+        return getattr(cls._active, 'record', None)
+
+    @classmethod
+    def call(cls, operation: str, function: Callable, *args, **kwargs):
+        """Run `function`, an operation returning ``(op_id, result, ...)``, and record it.
+
+        Args:
+            operation: Operation name reported in the record
+            function: Callable running the operation on this thread
+            *args: Positional arguments of `function`
+            **kwargs: Keyword arguments of `function`
+
+        Returns:
+            The return value of `function`
+        """
+        record = OperationRecord(operation)
+        cls._active.record = record
+        try:
+            returned = function(*args, **kwargs)
+        except BaseException as e:
+            record.error = type(e).__name__
+            raise
+        else:
+            record.op_id = returned[0]
+            call_status = getattr(returned[1], 'call_status', None)
+            if call_status is not None:
+                record.return_status = call_status.return_status
+                record.operation_type_id = call_status.operation_type_id
+            return returned
+        finally:
+            cls._active.record = None
+            record._finish()
+            cls._emit(record)
+
+    @classmethod
+    def _emit(cls, record: OperationRecord):
+        for listener in cls._listeners:
+            try:
+                listener(record)
+            except Exception as e:
+                warnings.warn(f"Instrumentation listener {listener!r} failed: {e!r}", RuntimeWarning)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=Instrumentation._after_fork_in_child)
+
+
+def instrumented(method: Callable) -> Callable:
+    """Decorate a `Session` operation so that it is recorded when the instrumentation is enabled."""
+    operation = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if not Instrumentation.enabled:
+            return method(*args, **kwargs)
+        return Instrumentation.call(operation, method, *args, **kwargs)
+
+    return wrapper
+
+
+class _Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class MetricsRegistry:
+    """Listener aggregating the records into latency histograms and counters.
+
+    Histograms are kept per operation and phase, call counters per operation and returned status,
+    and byte counters per operation and direction. Register it with `Instrumentation.add_listener`.
+
+    Example:
+        >>> registry = MetricsRegistry()
+        >>> Instrumentation.add_listener(registry)
+        >>> ...
+        >>> body = registry.prometheus_text()  # serve on /metrics
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, namespace: str = 'cryptonets'):
+        """Create an empty registry.
+
+        Args:
+            buckets: Upper bounds of the latency histogram buckets in seconds (+Inf is implicit)
+            namespace: Prefix of the Prometheus metric names
+
+        Raises:
+            ValueError: If the buckets are not sorted in increasing order
+        """
+        buckets = tuple(float(bucket) for bucket in buckets)
+        if not buckets or any(a >= b for a, b in zip(buckets, buckets[1:])):
+            raise ValueError("buckets must be a non-empty increasing sequence")
+        self.buckets = buckets
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, List[_Histogram]] = {}
+        self._calls: Dict[Tuple[str, str], int] = {}
+        self._bytes: Dict[Tuple[str, str], int] = {}
+
+    def __call__(self, record: OperationRecord):
+        """Add a record to the metrics."""
+        status = record.status_label
+        buckets = self.buckets
+        values = (record.encode, record.native, record.copy, record.decode, record.total)
+        with self._lock:
+            histograms = self._histograms.get(record.operation)
+            if histograms is None:
+                # one histogram per phase, in PHASES order, with one more bucket for +Inf
+                histograms = self._histograms[record.operation] = [_Histogram(len(buckets) + 1) for _ in PHASES]
+            for histogram, value in zip(histograms, values):
+                histogram.counts[bisect_left(buckets, value)] += 1
+                histogram.sum += value
+                histogram.count += 1
+            key = (record.operation, status)
+            self._calls[key] = self._calls.get(key, 0) + 1
+            for direction, value in (('in', record.bytes_in), ('out', record.bytes_out)):
+                key = (record.operation, direction)
+                self._bytes[key] = self._bytes.get(key, 0) + value
+
+    def reset(self):
+        """Drop all the collected metrics."""
+        with self._lock:
+            self._histograms.clear()
+            self._calls.clear()
+            self._bytes.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of the metrics as plain dicts.
+
+        Returns:
+            dict with ``durations`` ({operation: {phase: {"buckets", "sum", "count"}}}, bucket counts are
+            not cumulative and the last one counts the values above the last bound), ``calls``
+            ({operation: {status: count}}) and ``bytes`` ({operation: {"in", "out"}})
+        """
+        with self._lock:
+            durations: Dict[str, Dict[str, Any]] = {}
+            for operation, histograms in self._histograms.items():
+                durations[operation] = {
+                    phase: {'buckets': list(histogram.counts), 'sum': histogram.sum, 'count': histogram.count}
+                    for phase, histogram in zip(PHASES, histograms)}
+            calls: Dict[str, Dict[str, int]] = {}
+            for (operation, status), count in self._calls.items():
+                calls.setdefault(operation, {})[status] = count
+            sizes: Dict[str, Dict[str, int]] = {}
+            for (operation, direction), count in self._bytes.items():
+                sizes.setdefault(operation, {})[direction] = count
+        return {'durations': durations, 'calls': calls, 'bytes': sizes}
+
+    def prometheus_text(self) -> str:
+        """Render the metrics in the Prometheus text exposition format (version 0.0.4)."""
+        snapshot = self.snapshot()
+        name = f"{self.namespace}_operation_duration_seconds"
+        lines = [f"# HELP {name} Duration of the phases of the SDK operations.",
+                 f"# TYPE {name} histogram"]
+        for operation, phases in sorted(snapshot['durations'].items()):
+            for phase in PHASES:
+                histogram = phases.get(phase)
+                if histogram is None:
+                    continue
+                labels = f'operation="{operation}",phase="{phase}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), histogram['buckets']):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram['sum']!r}")
+                lines.append(f"{name}_count{{{labels}}} {histogram['count']}")
+
+        name = f"{self.namespace}_operations_total"
+        lines += [f"# HELP {name} Number of SDK operations by returned status.",
+                  f"# TYPE {name} counter"]
+        for operation, statuses in sorted(snapshot['calls'].items()):
+            for status, count in sorted(statuses.items()):
+                lines.append(f'{name}{{operation="{operation}",status="{status}"}} {count}')
+
+        name = f"{self.namespace}_operation_bytes_total"
+        lines += [f"# HELP {name} Bytes passed to (in) and returned by (out) the native library.",
+                  f"# TYPE {name} counter"]
+        for operation, directions in sorted(snapshot['bytes'].items()):
+            for direction, count in sorted(directions.items()):
+                lines.append(f'{name}{{operation="{operation}",direction="{direction}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetryExporter:
+    """Listener recording the operations with OpenTelemetry metric instruments.
+
+    Creates a ``<namespace>.operation.duration`` histogram (seconds, attributes ``operation`` and
+    ``phase``), a ``<namespace>.operations`` counter (attributes ``operation`` and ``status``) and a
+    ``<namespace>.operation.io`` counter (bytes, attributes ``operation`` and ``direction``).
+    Requires the ``opentelemetry-api`` package (``opentelemetry`` extra) unless a meter is given.
+
+    Example:
+        >>> Instrumentation.add_listener(OpenTelemetryExporter())
+    """
+
+    def __init__(self, meter=None, namespace: str = 'cryptonets'):
+        """Create the instruments.
+
+        Args:
+            meter: OpenTelemetry `Meter`, defaults to the meter of this package from the global provider
+            namespace: Prefix of the instrument names
+
+        Raises:
+            ImportError: If no meter is given and opentelemetry-api is not installed
+        """
+        if meter is None:
+            try:
+                from opentelemetry import metrics
+            except ImportError as e:
+                raise ImportError("OpenTelemetryExporter requires opentelemetry-api, install the "
+                                  "'opentelemetry' extra: pip install cryptonets_python_sdk[opentelemetry]") from e
+            meter = metrics.get_meter('cryptonets_python_sdk')
+        self._duration = meter.create_histogram(f"{namespace}.operation.duration", unit='s',
+                                                description="Duration of the phases of the SDK operations")
+        self._operations = meter.create_counter(f"{namespace}.operations", unit='1',
+                                                description="Number of SDK operations by returned status")
+        self._io = meter.create_counter(f"{namespace}.operation.io", unit='By',
+                                        description="Bytes passed to (in) and returned by (out) the native library")
+
+    def __call__(self, record: OperationRecord):
+        """Record an operation."""
+        operation = record.operation
+        for phase in PHASES:
+            self._duration.record(getattr(record, phase), {'operation': operation, 'phase': phase})
+        self._operations.add(1, {'operation': operation, 'status': record.status_label})
+        self._io.add(record.bytes_in, {'operation': operation, 'direction': 'in'})
+        self._io.add(record.bytes_out, {'operation': operation, 'direction': 'out'})
@@ -1,8 +1,12 @@
+import os
 import threading
-from ctypes import *
-from typing import Optional
+import time
+from typing import Optional, Tuple, TYPE_CHECKING
 from cryptonets_python_sdk.library_loader import LibraryLoadStrategy, DefaultLibraryLoadStrategy, LibraryLoadError,SystemInfoUtility
 
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
 class PrivIDError(Exception):
     """Base exception for PrivID errors"""
     pass
@@ -16,44 +20,160 @@ class PrivIDFaceLib:
     _initialized = False
     _lock = threading.RLock()  # Use a reentrant lock for thread safety
     _native_sdk_version = None
+    _init_future = None  # Future of the initialization in progress
+    _fork_generation = 0  # incremented in every child process forked from this process
+
+    # default time given to the native library to report it is initialized, in seconds
+    INIT_TIMEOUT = 10.0
+    # first and longest delays between two privid_is_library_initialized() polls, in seconds
+    INIT_POLL_INITIAL_DELAY = 0.001
+    INIT_POLL_MAX_DELAY = 0.05
 
     @classmethod
-    def initialize(cls, load_strategy: Optional[LibraryLoadStrategy] = None, log_level: int = 0):
+    def initialize(cls, load_strategy: Optional[LibraryLoadStrategy] = None, log_level: int = 0,
+                   timeout: float = INIT_TIMEOUT):
         """Initialize the PrivID Face library.
 
+        Blocks until the library is loaded and the native library reports it is initialized. If an
+        initialization started by `initialize_async` is in progress, waits for it instead.
+
         Args:
             load_strategy: Optional custom library loading strategy
             log_level: Logging level (0=error, 1=warn, 2=info, 3=debug)
+            timeout: Time given to the native library to report it is initialized, in seconds
 
         Raises:
             LibraryLoadError: If library loading or initialization fails
         """
+        future, start = cls._start_initialization()
+        if start:
+            cls._run_initialization(future, load_strategy, log_level, timeout)
+        future.result()
+
+    @classmethod
+    def initialize_async(cls, load_strategy: Optional[LibraryLoadStrategy] = None, log_level: int = 0,
+                         timeout: float = INIT_TIMEOUT) -> 'Future':
+        """Initialize the PrivID Face library in a background thread.
+
+        The library is loaded and its initialization polled with exponential backoff in a daemon thread,
+        so the application can start its other components meanwhile. The class lock is only held to
+        publish the result: `is_initialized()` can be called while the initialization is in progress.
+
+        Concurrent calls share the same initialization; once initialized an already completed future is
+        returned.
+
+        Example:
+            >>> future = PrivIDFaceLib.initialize_async()
+            >>> ...  # start the other components
+            >>> future.result()  # raises LibraryLoadError if the initialization failed
+            >>> await asyncio.wrap_future(PrivIDFaceLib.initialize_async())  # from a coroutine
+
+        Args:
+            load_strategy: Optional custom library loading strategy
+            log_level: Logging level (0=error, 1=warn, 2=info, 3=debug)
+            timeout: Time given to the native library to report it is initialized, in seconds
+
+        Returns:
+            concurrent.futures.Future: Future completed with None once initialized, or with a
+            `LibraryLoadError` if library loading or initialization fails
+        """
+        future, start = cls._start_initialization()
+        if start:
+            threading.Thread(target=cls._run_initialization, args=(future, load_strategy, log_level, timeout),
+                             name='cryptonets-init', daemon=True).start()
+        return future
+
+    @classmethod
+    def _start_initialization(cls) -> Tuple['Future', bool]:
+        """Return the future of the initialization and whether the caller must run it."""
+        from concurrent.futures import Future
         with cls._lock:
             if cls._initialized:
-                return
-            if load_strategy is None:
-                load_strategy = DefaultLibraryLoadStrategy()
+                future = Future()
+                future.set_result(None)
+                return future, False
+            if cls._init_future is not None:
+                return cls._init_future, False
+            future = cls._init_future = Future()
+            future.set_running_or_notify_cancel()
+            return future, True
+
+    @classmethod
+    def _run_initialization(cls, future: 'Future', load_strategy: Optional[LibraryLoadStrategy], log_level: int,
+                            timeout: float):
+        """Load and initialize the library without holding the lock, then publish the result.
+
+        The future is always completed and `_init_future` always cleared, even when the initialization is
+        interrupted by a BaseException (KeyboardInterrupt, SystemExit), which is re-raised.
+        """
+        lib = None
+        native_started = False
+        try:
             try:
-                cls._lib, cls._ffibuilder = load_strategy.load_library()
-                cls._models_cache_directory = SystemInfoUtility.get_models_cache_directory(LibraryLoadStrategy.PACKAGE_NAME)
-                dir_bytes = cls._models_cache_directory.encode('utf-8')
-                cls._lib.privid_initialize_lib(dir_bytes, len(dir_bytes), log_level)
-                # spin till initialized
-                import time
-                for _ in range(100):
-                    if cls._lib.privid_is_library_initialized():
-                        break
-                    time.sleep(0.1)
-                version_ptr = cls._lib.privid_get_version()
-                cls._native_sdk_version = cls._ffibuilder.string(version_ptr).decode('utf-8')
-                if not cls._lib.privid_is_library_initialized():
-                    cls._initialized = False    
+                if load_strategy is None:
+                    load_strategy = DefaultLibraryLoadStrategy()
+                lib, ffibuilder = load_strategy.load_library()
+                models_cache_directory = SystemInfoUtility.get_models_cache_directory(
+                    LibraryLoadStrategy.PACKAGE_NAME)
+                dir_bytes = models_cache_directory.encode('utf-8')
+                native_started = True
+                lib.privid_initialize_lib(dir_bytes, len(dir_bytes), log_level)
+                cls._wait_initialized(lib, timeout)
+                native_sdk_version = ffibuilder.string(lib.privid_get_version()).decode('utf-8')
+            except BaseException as e:
+                if native_started:
+                    # do not leave a half-initialized native library behind, e.g. after the timeout
+                    cls._shutdown_native(lib)
+                if isinstance(e, LibraryLoadError):
+                    error = e
+                else:
+                    error = LibraryLoadError(f"Failed to load library: {str(e) or type(e).__name__}")
+                cls._fail_initialization(future, error)
+                if not isinstance(e, Exception):
+                    raise
+                return
+            with cls._lock:
+                cls._lib, cls._ffibuilder = lib, ffibuilder
+                cls._models_cache_directory = models_cache_directory
+                cls._native_sdk_version = native_sdk_version
                 cls._initialized = True
-            except Exception as e:
-                cls._lib = None
-                cls._ffibuilder = None
-                cls._initialized = False
-                raise LibraryLoadError(f"Failed to load library: {str(e)}")
+                cls._init_future = None
+            future.set_result(None)
+        finally:
+            if not future.done():
+                cls._fail_initialization(future, LibraryLoadError("Library initialization interrupted"))
+
+    @classmethod
+    def _fail_initialization(cls, future: 'Future', error: LibraryLoadError):
+        """Clear the initialization in progress, so that a later call can retry, then complete its future."""
+        with cls._lock:
+            if cls._init_future is future:
+                cls._init_future = None
+        future.set_exception(error)
+
+    @staticmethod
+    def _shutdown_native(lib):
+        """Shut down a native library whose initialization failed, keeping the initialization error."""
+        try:
+            lib.privid_shutdown_lib()
+        except Exception:
+            pass
+
+    @classmethod
+    def _wait_initialized(cls, lib, timeout: float):
+        """Poll privid_is_library_initialized() with exponential backoff until `timeout`.
+
+        Raises:
+            LibraryLoadError: If the native library is not initialized before the deadline
+        """
+        deadline = time.monotonic() + timeout
+        delay = cls.INIT_POLL_INITIAL_DELAY
+        while not lib.privid_is_library_initialized():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LibraryLoadError(f"Native library not initialized after {timeout} s")
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, cls.INIT_POLL_MAX_DELAY)
 
     @classmethod
     def shutdown(cls):
@@ -61,7 +181,13 @@ class PrivIDFaceLib:
 
         This should be called when you're completely done with the library.
         After calling this, you must call initialize() again before using the library.
+        An initialization in progress is waited for first.
         """
+        with cls._lock:
+            pending = cls._init_future
+        if pending is not None:
+            # wait for the initialization in progress, successful or not, before shutting down
+            pending.exception()
         with cls._lock:
             if cls._initialized and cls._lib:
                 cls._lib.privid_shutdown_lib()
@@ -162,6 +288,19 @@ class PrivIDFaceLib:
         with cls._lock:
             return cls._initialized
 
+    @classmethod
+    def _after_fork_in_child(cls):
+        """Reset the process-local state in a forked child process.
+
+        The loaded library and its models are inherited, copy-on-write. Native sessions created before the
+        fork are not: `SessionNative` compares its generation with `_fork_generation` before every call.
+        """
+        # a lock held by another thread of the parent at fork time would never be released in the child
+        cls._lock = threading.RLock()
+        # the initialization thread of the parent does not exist in the child
+        cls._init_future = None
+        cls._fork_generation += 1
+
     @classmethod
     def _throw_if_not_initialized(cls):
         with cls._lock:
@@ -184,3 +323,7 @@ class PrivIDFaceLib:
             cls._lib.privid_free_char_buffer(dir_ptr[0])
             return result
         return ""
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=PrivIDFaceLib._after_fork_in_child)
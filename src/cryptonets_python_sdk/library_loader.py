@@ -2,21 +2,99 @@ import os
 import platform
 import sys
 import re
-import subprocess
-import boto3
-import botocore
-import importlib
-import importlib.metadata
-import tempfile
+import functools
+import json
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Tuple, List
+from typing import Dict, Any, Optional, Tuple, List
 from cffi import FFI
-import yaml
+
+# Modules only needed when the native files are resolved, downloaded or verified (importlib.metadata,
+# subprocess, hashlib, tempfile, concurrent.futures, boto3, yaml) are imported where they are used,
+# so that importing the SDK, and warm starts, stay fast.
 
 class LibraryLoadError(Exception):
     """Exception for library loading errors"""
     pass
 
+class FileLock:
+    """Exclusive lock on a file, shared between processes (flock on POSIX, msvcrt.locking on Windows).
+
+    Used so that several processes starting together on one host download the native files once.
+
+    Example:
+        >>> with FileLock(os.path.join(cache_dir, '.download.lock'), timeout=600):
+        ...     download_missing_files()
+    """
+
+    def __init__(self, path: str, timeout: Optional[float] = None, poll_interval: float = 0.1):
+        """
+        Args:
+            path: Lock file path, created if needed
+            timeout: Maximum time to wait for the lock in seconds, None waits forever
+            poll_interval: Delay between two attempts to take the lock in seconds
+        """
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+
+    def acquire(self):
+        """Take the lock.
+
+        Raises:
+            LibraryLoadError: If the lock could not be taken before the timeout
+        """
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        end_time = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            try:
+                self._try_lock(fd)
+                self._fd = fd
+                return
+            except OSError:
+                if end_time is not None and time.monotonic() >= end_time:
+                    os.close(fd)
+                    raise LibraryLoadError(f"Timed out after {self.timeout}s waiting for lock {self.path}")
+                time.sleep(self.poll_interval)
+
+    def release(self):
+        """Release the lock."""
+        if self._fd is None:
+            return
+        try:
+            self._unlock(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    @staticmethod
+    def _try_lock(fd: int):
+        if os.name == 'nt':
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    @staticmethod
+    def _unlock(fd: int):
+        if os.name == 'nt':
+            import msvcrt
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
 class SystemInfoUtility:
     """Utility class for system information retrieval"""
 
@@ -67,6 +145,7 @@ class SystemInfoUtility:
         # Optionally, try lsb_release if /etc/os-release is missing
         if not distro_info['id']:
             try:
+                import subprocess
                 result = subprocess.run(['lsb_release', '-a'], capture_output=True, text=True)
                 output = result.stdout
                 distro_match = re.search(r'Distributor ID:\s*(.+)', output)
@@ -134,9 +213,18 @@ class SystemInfoUtility:
     @staticmethod
     def get_system_info() -> Dict[str, Any]:
         """Get comprehensive system information.
+
+        The system is probed once per process, later calls return a copy of the first result.
+
         Returns:
             Dict[str, Any]: A dictionary containing system information for the current OS.
         """
+        system_info = SystemInfoUtility._probe_system_info()
+        return {key: dict(value) if isinstance(value, dict) else value for key, value in system_info.items()}
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _probe_system_info() -> Dict[str, Any]:
         system_info = {
             'os': SystemInfoUtility.get_os_info(),
             'architecture': SystemInfoUtility.get_architecture(),
@@ -238,9 +326,12 @@ class SystemInfoUtility:
         raise LibraryLoadError(f'Unsupported operating system: {os_name}')
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_package_version(package_name: str) -> str:
         """Get the version of a package installed in the current environment.
 
+        The version is looked up once per process and package.
+
         Args:
             package_name: Name of the package
 
@@ -251,6 +342,7 @@ class SystemInfoUtility:
             raise ValueError("Package name cannot be empty")
             
         # Try importlib.metadata (Python 3.8+)
+        import importlib.metadata
         try:
             return importlib.metadata.version(package_name)
         except (importlib.metadata.PackageNotFoundError, AttributeError):
@@ -292,6 +384,7 @@ class LibraryLoadStrategy(ABC):
         Raises:
             LibraryLoadError: If removing quarantine attributes fails
         """
+        import subprocess
         print("Removing quarantine attributes from downloaded files on macOS")
         for root, _, files in os.walk(directory):
             for file in files:
@@ -305,11 +398,81 @@ class LibraryLoadStrategy(ABC):
                         print(f"Warning: Failed to remove quarantine attribute from {file_path}: {str(e)}")
 
 class DefaultLibraryLoadStrategy(LibraryLoadStrategy):
-    """Strategy that loads libraries based on manifest files from S3"""
-    
+    """Strategy that loads libraries based on manifest files from S3
+
+    Missing files are downloaded concurrently, each to a ``.part`` file renamed into place once complete
+    and verified, so an interrupted download never leaves a truncated file in the cache. Interrupted
+    downloads are resumed with ranged GETs, by the same process (retries) or by the next one. Downloads
+    are serialized between processes with a lock file in the cache directory, so workers starting
+    together on one host fetch every file once.
+    """
+
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+    HASH_CHUNK_SIZE = 1024 * 1024
+    LOCK_FILE_NAME = '.download.lock'
+    VERIFIED_FILE_NAME = '.verified.json'
+    RESOLVED_INDEX_FILE_NAME = 'resolved.json'
+    VERIFY_MODES = ('auto', 'full')
+
+    def __init__(self, s3_client=None, max_workers: int = 4, retries: int = 3, retry_delay: float = 0.5,
+                 lock_timeout: Optional[float] = 600.0, verify: str = 'auto'):
+        """
+        Args:
+            s3_client: S3 client used for the downloads (e.g. pointed at a local S3 stand-in), defaults to an
+                unsigned boto3 client created on first download
+            max_workers: Maximum number of files downloaded concurrently
+            retries: Number of times an interrupted download is resumed before giving up
+            retry_delay: Delay before the first retry in seconds, doubled at every retry
+            lock_timeout: Maximum time to wait for the downloads of another process in seconds,
+                None waits forever
+            verify: 'auto' hashes only the files changed since they were last verified,
+                'full' hashes every file at every load
+
+        Raises:
+            ValueError: If an argument is invalid
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if verify not in self.VERIFY_MODES:
+            raise ValueError(f"verify must be one of {self.VERIFY_MODES}, got {verify!r}")
+        self.verify = verify
+        self._verified: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._verified_lock = threading.Lock()
+        self._s3_client = s3_client
+        self.max_workers = max_workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.lock_timeout = lock_timeout
+
+    def __getstate__(self) -> dict:
+        # pickled to start the worker processes of ProcessPoolSession, the lock is per process
+        state = self.__dict__.copy()
+        del state['_verified_lock']
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._verified_lock = threading.Lock()
+
+    def _get_s3_client(self):
+        """Return the S3 client, creating an unsigned boto3 client on first use."""
+        if self._s3_client is None:
+            # imported on a cache miss only, importing boto3 takes longer than a warm load
+            import boto3
+            import botocore
+            import botocore.config
+            session = boto3.Session()
+            self._s3_client = session.client('s3', config=botocore.config.Config(signature_version=botocore.UNSIGNED))
+        return self._s3_client
+
     def load_library(self) -> Tuple[Any, FFI]:
         """Load the library based on manifest file from S3.
-        
+
+        After a successful load, the resolved library paths are recorded in a resolved-load index of the
+        cache directory. The next loads on the same host (warm starts) open them directly, without reading
+        the manifest, importing boto3 or listing the cache, as long as the files did not change.
+        With ``verify='full'`` the index is not used.
+
         Returns:
             Tuple[Any, FFI]: A tuple containing the loaded library object and FFI instance
             
@@ -317,14 +480,17 @@ class DefaultLibraryLoadStrategy(LibraryLoadStrategy):
             LibraryLoadError: If library cannot be found or loaded
         """
         try:
-            ffibuilder = FFI()
             header_path = os.path.join(os.path.dirname(__file__), 'api_h.h')
-            package_version = importlib.metadata.version(self.PACKAGE_NAME)
+            package_version = SystemInfoUtility.get_package_version(self.PACKAGE_NAME)
             cache_dir = SystemInfoUtility.get_package_cache_directory(self.PACKAGE_NAME)
-            
-            # ensure cache directory exists
-            os.makedirs(cache_dir, exist_ok=True)
-            
+
+            resolved = self._read_resolved_index(cache_dir) if self.verify == 'auto' else None
+            if resolved is not None:
+                try:
+                    return self._open_library(header_path, resolved['library'], resolved['dependencies'])
+                except Exception as e:
+                    print(f"Warning: failed to load the resolved library, resolving it again: {e}")
+
             # Read the manifest file
             manifest_data = self._read_manifest(package_version)
             
@@ -334,10 +500,6 @@ class DefaultLibraryLoadStrategy(LibraryLoadStrategy):
             # Get the main library path
             main_library_path = self._get_main_library_path(cache_dir)
             
-            # Process CFFI header
-            with open(header_path) as f:
-                ffibuilder.cdef(f.read())
-            
             # For dependency libraries in cache_dir, load them
             deps = []
             for filename in os.listdir(cache_dir):
@@ -355,19 +517,80 @@ class DefaultLibraryLoadStrategy(LibraryLoadStrategy):
             # Handle dependencies (this works when we have 1 dependency library)
             if len(deps) > 1:
                 raise LibraryLoadError("Multiple dependency libraries found")
-            
-            # Load dependency library
-            if deps:
-                ffibuilder.dlopen(deps[0])
-            
-            # Load main library
-            lib = ffibuilder.dlopen(main_library_path)
+
+            lib, ffibuilder = self._open_library(header_path, main_library_path, deps)
+            self._write_resolved_index(cache_dir, main_library_path, deps)
             return lib, ffibuilder
         except LibraryLoadError:
             raise
         except Exception as e:
             raise LibraryLoadError(f"Failed to load library: {str(e)}")
-    
+
+    @staticmethod
+    def _open_library(header_path: str, main_library_path: str, deps: List[str]) -> Tuple[Any, FFI]:
+        """Declare the API header and open the dependency libraries, then the main library."""
+        ffibuilder = FFI()
+
+        # Process CFFI header
+        with open(header_path) as f:
+            ffibuilder.cdef(f.read())
+
+        # Load dependency libraries
+        for dep in deps:
+            ffibuilder.dlopen(dep)
+
+        # Load main library
+        lib = ffibuilder.dlopen(main_library_path)
+        return lib, ffibuilder
+
+    def _read_resolved_index(self, cache_dir: str) -> Optional[Dict[str, Any]]:
+        """Return the resolved load of this host if its files did not change since it was recorded.
+
+        Returns:
+            dict with the ``library`` path and the ``dependencies`` paths, or None when there is no
+            usable entry for this host
+        """
+        try:
+            with open(os.path.join(cache_dir, self.RESOLVED_INDEX_FILE_NAME), 'r') as f:
+                index = json.load(f)
+            resolved = index[SystemInfoUtility.get_os_version_tag()]
+            for file_path, entry in resolved['files'].items():
+                if {key: entry.get(key) for key in ('size', 'mtime_ns', 'inode')} != self._stat_key(file_path):
+                    return None
+            return resolved
+        except (OSError, ValueError, KeyError, TypeError, AttributeError, LibraryLoadError):
+            return None
+
+    def _write_resolved_index(self, cache_dir: str, main_library_path: str, deps: List[str]) -> None:
+        """Record the libraries loaded on this host, with their stat and checksum, in the resolved-load index.
+
+        Failing to write the index only costs a full resolution at the next start.
+        """
+        try:
+            verified = self._read_verified(cache_dir)
+            files = {}
+            for file_path in deps + [main_library_path]:
+                sha256 = verified.get(os.path.basename(file_path), {}).get('sha256')
+                files[file_path] = dict(self._stat_key(file_path), sha256=sha256)
+            index_path = os.path.join(cache_dir, self.RESOLVED_INDEX_FILE_NAME)
+            with FileLock(os.path.join(cache_dir, self.LOCK_FILE_NAME), self.lock_timeout):
+                try:
+                    with open(index_path, 'r') as f:
+                        index = json.load(f)
+                    if not isinstance(index, dict):
+                        index = {}
+                except (OSError, ValueError):
+                    index = {}
+                index[SystemInfoUtility.get_os_version_tag()] = {
+                    'library': main_library_path, 'dependencies': deps, 'files': files}
+                import tempfile
+                fd, temp_path = tempfile.mkstemp(dir=cache_dir, prefix=self.RESOLVED_INDEX_FILE_NAME, suffix='.tmp')
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(index, f, indent=2)
+                os.replace(temp_path, index_path)
+        except Exception as e:
+            print(f"Warning: failed to write the resolved-load index in {cache_dir}: {e}")
+
     def _ensure_files_from_manifest (self, manifest_data: Dict[str, Any], cache_dir: str) -> None:
         """Ensure library files for every file listed in the manifest for the current OS and architecture
         are available in the cache directory. 
@@ -422,35 +645,27 @@ class DefaultLibraryLoadStrategy(LibraryLoadStrategy):
             if not files_info:
                 raise LibraryLoadError(f"No files found for your system in the manifest")
             
-            # Download each file
-            session = boto3.Session()
-            s3_client = session.client('s3', config=botocore.config.Config(signature_version=botocore.UNSIGNED))
             s3_bucket = manifest_data.get('metadata', {}).get('s3_python_sdk_bucket', self.S3_BUCKET_NAME)
             base_path = manifest_data.get('metadata', {}).get('base_path', '')
-            
+
+            # (s3 key, destination path, expected sha256) of the files missing or corrupted in the cache
+            pending = []
             for file_info in files_info:
                 filename = file_info.get('filename')
                 if not filename:
                     continue
-                
-                # Construct S3 key
-                s3_key = self._construct_s3_key_for_file(base_path, latest_version, system_info, filename)
-                
                 dest_file_path = os.path.join(cache_dir, filename)
-                
-                # Download file if it doesn't exist or checksum verification is requested
-                if not os.path.exists(dest_file_path):
-                    print(f"Downloading {filename} from s3://{s3_bucket}/{s3_key}")
-                    try:
-                        s3_client.download_file(s3_bucket, s3_key, dest_file_path)
-                    except Exception as e:
-                        raise LibraryLoadError(f"Failed to download {filename}: {str(e)}")
-                
-                # Verify SHA256 checksum if provided
                 expected_sha256 = file_info.get('sha256')
-                if expected_sha256:
-                    self._verify_file_checksum(dest_file_path, expected_sha256)
-            
+                if not self._is_cached(dest_file_path, expected_sha256):
+                    s3_key = self._construct_s3_key_for_file(base_path, latest_version, system_info, filename)
+                    pending.append((s3_key, dest_file_path, expected_sha256))
+
+            if pending:
+                with FileLock(os.path.join(cache_dir, self.LOCK_FILE_NAME), self.lock_timeout):
+                    # another process may have downloaded them while we were waiting for the lock
+                    pending = [file for file in pending if not self._is_cached(file[1], file[2])]
+                    self._download_files(s3_bucket, pending)
+
             # Handle macOS quarantine attributes
             if os_name == 'Darwin':
                 LibraryLoadStrategy.remove_quarantine_attributes(cache_dir)
@@ -525,30 +740,190 @@ class DefaultLibraryLoadStrategy(LibraryLoadStrategy):
 
         return '/'.join(s3_key_parts)
 
+    def _is_cached(self, file_path: str, expected_sha256: Optional[str]) -> bool:
+        """Check whether a file is in the cache and matches its expected checksum, if any."""
+        if not os.path.exists(file_path):
+            return False
+        if not expected_sha256:
+            return True
+        try:
+            self._verify_file_checksum(file_path, expected_sha256)
+            return True
+        except LibraryLoadError as e:
+            print(f"Warning: {e}, downloading it again")
+            return False
+
+    def _download_files(self, s3_bucket: str, files: List[Tuple[str, str, Optional[str]]]) -> None:
+        """Download files concurrently.
+
+        Args:
+            s3_bucket: S3 bucket name
+            files: (s3 key, destination path, expected sha256 or None) of every file
+
+        Raises:
+            LibraryLoadError: If a download fails
+        """
+        if not files:
+            return
+        from concurrent.futures import ThreadPoolExecutor
+        s3_client = self._get_s3_client()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(files)),
+                                thread_name_prefix='cryptonets-download') as executor:
+            futures = [executor.submit(self._download_object, s3_client, s3_bucket, s3_key, dest_file_path,
+                                       expected_sha256)
+                       for s3_key, dest_file_path, expected_sha256 in files]
+            errors = [future.exception() for future in futures]
+        errors = [error for error in errors if error is not None]
+        if errors:
+            raise LibraryLoadError("; ".join(str(error) for error in errors))
+
+    def _download_object(self, s3_client, s3_bucket: str, s3_key: str, dest_file_path: str,
+                         expected_sha256: Optional[str] = None) -> None:
+        """Download an S3 object to a file, atomically.
+
+        The object is written to ``<dest_file_path>.part``, which is renamed to `dest_file_path` once it is
+        complete and its checksum verified. The download resumes from the size of an existing part file,
+        left by a previous attempt or process, with a ranged GET.
+
+        Args:
+            s3_client: S3 client
+            s3_bucket: S3 bucket name
+            s3_key: S3 key of the object
+            dest_file_path: Destination file path
+            expected_sha256: Expected SHA256 checksum, not verified when None
+
+        Raises:
+            LibraryLoadError: If the download still fails after all the retries
+        """
+        part_path = dest_file_path + '.part'
+        filename = os.path.basename(dest_file_path)
+        for attempt in range(self.retries + 1):
+            try:
+                size = s3_client.head_object(Bucket=s3_bucket, Key=s3_key)['ContentLength']
+                offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                if offset > size:
+                    offset = 0
+                if offset < size or not os.path.exists(part_path):
+                    if offset:
+                        print(f"Resuming download of {filename} from s3://{s3_bucket}/{s3_key} at byte {offset}")
+                        response = s3_client.get_object(Bucket=s3_bucket, Key=s3_key, Range=f'bytes={offset}-')
+                    else:
+                        print(f"Downloading {filename} from s3://{s3_bucket}/{s3_key}")
+                        response = s3_client.get_object(Bucket=s3_bucket, Key=s3_key)
+                    body = response['Body']
+                    with open(part_path, 'ab' if offset else 'wb') as f:
+                        for chunk in iter(lambda: body.read(self.DOWNLOAD_CHUNK_SIZE), b''):
+                            f.write(chunk)
+                if os.path.getsize(part_path) != size:
+                    raise LibraryLoadError(f"Incomplete download of {filename}: "
+                                           f"{os.path.getsize(part_path)} of {size} bytes")
+                sha256 = None
+                if expected_sha256:
+                    sha256 = self._file_sha256(part_path)
+                    if sha256.lower() != expected_sha256.lower():
+                        # restart from scratch, e.g. if the object changed between two attempts
+                        os.remove(part_path)
+                        raise LibraryLoadError(f"Checksum verification failed for {filename}. "
+                                               f"Expected: {expected_sha256}, Got: {sha256}")
+                os.replace(part_path, dest_file_path)
+                if sha256:
+                    # the rename keeps the inode and mtime of the verified part file
+                    self._record_verified(dest_file_path, sha256)
+                return
+            except Exception as e:
+                last_error = e
+                if attempt < self.retries:
+                    time.sleep(self.retry_delay * 2 ** attempt)
+        raise LibraryLoadError(f"Failed to download {filename}: {str(last_error)}")
+
     def _verify_file_checksum(self, file_path: str, expected_sha256: str) -> None:
         """Verify SHA256 checksum of a downloaded file.
-        
+
+        The file is hashed in chunks. Verified files are recorded in a sidecar file of their directory
+        with their size, mtime and inode: in ``verify='auto'`` mode a file whose recorded checksum matches
+        and whose stat did not change is not hashed again. ``verify='full'`` always hashes.
+
         Args:
             file_path: Path to the file to verify
             expected_sha256: Expected SHA256 checksum
-            
+
         Raises:
             LibraryLoadError: If checksum verification fails
         """
-        import hashlib
-        
         try:
-            with open(file_path, 'rb') as f:
-                calculated_hash = hashlib.sha256(f.read()).hexdigest()
-                
+            if self.verify == 'auto' and self._is_verified(file_path, expected_sha256):
+                return
+
+            calculated_hash = self._file_sha256(file_path)
+
             if calculated_hash.lower() != expected_sha256.lower():
                 raise LibraryLoadError(f"Checksum verification failed for {file_path}. "
                                       f"Expected: {expected_sha256}, Got: {calculated_hash}")
+            self._record_verified(file_path, calculated_hash)
         except Exception as e:
             if not isinstance(e, LibraryLoadError):
                 raise LibraryLoadError(f"Failed to verify checksum: {str(e)}")
             raise
-    
+
+    @staticmethod
+    def _file_sha256(file_path: str) -> str:
+        """Return the SHA256 checksum of a file, read in chunks."""
+        import hashlib
+        with open(file_path, 'rb') as f:
+            if hasattr(hashlib, 'file_digest'):
+                return hashlib.file_digest(f, 'sha256').hexdigest()
+            digest = hashlib.sha256()
+            for chunk in iter(lambda: f.read(DefaultLibraryLoadStrategy.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+            return digest.hexdigest()
+
+    @staticmethod
+    def _stat_key(file_path: str) -> Dict[str, int]:
+        """Return the stat fields identifying an unchanged file."""
+        stat = os.stat(file_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'inode': stat.st_ino}
+
+    def _read_verified(self, directory: str) -> Dict[str, Dict[str, Any]]:
+        """Read the verification sidecar of a directory, empty if missing or unreadable."""
+        try:
+            with open(os.path.join(directory, self.VERIFIED_FILE_NAME), 'r') as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _is_verified(self, file_path: str, expected_sha256: str) -> bool:
+        """Check whether a file was verified with this checksum and did not change since."""
+        directory, filename = os.path.split(file_path)
+        with self._verified_lock:
+            entries = self._verified.get(directory)
+            if entries is None:
+                entries = self._verified[directory] = self._read_verified(directory)
+        entry = entries.get(filename)
+        if entry is None or entry.get('sha256', '').lower() != expected_sha256.lower():
+            return False
+        return {key: entry.get(key) for key in ('size', 'mtime_ns', 'inode')} == self._stat_key(file_path)
+
+    def _record_verified(self, file_path: str, sha256: str) -> None:
+        """Record a verified file in the verification sidecar of its directory.
+
+        The sidecar is read again before being replaced atomically, so entries recorded by other
+        processes are kept. Failing to write it only costs a new hash at the next start.
+        """
+        directory, filename = os.path.split(file_path)
+        with self._verified_lock:
+            entries = self._read_verified(directory)
+            entries[filename] = dict(self._stat_key(file_path), sha256=sha256)
+            self._verified[directory] = entries
+            try:
+                import tempfile
+                fd, temp_path = tempfile.mkstemp(dir=directory, prefix=self.VERIFIED_FILE_NAME, suffix='.tmp')
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(entries, f)
+                os.replace(temp_path, os.path.join(directory, self.VERIFIED_FILE_NAME))
+            except OSError as e:
+                print(f"Warning: failed to write the verification sidecar in {directory}: {e}")
+
     def _get_main_library_path(self, cache_dir: str) -> str:
         """Get the full path to the library file.
         
@@ -576,12 +951,15 @@ class DefaultLibraryLoadStrategy(LibraryLoadStrategy):
         Raises:
             LibraryLoadError: If reading the manifest fails for any reason
         """
+        import yaml
+
         try:
 
             cache_dir = SystemInfoUtility.get_package_cache_directory(self.PACKAGE_NAME)
             os.makedirs(cache_dir, exist_ok=True)
             manifest_path = os.path.join(cache_dir, "manifest.yaml")
             manifest_data = None
+            cached_manifest_unreadable = False
 
             if (os.path.exists(manifest_path)):
                 try:
@@ -591,13 +969,16 @@ class DefaultLibraryLoadStrategy(LibraryLoadStrategy):
                 except Exception as e:
                     print(f"Failed to read cached manifest: {str(e)}, will try downloading it")
                     manifest_data = None
+                    cached_manifest_unreadable = True
 
             try:
-                session = boto3.Session()
-                s3_client = session.client('s3', config=botocore.config.Config(signature_version=botocore.UNSIGNED))
                 manifest_key = f"{package_version}/manifest.yaml"
-                print(f"Downloading manifest from s3://{self.S3_BUCKET_NAME}/{manifest_key}")
-                s3_client.download_file(self.S3_BUCKET_NAME, manifest_key, manifest_path)
+                with FileLock(os.path.join(cache_dir, self.LOCK_FILE_NAME), self.lock_timeout):
+                    # another process may have downloaded it while we were waiting for the lock,
+                    # an unreadable cached manifest is always downloaded again
+                    if not os.path.exists(manifest_path) or cached_manifest_unreadable:
+                        self._download_object(self._get_s3_client(), self.S3_BUCKET_NAME, manifest_key,
+                                              manifest_path)
             except Exception as e:
                 raise LibraryLoadError(f"Failed to download manifest: {str(e)}")
                 
@@ -0,0 +1,196 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import msgspec
+
+from cryptonets_python_sdk.session import ImageInputArg
+from cryptonets_python_sdk.idl.gen.privateid_types import ReturnStatus
+
+
+class PredictCache:
+    """Thread-safe LRU cache of `Session.face_predict_onefa` results, with a time to live.
+
+    Kiosks often retry a prediction with the same frame; a cached result is returned without
+    crossing the native boundary nor decoding anything. Entries are keyed by the SHA-256 digest of
+    the image pixels, the image geometry, the encoded operation configuration, the collection name
+    and the result type: only identical frames match. Near-identical frames are deliberately not
+    matched: a perceptual hash can collide for two different faces, and a hit would then return the
+    identity predicted for another person.
+
+    Only results with the `API_NO_ERROR` status are cached. Enrollments and deletions made by the
+    sessions sharing the cache invalidate the entries of their collection (all the entries when they
+    do not name one); changes made elsewhere are only seen once the entries expire, hence the short
+    default time to live. A hit returns the operation id of the original call.
+
+    Results are stored msgpack encoded and decoded again on every hit, so each caller gets its own
+    result object and modifying it does not change the cached entry.
+
+    One cache can be shared by several sessions, e.g. all the sessions of a `SessionPool`.
+
+    Example:
+        >>> cache = PredictCache(max_entries=256, ttl=5.0)
+        >>> session = Session(settings, predict_cache=cache)
+        >>> op_id, result = session.face_predict_onefa(image, config)  # retried: served from the cache
+        >>> cache.hit_rate
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """Create an empty cache.
+
+        Args:
+            max_entries: Maximum number of entries, the least recently used entry is evicted beyond
+            ttl: Time to live of the entries in seconds, None for no expiration
+            clock: Clock of the time to live
+
+        Raises:
+            ValueError: If an argument is invalid
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f"ttl must be positive, got {ttl}")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (expiration time, collection name, (op_id, result type, msgpack result)), least recently used first
+        self._entries: OrderedDict[Hashable, Tuple[float, Any, Tuple[int, type, bytes]]] = OrderedDict()
+        self._encoder = msgspec.msgpack.Encoder()
+        self._decoders: Dict[type, msgspec.msgpack.Decoder] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        # incremented by every invalidation, see put
+        self.generation = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of the lookups served from the cache, 0 before the first lookup"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def key(self, image: ImageInputArg, config_bytes: bytes, collection_name: Any, result_view: type) -> Hashable:
+        """Return the cache key of a prediction.
+
+        Args:
+            image: Image of the prediction
+            config_bytes: Encoded operation configuration
+            collection_name: Collection of the prediction, unset when the configuration does not name one
+            result_view: Type the result is decoded into
+        """
+        # SHA-256 is hardware accelerated on recent CPUs, twice as fast as BLAKE2b on a frame
+        image_hash = hashlib.sha256(image.image_data).digest()
+        collection = collection_name if isinstance(collection_name, str) else None
+        return collection, config_bytes, result_view, image.image_format, image.width, image.height, image_hash
+
+    def get(self, key: Hashable) -> Optional[Tuple[int, Any]]:
+        """Return the cached (op_id, result) of `key`, decoded for this call, None when it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # decoded out of the lock: the entry itself is never modified
+        op_id, result_type, encoded = entry[2]
+        return op_id, self._decoder(result_type).decode(encoded)
+
+    def put(self, key: Hashable, value: Tuple[int, Any], generation: Optional[int] = None):
+        """Cache the (op_id, result) of a prediction, unless the result is an error.
+
+        Args:
+            key: Key of the prediction
+            value: Returned (op_id, result)
+            generation: `generation` read before the prediction started, the result is not cached
+                when an invalidation happened since (e.g. an enrollment running concurrently)
+        """
+        op_id, result = value
+        call_status = getattr(result, 'call_status', None)
+        if call_status is None or call_status.return_status != ReturnStatus.API_NO_ERROR:
+            return
+        encoded = self._encoder.encode(result)
+        expires = self._clock() + self.ttl if self.ttl is not None else float('inf')
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (expires, key[0], (op_id, type(result), encoded))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _decoder(self, result_type: type) -> msgspec.msgpack.Decoder:
+        decoder = self._decoders.get(result_type)
+        if decoder is None:
+            decoder = self._decoders[result_type] = msgspec.msgpack.Decoder(result_type)
+        return decoder
+
+    def invalidate(self, collection_name: Any = None):
+        """Drop the entries of a collection, and those of predictions that named no collection.
+
+        Args:
+            collection_name: Collection changed by an enrollment or a deletion; when it is not a
+                name (None, unset) every entry is dropped
+        """
+        with self._lock:
+            self.generation += 1
+            if not isinstance(collection_name, str):
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                keys = [key for key, entry in self._entries.items() if entry[1] in (collection_name, None)]
+                for key in keys:
+                    del self._entries[key]
+                dropped = len(keys)
+            self.invalidations += dropped
+
+    def clear(self):
+        """Drop every entry, without counting them as invalidations, and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the statistics of the cache.
+
+        Returns:
+            dict with ``entries``, ``hits``, ``misses``, ``hit_rate``, ``evictions`` (least recently used
+            entries dropped for room), ``expirations`` and ``invalidations`` (entries dropped by enrollments
+            and deletions)
+        """
+        with self._lock:
+            entries = len(self._entries)
+        return {'entries': entries, 'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate,
+                'evictions': self.evictions, 'expirations': self.expirations, 'invalidations': self.invalidations}
+
+    def prometheus_text(self, namespace: str = 'cryptonets') -> str:
+        """Render the statistics in the Prometheus text exposition format (version 0.0.4)."""
+        stats = self.stats()
+        name = f"{namespace}_predict_cache"
+        lines = [f"# HELP {name}_entries Number of cached predictions.",
+                 f"# TYPE {name}_entries gauge",
+                 f"{name}_entries {stats['entries']}",
+                 f"# HELP {name}_lookups_total Predict cache lookups by result.",
+                 f"# TYPE {name}_lookups_total counter",
+                 f'{name}_lookups_total{{result="hit"}} {stats["hits"]}',
+                 f'{name}_lookups_total{{result="miss"}} {stats["misses"]}',
+                 f"# HELP {name}_removals_total Cached predictions removed by reason.",
+                 f"# TYPE {name}_removals_total counter"]
+        for reason in ('evictions', 'expirations', 'invalidations'):
+            lines.append(f'{name}_removals_total{{reason="{reason[:-1]}"}} {stats[reason]}')
+        return "\n".join(lines) + "\n"
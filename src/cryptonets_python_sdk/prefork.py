@@ -0,0 +1,104 @@
+"""Pre-fork mode: load the library and its models once in a master process, before forking the workers.
+
+When every worker process of a pre-forking server (gunicorn, uWSGI, multiprocessing with the fork start
+method) calls `PrivIDFaceLib.initialize`, every worker holds its own copy of the model weights. With
+`prepare` the master initializes the library, runs a few operations so that the models are loaded and
+their pages are resident, then freezes the Python objects allocated so far (`gc.freeze`) so that the
+garbage collector of the workers does not write to their pages. Forked workers share these pages
+copy-on-write.
+
+Native sessions must not be shared between processes. Sessions created before the fork cannot be used
+in a child (their operations raise `SessionError`); `SessionPool` evicts them and creates new sessions on
+first use. The library lock and the instrumentation lock are re-created in every child.
+
+Example (gunicorn.conf.py):
+    >>> from cryptonets_python_sdk import prefork
+    >>>
+    >>> def on_starting(server):
+    ...     prefork.prepare(settings)
+    >>>
+    >>> post_fork = prefork.post_fork
+
+`benchmarks/bench_prefork.py` measures the memory of the workers with and without the pre-fork mode.
+"""
+
+import gc
+import os
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from cryptonets_python_sdk.library import PrivIDFaceLib, PrivIDError
+from cryptonets_python_sdk.library_loader import LibraryLoadStrategy
+from cryptonets_python_sdk.session import ImageInputArg, Session
+from cryptonets_python_sdk.idl.gen.privateid_types import OperationConfig, SessionSettings
+
+# Operations run on the master by `prepare`, they run locally and load the face detection models
+WARM_UP_OPERATIONS = ('validate', 'estimate_age', 'anti_spoofing')
+
+# pid of the process that called prepare()
+_master_pid: Optional[int] = None
+
+
+def _warm_up(session: Session, operations: Iterable[str]):
+    """Run each operation once on a blank frame; the results do not matter."""
+    image = ImageInputArg(np.full((480, 640, 3), 128, dtype=np.uint8), 'rgb', zero_copy=True)
+    config = OperationConfig()
+    for operation in operations:
+        getattr(session, operation)(image, config)
+
+
+def prepare(settings: Optional[SessionSettings] = None, load_strategy: Optional[LibraryLoadStrategy] = None,
+            log_level: int = 0, warm_up: Optional[Callable[[Session], None]] = None,
+            operations: Iterable[str] = WARM_UP_OPERATIONS, freeze: bool = True):
+    """Initialize and warm up the library in the master process, before forking the workers.
+
+    Args:
+        settings: Settings of the warm-up session. Without settings the library is only initialized,
+            and the models the native library loads on first use are loaded by every worker.
+        load_strategy: Optional custom library loading strategy
+        log_level: Logging level (0=error, 1=warn, 2=info, 3=debug)
+        warm_up: Callable running operations on the warm-up session, replacing `operations`
+        operations: Names of the `Session` operations run once on a blank frame
+        freeze: Move every object tracked by the garbage collector to the permanent generation
+            (`gc.freeze`), so that the collections of the workers do not touch their pages
+
+    Raises:
+        LibraryLoadError: If library loading or initialization fails
+        SessionError: If the warm-up session cannot be created
+    """
+    global _master_pid
+    PrivIDFaceLib.initialize(load_strategy, log_level)
+    if settings is not None:
+        session = Session(settings)
+        try:
+            if warm_up is not None:
+                warm_up(session)
+            else:
+                _warm_up(session, operations)
+        finally:
+            session.close()
+    if freeze:
+        # collect first, so that the garbage is not frozen with the live objects
+        gc.collect()
+        gc.freeze()
+    _master_pid = os.getpid()
+
+
+def post_fork(server=None, worker=None):
+    """Check the library state in a freshly forked worker.
+
+    The process-local state is reset by the fork handlers of the library; this hook only checks that the
+    worker inherited an initialized library. Its signature matches the gunicorn `post_fork` server hook.
+
+    Args:
+        server: Unused, gunicorn arbiter
+        worker: Unused, gunicorn worker
+
+    Raises:
+        PrivIDError: If `prepare` was not called in the parent process
+    """
+    if _master_pid is None or _master_pid == os.getpid():
+        raise PrivIDError("post_fork() must be called in a process forked after prefork.prepare()")
+    if not PrivIDFaceLib.is_initialized():
+        raise PrivIDError("The library was shut down before the fork")
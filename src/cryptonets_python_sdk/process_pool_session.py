@@ -0,0 +1,507 @@
+"""Process pool running `Session` operations in worker processes, one native session per process.
+
+Threads leasing sessions from a `SessionPool` run the native calls in parallel, but the Python work
+around them (image copies, configuration encoding, JSON decoding of the results) holds the GIL. With
+`ProcessPoolSession` every worker process owns its `PrivIDFaceLib` and its `Session`, so this work runs on
+all the cores too.
+
+The pixels are not pickled: every worker has a shared memory segment the caller copies the images into,
+and the worker wraps them without copy. Results are decoded in the worker and sent back encoded with
+msgpack, the caller only decodes msgpack. Only the operation name, the image geometry and the encoded
+configuration go through the pipe.
+
+Example:
+    >>> with ProcessPoolSession(settings, workers=4) as session:
+    ...     op_id, result = session.validate(image, config)
+    ...     for index, op_id, result in session.validate_many(images, config):
+    ...         ...
+"""
+
+import multiprocessing
+import os
+import pickle
+import signal
+import threading
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import msgspec
+import numpy as np
+
+from cryptonets_python_sdk.library import PrivIDFaceLib
+from cryptonets_python_sdk.library_loader import LibraryLoadStrategy
+from cryptonets_python_sdk.session import (
+    ImageInputArg,
+    Session,
+    SessionError,
+    bounded_results,
+    check_max_in_flight,
+)
+from cryptonets_python_sdk.compiled_config import CompiledOperationConfig, OperationConfigArg
+from cryptonets_python_sdk.idl.gen.privateid_types import CallResult, OperationConfig, SessionSettings
+
+
+class ProcessPoolSessionError(SessionError):
+    """Exception for process pool errors"""
+    pass
+
+
+class WorkerCrashedError(ProcessPoolSessionError):
+    """Raised when a worker process died during a call; the worker is restarted"""
+    pass
+
+
+class ProcessPoolTimeoutError(ProcessPoolSessionError, TimeoutError):
+    """Raised when a call did not complete in time; the worker is killed and restarted"""
+    pass
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # the segment is owned and unlinked by the parent process, which shares its resource tracker with
+    # the workers: registering it again from the worker is a no-op
+    return shared_memory.SharedMemory(name=name)
+
+
+def _detach(error: BaseException) -> BaseException:
+    """Return an exception that can be pickled and holds no reference to the shared memory."""
+    error = error.with_traceback(None)
+    error.__context__ = error.__cause__ = None
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return SessionError(f"{type(error).__name__}: {error}")
+
+
+def _image_view(shm: shared_memory.SharedMemory, offset: int, size: int, width: int, height: int,
+                image_format: str) -> ImageInputArg:
+    """Wrap an image copied to the shared memory segment, without copy."""
+    pixels = np.frombuffer(shm.buf, dtype=np.uint8, count=size, offset=offset)
+    return ImageInputArg(pixels.reshape(height, width, -1), image_format, zero_copy=True)
+
+
+def _worker_main(conn, settings: SessionSettings, load_strategy: Optional[LibraryLoadStrategy], log_level: int,
+                 shm_name: str):
+    """Body of a worker process: initialize the library and a session, then serve the calls."""
+    # interrupts are handled by the parent process, which stops the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        PrivIDFaceLib.initialize(load_strategy, log_level)
+        session = Session(settings)
+        shm = _attach(shm_name)
+    except BaseException as e:
+        conn.send(('error', _detach(e)))
+        return
+    conn.send(('ready', os.getpid()))
+
+    encoder = msgspec.msgpack.Encoder()
+    config_decoder = msgspec.msgpack.Decoder(OperationConfig)
+    configs: Dict[bytes, CompiledOperationConfig] = {}
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message[0] == 'stop':
+            break
+        if message[0] == 'attach':
+            shm.close()
+            shm = _attach(message[1])
+            continue
+        _, operation, images, config_bytes, args, kwargs = message
+        inputs = []
+        try:
+            config = configs.get(config_bytes)
+            if config is None:
+                if len(configs) >= 64:
+                    configs.clear()
+                config = configs[config_bytes] = CompiledOperationConfig(config_decoder.decode(config_bytes))
+            inputs = [_image_view(shm, *image) for image in images]
+            returned = getattr(session, operation)(*inputs, *args, config, **kwargs)
+            reply = ('ok', returned[0], encoder.encode(returned[1]), returned[2:])
+        except BaseException as e:
+            reply = ('raise', _detach(e))
+        # release the views on the shared memory before the next attach
+        del inputs
+        if not session.has_valid_handle():
+            session.close()
+            session = Session(settings)
+        conn.send(reply)
+    session.close()
+    shm.close()
+
+
+class _Worker:
+    """Worker process, its pipe and its shared memory segment (parent side)."""
+
+    def __init__(self, pool: 'ProcessPoolSession'):
+        self.shm = shared_memory.SharedMemory(create=True, size=pool._shm_size)
+        self.conn, child_conn = pool._context.Pipe()
+        self.process = pool._context.Process(
+            target=_worker_main, name='cryptonets-worker', daemon=True,
+            args=(child_conn, pool._settings, pool._load_strategy, pool._log_level, self.shm.name))
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def wait_ready(self, timeout: Optional[float]):
+        """Wait for the worker to be initialized.
+
+        Raises:
+            ProcessPoolSessionError: If the worker failed to initialize or did not start in time
+        """
+        try:
+            ready = self.conn.poll(timeout)
+            if ready:
+                status, value = self.conn.recv()
+        except (EOFError, OSError):
+            raise WorkerCrashedError(f"Worker exited during startup (exit code {self.process.exitcode})")
+        if not ready:
+            raise ProcessPoolTimeoutError(f"Worker not started after {timeout} seconds")
+        if status == 'error':
+            raise ProcessPoolSessionError(f"Worker initialization failed: {value}") from value
+
+    def reserve(self, size: int):
+        """Make the shared memory segment at least `size` bytes long."""
+        if size <= self.shm.size:
+            return
+        shm = shared_memory.SharedMemory(create=True, size=1 << (size - 1).bit_length())
+        self.conn.send(('attach', shm.name))
+        # the worker keeps the old segment mapped until it receives the attach message
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = shm
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the worker gracefully, or kill it, and release its segment."""
+        try:
+            self.conn.send(('stop',))
+        except OSError:
+            pass
+        self.process.join(timeout)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ProcessPoolSession:
+    """Pool of worker processes with the same method surface as `Session`.
+
+    Each worker process initializes `PrivIDFaceLib` with `load_strategy` and creates one `Session` from
+    `settings`. An operation leases an idle worker, copies the images to its shared memory segment and
+    waits for the result, so calls made from `workers` threads, or the batch operations, run on
+    `workers` cores. The methods are thread-safe.
+
+    Workers are restarted when they die during a call (`WorkerCrashedError`), when a call exceeds
+    `call_timeout` (`ProcessPoolTimeoutError`, the worker is killed) and after `max_tasks_per_worker`
+    calls, which bounds the memory growth of long running workers. A call that failed is not retried,
+    the operation may not be idempotent (enroll, user delete).
+
+    With the default 'spawn' start method every worker loads the library and its models. With the 'fork'
+    start method after `prefork.prepare`, the workers share the models loaded by the parent process.
+    """
+
+    def __init__(self, settings: SessionSettings, workers: Optional[int] = None,
+                 load_strategy: Optional[LibraryLoadStrategy] = None, log_level: int = 0,
+                 max_tasks_per_worker: Optional[int] = None, call_timeout: Optional[float] = None,
+                 start_timeout: Optional[float] = 120.0, shm_size: int = 4 << 20, start_method: str = 'spawn'):
+        """Start the worker processes and wait for their initialization.
+
+        Args:
+            settings: Settings of the session of every worker
+            workers: Number of worker processes (defaults to the number of CPUs)
+            load_strategy: Library loading strategy of the workers, it must be picklable
+            log_level: Logging level of the workers (0=error, 1=warn, 2=info, 3=debug)
+            max_tasks_per_worker: Number of calls after which a worker is replaced, None never replaces it
+            call_timeout: Maximum duration of a call in seconds, None waits forever
+            start_timeout: Maximum duration of a worker initialization in seconds, None waits forever
+            shm_size: Initial size of the shared memory segment of every worker, grown on demand
+            start_method: multiprocessing start method of the workers ('spawn', 'fork' or 'forkserver')
+
+        Raises:
+            ValueError: If an argument is invalid
+            ProcessPoolSessionError: If a worker failed to initialize
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError(f"workers must be positive, got {workers}")
+        if max_tasks_per_worker is not None and max_tasks_per_worker < 1:
+            raise ValueError(f"max_tasks_per_worker must be positive, got {max_tasks_per_worker}")
+        self._settings = settings
+        self._workers_count = workers
+        self._load_strategy = load_strategy
+        self._log_level = log_level
+        self._max_tasks = max_tasks_per_worker
+        self._call_timeout = call_timeout
+        self._start_timeout = start_timeout
+        self._shm_size = shm_size
+        self._context = multiprocessing.get_context(start_method)
+        self._encoder = msgspec.msgpack.Encoder()
+        self._decoders: Dict[type, msgspec.msgpack.Decoder] = {}
+        self._idle: deque[_Worker] = deque()
+        self._cond = threading.Condition()
+        self._restarts = 0
+        self._closed = False
+        self._executor = None
+        workers_started = []
+        try:
+            for _ in range(workers):
+                workers_started.append(_Worker(self))
+            for worker in workers_started:
+                worker.wait_ready(start_timeout)
+        except BaseException:
+            for worker in workers_started:
+                worker.kill()
+            raise
+        self._idle.extend(workers_started)
+
+    @property
+    def workers(self) -> int:
+        """Number of worker processes"""
+        return self._workers_count
+
+    @property
+    def restarts(self) -> int:
+        """Number of workers replaced since the pool creation (crashes, timeouts and recycling)"""
+        return self._restarts
+
+    def _acquire(self) -> _Worker:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise ProcessPoolSessionError("Process pool session is closed")
+                if self._idle:
+                    return self._idle.popleft()
+                self._cond.wait()
+
+    def _release(self, worker: _Worker, replace: bool):
+        if replace or not worker.is_alive() or (self._max_tasks is not None and worker.tasks >= self._max_tasks):
+            # the replacement is started by the releasing thread, outside of the lock
+            worker.stop(timeout=0 if replace else 5.0)
+            worker = self._restart()
+            if worker is None:
+                return
+        with self._cond:
+            if self._closed:
+                worker.stop()
+                return
+            self._idle.append(worker)
+            self._cond.notify()
+
+    def _restart(self) -> Optional[_Worker]:
+        with self._cond:
+            if self._closed:
+                return None
+            self._restarts += 1
+        worker = _Worker(self)
+        try:
+            worker.wait_ready(self._start_timeout)
+        except ProcessPoolSessionError:
+            worker.kill()
+            # the slot is lost, wake up the waiters so that they do not wait forever on a broken pool
+            with self._cond:
+                self._workers_count -= 1
+                if self._workers_count == 0:
+                    self._closed = True
+                self._cond.notify_all()
+            raise
+        return worker
+
+    def _decoder(self, result_view: type) -> msgspec.msgpack.Decoder:
+        decoder = self._decoders.get(result_view)
+        if decoder is None:
+            decoder = self._decoders[result_view] = msgspec.msgpack.Decoder(result_view)
+        return decoder
+
+    def _call(self, operation: str, images: Tuple[ImageInputArg, ...], args: tuple, config: OperationConfigArg,
+              result_view: type, **kwargs) -> tuple:
+        """Run an operation on an idle worker and decode its result."""
+        if isinstance(config, CompiledOperationConfig):
+            config_bytes = config.encode_msgpack()
+        else:
+            config_bytes = self._encoder.encode(config)
+        decoder = self._decoder(result_view)
+        buffers = [memoryview(image.image_data).cast('B') for image in images]
+        worker = self._acquire()
+        replace = False
+        try:
+            worker.reserve(sum(len(data) for data in buffers))
+            layout = []
+            offset = 0
+            for image, data in zip(images, buffers):
+                worker.shm.buf[offset:offset + len(data)] = data
+                layout.append((offset, len(data), image.width, image.height, image.image_format))
+                offset += len(data)
+            worker.tasks += 1
+            worker.conn.send(('call', operation, layout, config_bytes, args, dict(kwargs, result_view=result_view)))
+            if not worker.conn.poll(self._call_timeout):
+                replace = True
+                raise ProcessPoolTimeoutError(f"{operation} did not complete in {self._call_timeout} seconds")
+            reply = worker.conn.recv()
+        except ProcessPoolTimeoutError:
+            # TimeoutError is an OSError
+            raise
+        except (EOFError, OSError) as e:
+            replace = True
+            raise WorkerCrashedError(f"Worker exited during {operation} "
+                                     f"(exit code {worker.process.exitcode})") from e
+        finally:
+            self._release(worker, replace)
+        if reply[0] == 'raise':
+            raise reply[1]
+        _, op_id, result_bytes, outputs = reply
+        return (op_id, decoder.decode(result_bytes)) + tuple(outputs)
+
+    def validate(self, image: ImageInputArg, config: OperationConfigArg,
+                 result_view: type = CallResult) -> Tuple[int, CallResult]:
+        """Process pool version of `Session.validate`."""
+        return self._call('validate', (image,), (), config, result_view)
+
+    def enroll_onefa(self, image: ImageInputArg, config: OperationConfigArg,
+                     result_view: type = CallResult) -> Tuple[int, CallResult]:
+        """Process pool version of `Session.enroll_onefa`."""
+        return self._call('enroll_onefa', (image,), (), config, result_view)
+
+    def face_predict_onefa(self, image: ImageInputArg, config: OperationConfigArg,
+                           result_view: type = CallResult) -> Tuple[int, CallResult]:
+        """Process pool version of `Session.face_predict_onefa`."""
+        return self._call('face_predict_onefa', (image,), (), config, result_view)
+
+    def face_compare_files(self, image_a: ImageInputArg, image_b: ImageInputArg, config: OperationConfigArg,
+                           result_view: type = CallResult) -> Tuple[int, CallResult]:
+        """Process pool version of `Session.face_compare_files`."""
+        return self._call('face_compare_files', (image_a, image_b), (), config, result_view)
+
+    def estimate_age(self, image: ImageInputArg, config: OperationConfigArg,
+                     result_view: type = CallResult) -> Tuple[int, CallResult]:
+        """Process pool version of `Session.estimate_age`."""
+        return self._call('estimate_age', (image,), (), config, result_view)
+
+    def face_iso(self, image: ImageInputArg, config: OperationConfigArg, result_view: type = CallResult,
+                 as_array: bool = False) -> Tuple[int, CallResult, Union[bytes, np.ndarray, None]]:
+        """Process pool version of `Session.face_iso`, arrays are copied from the worker."""
+        return self._call('face_iso', (image,), (), config, result_view, as_array=as_array)
+
+    def anti_spoofing(self, image: ImageInputArg, config: OperationConfigArg,
+                      result_view: type = CallResult) -> Tuple[int, CallResult]:
+        """Process pool version of `Session.anti_spoofing`."""
+        return self._call('anti_spoofing', (image,), (), config, result_view)
+
+    def doc_scan_face(self, image: ImageInputArg, config: OperationConfigArg, result_view: type = CallResult,
+                      as_array: bool = False) -> Tuple[int, CallResult, Union[bytes, np.ndarray, None],
+                                                       Union[bytes, np.ndarray, None]]:
+        """Process pool version of `Session.doc_scan_face`, arrays are copied from the worker."""
+        return self._call('doc_scan_face', (image,), (), config, result_view, as_array=as_array)
+
+    def user_delete(self, puid: str, config: OperationConfigArg,
+                    result_view: type = CallResult) -> Tuple[int, CallResult]:
+        """Process pool version of `Session.user_delete`."""
+        return self._call('user_delete', (), (puid,), config, result_view)
+
+    def validate_many(self, images: Iterable[Union[ImageInputArg, np.ndarray]], config: OperationConfigArg,
+                      image_format: str = 'rgb', ordered: bool = True, max_in_flight: Optional[int] = None,
+                      result_view: type = CallResult) -> Iterator[Tuple[int, int, CallResult]]:
+        """Validate many face images on all the workers.
+
+        Args:
+            images: Iterable of ImageInputArg or uint8 numpy arrays, consumed lazily
+            config: Typed operation configuration shared by all the images, plain or compiled
+            image_format: Pixel format of the numpy array inputs
+            ordered: Yield results in input order, otherwise as they complete
+            max_in_flight: Maximum number of images submitted at once (defaults to 2 x workers)
+            result_view: Type to decode the results into, CallResult or a slim view from result_views
+
+        Returns:
+            Iterator of (index, operation_id, typed_result) tuples
+
+        Raises:
+            ValueError: If `max_in_flight` is not positive
+        """
+        return self._run_many('validate', images, config, image_format, ordered, max_in_flight, result_view)
+
+    def estimate_age_many(self, images: Iterable[Union[ImageInputArg, np.ndarray]], config: OperationConfigArg,
+                          image_format: str = 'rgb', ordered: bool = True, max_in_flight: Optional[int] = None,
+                          result_view: type = CallResult) -> Iterator[Tuple[int, int, CallResult]]:
+        """Estimate age on many face images on all the workers.
+
+        Arguments and return value are the same as `validate_many`.
+        """
+        return self._run_many('estimate_age', images, config, image_format, ordered, max_in_flight, result_view)
+
+    def anti_spoofing_many(self, images: Iterable[Union[ImageInputArg, np.ndarray]], config: OperationConfigArg,
+                           image_format: str = 'rgb', ordered: bool = True, max_in_flight: Optional[int] = None,
+                           result_view: type = CallResult) -> Iterator[Tuple[int, int, CallResult]]:
+        """Perform anti-spoofing detection on many face images on all the workers.
+
+        Arguments and return value are the same as `validate_many`.
+        """
+        return self._run_many('anti_spoofing', images, config, image_format, ordered, max_in_flight, result_view)
+
+    def _run_many(self, operation: str, images, config: OperationConfigArg, image_format: str, ordered: bool,
+                  max_in_flight: Optional[int], result_view: type) -> Iterator[Tuple[int, int, Any]]:
+        """Run a single image operation over many images on the workers, see `bounded_results`.
+
+        Raises:
+            ValueError: If `max_in_flight` is not positive, when called rather than when iterated
+        """
+        if max_in_flight is None:
+            max_in_flight = 2 * self._workers_count
+        check_max_in_flight(max_in_flight)
+        from concurrent.futures import ThreadPoolExecutor
+        with self._cond:
+            if self._executor is None:
+                # one thread per worker: each thread waits for its worker, the work runs in the processes
+                self._executor = ThreadPoolExecutor(max_workers=self._workers_count,
+                                                    thread_name_prefix='cryptonets-process-pool')
+        executor = self._executor
+        # encoded once for all the images
+        if not isinstance(config, CompiledOperationConfig):
+            config = CompiledOperationConfig(config)
+
+        def run_one(index: int, image) -> Tuple[int, int, Any]:
+            if not isinstance(image, ImageInputArg):
+                image = ImageInputArg(image, image_format, zero_copy=True)
+            op_id, result = self._call(operation, (image,), (), config, result_view)
+            return index, op_id, result
+
+        return bounded_results(lambda index, image: executor.submit(run_one, index, image), images, ordered,
+                               max_in_flight)
+
+    def close(self):
+        """Stop the worker processes and release their shared memory.
+
+        Calls in progress complete first; the pool cannot be used anymore after this call.
+        """
+        with self._cond:
+            if self._closed and not self._idle:
+                return
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        for worker in idle:
+            worker.stop()
+
+    def __enter__(self) -> 'ProcessPoolSession':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        if not getattr(self, '_closed', True):
+            self.close()
@@ -0,0 +1,110 @@
+"""Slim views of `CallResult` for hot paths.
+
+Every `Session` operation accepts a `result_view` argument. By default the whole `CallResult`
+tree is decoded. Passing one of the view types below decodes only the fields it declares:
+msgspec skips the other JSON members without building any object for them (faces geometry,
+barcode data, document data ...).
+
+A view is any msgspec Struct whose fields are a subset of `CallResult` fields (with the same
+names and compatible types), so callers can define their own.
+
+Example:
+    >>> op_id, result = session.face_predict_onefa(image, config, result_view=PredictView)
+    >>> if result.call_status.return_status == ReturnStatus.API_NO_ERROR and result.predict:
+    ...     print(result.predict.api_response.puid)
+"""
+
+from __future__ import annotations
+
+from typing import Annotated
+
+from msgspec import UNSET, Meta, Struct, UnsetType
+
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    AgeData,
+    CallResultHeader,
+    CompareResult,
+    EnrollData,
+    FaceTraitsFlags,
+    Image,
+    SpoofStatus,
+    UserDeleteResponse,
+)
+
+
+class StatusView(Struct):
+    """Only the call status header"""
+    call_status: CallResultHeader
+
+
+class FaceStatusView(Struct):
+    """Face traits and spoof status of a detected face, without geometry, scores or crops"""
+    face_traits_flags: Annotated[
+        FaceTraitsFlags, Meta(description='Flags type - bitwise OR of enum values')
+    ]
+    spoof_status: Annotated[
+        SpoofStatus, Meta(description='Enum value serialized as integer')
+    ]
+    age_data: AgeData | None | UnsetType = UNSET
+
+
+class FacesView(Struct):
+    """Call status and per face status, for validate, anti_spoofing and estimate_age"""
+    call_status: CallResultHeader
+    faces: list[FaceStatusView] | UnsetType = UNSET
+
+
+class PredictResponseView(Struct):
+    """Backend predict response without the candidates list"""
+    status: int
+    puid: str | None | UnsetType = UNSET
+    guid: str | None | UnsetType = UNSET
+    score: float | None | UnsetType = UNSET
+
+
+class PredictDataView(Struct):
+    predict_performed: bool
+    api_response: PredictResponseView | None | UnsetType = UNSET
+
+
+class PredictView(Struct):
+    """Call status and predicted user, for face_predict_onefa"""
+    call_status: CallResultHeader
+    predict: PredictDataView | None | UnsetType = UNSET
+
+
+class EnrollView(Struct):
+    """Call status and enrollment data, for enroll_onefa"""
+    call_status: CallResultHeader
+    enroll: EnrollData | None | UnsetType = UNSET
+
+
+class CompareView(Struct):
+    """Call status and comparison result, for face_compare_files"""
+    call_status: CallResultHeader
+    compare: CompareResult | None | UnsetType = UNSET
+
+
+class UserDeleteView(Struct):
+    """Call status and deletion result, for user_delete"""
+    call_status: CallResultHeader
+    user_delete: UserDeleteResponse | None | UnsetType = UNSET
+
+
+class _IsoImageView(Struct):
+    image: Image | None | UnsetType = UNSET
+
+
+class _DocumentImageView(Struct):
+    cropped_document_image_info: Image | None | UnsetType = UNSET
+
+
+class _FaceImageView(Struct):
+    cropped_image_info: Image | None | UnsetType = UNSET
+
+
+class OutputImagesView(Struct):
+    """Description of the output images of face_iso and doc_scan_face (size, channels and depth)"""
+    iso_image: _IsoImageView | None | UnsetType = UNSET
+    document: _DocumentImageView | None | UnsetType = UNSET
+    faces: list[_FaceImageView] | UnsetType = UNSET
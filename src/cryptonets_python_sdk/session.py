@@ -1,49 +1,126 @@
 import os
-from typing import Tuple, Any
+import threading
+import time
+from collections import deque
+from typing import Tuple, Any, BinaryIO, Callable, Iterable, Iterator, Optional, Union, TYPE_CHECKING
 import numpy as np
 import msgspec
 from cryptonets_python_sdk.library import PrivIDFaceLib, PrivIDError
-from cryptonets_python_sdk.img_utils import ImageUtils
+from cryptonets_python_sdk.img_utils import ImageDecoder, ImageUtils
+from cryptonets_python_sdk.instrumentation import Instrumentation, instrumented
+from cryptonets_python_sdk.compiled_config import (
+    CompiledOperationConfig,
+    OperationConfigArg,
+    encode_operation_config,
+)
 from cryptonets_python_sdk.idl.gen.privateid_types import (
     CallResult,
+    Depth,
+    ImageInfo,
     SessionSettings,
     OperationConfig,
+    ReturnStatus,
 )
+from cryptonets_python_sdk.result_views import OutputImagesView
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from cryptonets_python_sdk.predict_cache import PredictCache
+    from cryptonets_python_sdk.session_pool import SessionPool
 
 
 class ImageInputArg:
     """Class representing an image input argument.
     Can be initialized with either a file path or a numpy array.
+
+    By default the pixels are copied into a ``bytes`` object (``image_data``).
+    With ``zero_copy=True`` the C-contiguous uint8 array itself is kept in ``image_data`` and handed
+    to the native library through ``ffi.from_buffer``; non-contiguous views (slices, ``np.rot90`` ...)
+    are made contiguous once, only when needed. The array must not be modified while a call is running.
+
+    Image files are decoded by `ImageDecoder`; ``max_side`` downscales them at decode time so that their
+    longest side is at most ``max_side`` pixels (JPEG images are never decoded at full size then).
+    Encoded images held in memory are decoded with ``from_bytes``, ``from_stream`` and ``from_memoryview``,
+    without writing them to a file.
     """
     image_format: str
-    image_data: bytes
+    image_data: bytes | np.ndarray
     width: int
     height: int
     orientation: int
 
-    def __init__(self, image_in, image_format: str, apply_rotation: bool = True):
-        ImageUtils.check_image_format(image_format)
+    def __init__(self, image_in, image_format: str, apply_rotation: bool = True, zero_copy: bool = False,
+                 max_side: Optional[int] = None):
         self.image_array = None
+        ImageUtils.check_image_format(image_format)
         if isinstance(image_in, str):
             self.image_array, self.image_format = ImageUtils.image_path_to_numpy_array(image_in, image_format,
-                                                                                       apply_rotation)
-            ImageUtils.check_image_array(self.image_array, self.image_format)
-            self.width = self.image_array.shape[1]
-            self.height = self.image_array.shape[0]
-            self.image_data = self.image_array.tobytes()
-            self.orientation = 1
+                                                                                       apply_rotation, max_side)
         elif isinstance(image_in, np.ndarray):
             self.image_array = image_in
             if image_format == '':
                 raise ValueError("Image format should not be empty when using numpy array")
             self.image_format = image_format.lower()
-            ImageUtils.check_image_array(self.image_array, self.image_format)
-            self.width = self.image_array.shape[1]
-            self.height = self.image_array.shape[0]
-            self.image_data = self.image_array.tobytes()
-            self.orientation = 1
         else:
             raise ValueError("Invalid image input type")
+        ImageUtils.check_image_array(self.image_array, self.image_format)
+        self.width = self.image_array.shape[1]
+        self.height = self.image_array.shape[0]
+        if zero_copy:
+            # no-op for arrays that are already C-contiguous
+            self.image_data = np.ascontiguousarray(self.image_array)
+        else:
+            self.image_data = self.image_array.tobytes()
+        self.orientation = 1
+
+    @classmethod
+    def _from_encoded(cls, source, image_format: str, apply_rotation: bool, zero_copy: bool,
+                      max_side: Optional[int]) -> 'ImageInputArg':
+        ImageUtils.check_image_format(image_format)
+        image_array, pixel_format = ImageDecoder().decode(source, image_format, apply_rotation, max_side)
+        return cls(image_array, pixel_format, zero_copy=zero_copy)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, image_format: str, apply_rotation: bool = True, zero_copy: bool = False,
+                   max_side: Optional[int] = None) -> 'ImageInputArg':
+        """Decode an encoded image (JPEG, PNG ...) held in memory, e.g. the body of an HTTP upload.
+
+        Args:
+            data: Encoded image bytes
+            image_format: Pixel format of the decoded image ("rgb", "bgr" or "rgba")
+            apply_rotation: Apply the EXIF orientation
+            zero_copy: Keep the decoded array instead of copying it to bytes
+            max_side: Downscale the image so that its longest side is at most `max_side` pixels
+
+        Returns:
+            ImageInputArg: The decoded image
+
+        Raises:
+            ValueError: If the pixel format is not supported
+            PIL.UnidentifiedImageError: If the image format is not recognized
+        """
+        return cls._from_encoded(data, image_format, apply_rotation, zero_copy, max_side)
+
+    @classmethod
+    def from_stream(cls, stream: BinaryIO, image_format: str, apply_rotation: bool = True, zero_copy: bool = False,
+                    max_side: Optional[int] = None) -> 'ImageInputArg':
+        """Decode an encoded image read from a binary file-like object (read until its end).
+
+        See `from_bytes` for the other arguments.
+        """
+        return cls._from_encoded(stream, image_format, apply_rotation, zero_copy, max_side)
+
+    @classmethod
+    def from_memoryview(cls, view: memoryview, image_format: str, apply_rotation: bool = True,
+                        zero_copy: bool = False, max_side: Optional[int] = None) -> 'ImageInputArg':
+        """Decode an encoded image exposed through the buffer protocol (memoryview, bytearray, mmap ...).
+
+        The buffer is handed to the turbojpeg and opencv decoders without copy. It must be C-contiguous and
+        must not be modified until this method returns.
+
+        See `from_bytes` for the other arguments.
+        """
+        return cls._from_encoded(memoryview(view), image_format, apply_rotation, zero_copy, max_side)
 
     def __del__(self):
         if self.image_array is not None:
@@ -56,6 +133,88 @@ class ImageInputArg:
         self.orientation = None
 
 
+class ResultCells:
+    """Reusable output parameters of the native calls: the JSON result and up to two output images.
+
+    Every native session keeps one instance per thread (see `SessionNative._cells`) and passes it to
+    all its calls instead of allocating new CFFI cells for each call. An instance must not be shared
+    between threads. The pointers are reset to NULL once their buffer is freed or handed over, so a
+    native call failing before writing an output never leaves a stale pointer to free again.
+    """
+    __slots__ = ('result_ptr', 'result_len', 'image_ptr', 'image_len', 'face_ptr', 'face_len')
+
+    def __init__(self, ffibuilder):
+        self.result_ptr = ffibuilder.new('char **')
+        self.result_len = ffibuilder.new('int *')
+        self.image_ptr = ffibuilder.new('uint8_t **')
+        self.image_len = ffibuilder.new('int *')
+        self.face_ptr = ffibuilder.new('uint8_t **')
+        self.face_len = ffibuilder.new('int *')
+
+
+# Callable decoding a native JSON result from a buffer (e.g. msgspec `Decoder.decode`)
+ResultDecoder = Callable[[Any], Any]
+
+# numpy type of the pixels of the output images, by ImageInfo depth
+_DEPTH_DTYPES = {
+    Depth.P_CV_8U: np.uint8,
+    Depth.P_CV_8S: np.int8,
+    Depth.P_CV_16U: np.uint16,
+    Depth.P_CV_16S: np.int16,
+    Depth.P_CV_32S: np.int32,
+    Depth.P_CV_32F: np.float32,
+    Depth.P_CV_64F: np.float64,
+    Depth.P_CV_16F: np.float16,
+}
+_output_images_decoder = msgspec.json.Decoder(OutputImagesView)
+
+
+def check_max_in_flight(max_in_flight: int):
+    """Raise ValueError unless `max_in_flight` allows at least one item in flight."""
+    if max_in_flight < 1:
+        raise ValueError(f"max_in_flight must be positive, got {max_in_flight}")
+
+
+def bounded_results(submit: Callable[[int, Any], 'Future'], items: Iterable, ordered: bool,
+                    max_in_flight: int) -> Iterator[Any]:
+    """Submit the items one by one and yield the results of their futures.
+
+    At most `max_in_flight` futures are pending at a time: the items are consumed lazily, as the
+    results are yielded. Futures still pending when the generator is closed are cancelled.
+
+    Args:
+        submit: Callable submitting (index, item) to an executor and returning its Future
+        items: Iterable of the items
+        ordered: Yield the results in item order, otherwise as they complete
+        max_in_flight: Maximum number of pending futures, checked with `check_max_in_flight`
+    """
+    # imported here, concurrent.futures imports logging and only the batch operations use it
+    from concurrent.futures import wait, FIRST_COMPLETED
+    check_max_in_flight(max_in_flight)
+    pending = deque()
+
+    def drain(limit: int):
+        # yield results until at most `limit` items are still in flight
+        nonlocal pending
+        while len(pending) > limit:
+            if ordered:
+                yield pending.popleft().result()
+            else:
+                done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+                pending = deque(not_done)
+                for future in done:
+                    yield future.result()
+
+    try:
+        for index, item in enumerate(items):
+            pending.append(submit(index, item))
+            yield from drain(max_in_flight - 1)
+        yield from drain(0)
+    finally:
+        for future in pending:
+            future.cancel()
+
+
 class SessionError(PrivIDError):
     """Exception for session-related errors"""
     pass
@@ -82,6 +241,10 @@ class SessionNative:
         self._lib = PrivIDFaceLib._lib
         self._ffibuilder = PrivIDFaceLib._ffibuilder
         self._session = None
+        # output parameters reused by the calls, one set per thread using the session
+        self._arena = threading.local()
+        # sessions created before a fork belong to the parent process
+        self._fork_generation = PrivIDFaceLib._fork_generation
 
         # Convert settings to bytes if needed
         if isinstance(settings, str):
@@ -109,31 +272,176 @@ class SessionNative:
     def __del__(self):
         """Cleanup when session is destroyed"""
         if self._session:
-            self._lib.privid_deinitialize_session(self._session)
+            # the copy of a parent session is left untouched in a forked child, its pages stay shared
+            if self._fork_generation == PrivIDFaceLib._fork_generation:
+                self._lib.privid_deinitialize_session(self._session)
             self._session = None
 
-    def _validate(self, image_bytes: bytes, image_width: int, image_height: int, user_config_bytes: bytes = b"") -> \
-    tuple[int, str]:
+    def is_inherited(self) -> bool:
+        """Return True in a forked child process for a session created by the parent process."""
+        return self._fork_generation != PrivIDFaceLib._fork_generation
+
+    def _cells(self) -> ResultCells:
+        """Return the output parameters of this session for the calling thread, allocated on first use."""
+        cells = getattr(self._arena, 'cells', None)
+        if cells is None:
+            cells = self._arena.cells = ResultCells(self._ffibuilder)
+        return cells
+
+    def _image_buffer(self, image_data):
+        """Return an object that can be passed as a ``const uint8_t*`` image argument.
+
+        ``bytes`` are passed as is. Any other object supporting the buffer protocol (numpy arrays,
+        ``bytearray``, ``memoryview`` ...) is passed without copy through ``ffi.from_buffer``.
+        Non C-contiguous numpy arrays are made contiguous first.
+
+        Args:
+            image_data: Image pixels as bytes or a buffer protocol object
+        """
+        if isinstance(image_data, bytes):
+            return image_data
+        if isinstance(image_data, np.ndarray) and not image_data.flags.c_contiguous:
+            image_data = np.ascontiguousarray(image_data)
+        return self._ffibuilder.from_buffer('uint8_t[]', image_data)
+
+    def _invoke(self, function, *args):
+        """Call a native function, timing the call when the instrumentation is enabled.
+
+        Args:
+            function: Native library function
+            *args: Arguments of the native function
+
+        Raises:
+            SessionError: If the session was created by the parent of this forked process
+        """
+        if self._fork_generation != PrivIDFaceLib._fork_generation:
+            raise SessionError("Session created before fork() cannot be used in the child process, "
+                               "create a new session")
+        record = Instrumentation.current() if Instrumentation.enabled else None
+        if record is None:
+            return function(*args)
+        for arg in args:
+            if isinstance(arg, bytes):
+                record.bytes_in += len(arg)
+            elif isinstance(arg, self._ffibuilder.CData) and self._ffibuilder.typeof(arg).kind == 'array':
+                record.bytes_in += self._ffibuilder.sizeof(arg)
+        record._native_start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            record._native_end = time.perf_counter()
+
+    def _take_buffer(self, buffer_ptr, buffer_len) -> bytes:
+        """Copy an output image returned by a native call to `bytes`, then free the native buffer.
+
+        Args:
+            buffer_ptr: `uint8_t **` output parameter holding the image buffer
+            buffer_len: `int *` output parameter holding the image length
+        """
+        data = bytes(self._ffibuilder.buffer(buffer_ptr[0], buffer_len[0]))
+        self._lib.privid_free_buffer(buffer_ptr[0])
+        buffer_ptr[0] = self._ffibuilder.NULL
+        record = Instrumentation.current() if Instrumentation.enabled else None
+        if record is not None:
+            record.bytes_out += len(data)
+        return data
+
+    def _wrap_buffer(self, buffer_ptr, buffer_len) -> Optional[np.ndarray]:
+        """Wrap an output image returned by a native call in a flat uint8 numpy array, without copy.
+
+        The array is backed by the native buffer, which is freed by `privid_free_buffer` once the array
+        and every view of it are garbage collected.
+
+        Args:
+            buffer_ptr: `uint8_t **` output parameter holding the image buffer
+            buffer_len: `int *` output parameter holding the image length
+
+        Returns:
+            The image array, None when the native call returned no buffer
+        """
+        if buffer_ptr[0] == self._ffibuilder.NULL:
+            return None
+        length = buffer_len[0]
+        owner = self._ffibuilder.gc(buffer_ptr[0], self._lib.privid_free_buffer, size=length)
+        buffer_ptr[0] = self._ffibuilder.NULL
+        record = Instrumentation.current() if Instrumentation.enabled else None
+        if record is not None:
+            record.bytes_out += length
+        return np.frombuffer(self._ffibuilder.buffer(owner, length), dtype=np.uint8)
+
+    @staticmethod
+    def _shape_image(array: Optional[np.ndarray], info: Optional[ImageInfo]) -> Optional[np.ndarray]:
+        """Return a (height, width, channels) view of an array from `_wrap_buffer`, with the dtype of the
+        image depth, when `info` describes it; the flat array otherwise."""
+        if array is None or info is None:
+            return array
+        dtype = _DEPTH_DTYPES.get(info.depth)
+        if dtype is None or info.width * info.height * info.channels * np.dtype(dtype).itemsize != array.size:
+            return array
+        return array.view(dtype).reshape(info.height, info.width, info.channels)
+
+    @staticmethod
+    def _with_output_images(result_decoder: ResultDecoder | None) -> ResultDecoder:
+        """Return a decoder returning the result and the `OutputImagesView` of a result buffer."""
+        def decode(buffer) -> Tuple[Any, OutputImagesView]:
+            result = bytes(buffer).decode('utf-8') if result_decoder is None else result_decoder(buffer)
+            return result, _output_images_decoder.decode(buffer)
+        return decode
+
+    def _read_result(self, result_ptr, result_len, result_decoder: ResultDecoder | None = None) -> Any:
+        """Read the JSON result of a native call, then free the native buffer.
+
+        With a `result_decoder` the result is decoded straight from the native buffer
+        (no intermediate `bytes` or `str`), otherwise it is returned as a `str`.
+
+        Args:
+            result_ptr: `char **` output parameter holding the result buffer
+            result_len: `int *` output parameter holding the result length
+            result_decoder: Optional callable decoding the result buffer
+        """
+        record = Instrumentation.current() if Instrumentation.enabled else None
+        if record is not None:
+            record.bytes_out += result_len[0]
+            record._decode_start = time.perf_counter()
+        try:
+            if result_decoder is None:
+                return self._ffibuilder.string(result_ptr[0], result_len[0]).decode('utf-8')
+            return result_decoder(self._ffibuilder.buffer(result_ptr[0], result_len[0]))
+        finally:
+            self._lib.privid_free_char_buffer(result_ptr[0])
+            result_ptr[0] = self._ffibuilder.NULL
+            if record is not None:
+                record._decode_end = time.perf_counter()
+
+    def _validate(self, image_bytes: bytes | np.ndarray, image_width: int, image_height: int,
+                  user_config_bytes: bytes = b"",
+                  cells: ResultCells | None = None,
+                  result_decoder: ResultDecoder | None = None) -> tuple[int, Any]:
         """Internal method to validate a face image
 
         Args:
-            image_bytes: Image data as bytes
+            image_bytes: Image data as bytes or a contiguous uint8 buffer
             image_width: Image width
             image_height: Image height
             user_config_bytes: JSON configuration as UTF-8 encoded bytes
+            cells: Output parameters, those of the session for the calling thread when None
+            result_decoder: Optional callable decoding the result buffer before it is freed,
+                the JSON result is returned as str when None
         """
-        result_ptr = self._ffibuilder.new('char **')
-        result_len = self._ffibuilder.new('int *')
+        if cells is None:
+            cells = self._cells()
+        result_ptr = cells.result_ptr
+        result_len = cells.result_len
 
-        op_id = self._lib.privid_validate(
+        op_id = self._invoke(
+            self._lib.privid_validate,
             self._session,
             user_config_bytes, len(user_config_bytes),
-            image_bytes, image_width, image_height,
+            self._image_buffer(image_bytes), image_width, image_height,
             result_ptr, result_len
         )
 
-        result = self._ffibuilder.string(result_ptr[0], result_len[0]).decode('utf-8')
-        self._lib.privid_free_char_buffer(result_ptr[0])
+        result = self._read_result(result_ptr, result_len, result_decoder)
         return op_id, result
 
     def validate(self, image_input: ImageInputArg, user_config: str = "") -> tuple[int, str]:
@@ -141,35 +449,46 @@ class SessionNative:
         config_bytes = user_config.encode('utf-8')
         return self._validate(image_input.image_data, image_input.width, image_input.height, config_bytes)
 
-    def _face_iso(self, image_bytes: bytes, width: int, height: int, user_config_bytes: bytes = b"") -> tuple[
-        int, str, bytes]:
+    def _face_iso(self, image_bytes: bytes | np.ndarray, width: int, height: int,
+                  user_config_bytes: bytes = b"",
+                  result_decoder: ResultDecoder | None = None,
+                  as_array: bool = False) -> tuple[int, Any, bytes | np.ndarray | None]:
         """Internal method to process face image according to ISO standards
 
         Args:
-            image_bytes: Image data as bytes
+            image_bytes: Image data as bytes or a contiguous uint8 buffer
             width: Image width
             height: Image height
             user_config_bytes: JSON configuration as UTF-8 encoded bytes
+            result_decoder: Optional callable decoding the result buffer before it is freed,
+                the JSON result is returned as str when None
+            as_array: Return the ISO image as a numpy array backed by the native buffer (see `_wrap_buffer`)
+                instead of a copy in bytes
         """
-        result_ptr = self._ffibuilder.new('char **')
-        result_len = self._ffibuilder.new('int *')
-        iso_image_ptr = self._ffibuilder.new('uint8_t **')
-        iso_image_len = self._ffibuilder.new('int *')
-
-        op_id = self._lib.privid_face_iso(
+        cells = self._cells()
+        result_ptr = cells.result_ptr
+        result_len = cells.result_len
+        iso_image_ptr = cells.image_ptr
+        iso_image_len = cells.image_len
+
+        op_id = self._invoke(
+            self._lib.privid_face_iso,
             self._session,
             user_config_bytes, len(user_config_bytes),
-            image_bytes, width, height,
+            self._image_buffer(image_bytes), width, height,
             iso_image_ptr, iso_image_len,
             result_ptr, result_len
         )
 
-        result = self._ffibuilder.string(result_ptr[0], result_len[0]).decode('utf-8')
-        iso_image = self._ffibuilder.buffer(iso_image_ptr[0], iso_image_len[0])
-        iso_bytes = bytes(iso_image)
+        if as_array:
+            iso_array = self._wrap_buffer(iso_image_ptr, iso_image_len)
+            result, images = self._read_result(result_ptr, result_len, self._with_output_images(result_decoder))
+            image = images.iso_image.image if images.iso_image else None
+            return op_id, result, self._shape_image(iso_array, image.info if image else None)
 
-        self._lib.privid_free_char_buffer(result_ptr[0])
-        self._lib.privid_free_buffer(iso_image_ptr[0])
+        iso_bytes = self._take_buffer(iso_image_ptr, iso_image_len)
+
+        result = self._read_result(result_ptr, result_len, result_decoder)
 
         return op_id, result, iso_bytes
 
@@ -178,28 +497,34 @@ class SessionNative:
         config_bytes = user_config.encode('utf-8')
         return self._face_iso(image_input.image_data, image_input.width, image_input.height, config_bytes)
 
-    def _anti_spoofing(self, image_bytes: bytes, width: int, height: int, user_config_bytes: bytes = b"") -> tuple[
-        int, str]:
+    def _anti_spoofing(self, image_bytes: bytes | np.ndarray, width: int, height: int,
+                       user_config_bytes: bytes = b"",
+                       cells: ResultCells | None = None,
+                       result_decoder: ResultDecoder | None = None) -> tuple[int, Any]:
         """Internal method for anti-spoofing detection on a face image
 
         Args:
-            image_bytes: Image data as bytes
+            image_bytes: Image data as bytes or a contiguous uint8 buffer
             width: Image width
             height: Image height
             user_config_bytes: JSON configuration as UTF-8 encoded bytes
+            cells: Output parameters, those of the session for the calling thread when None
+            result_decoder: Optional callable decoding the result buffer before it is freed,
+                the JSON result is returned as str when None
         """
-        result_ptr = self._ffibuilder.new('char **')
-        result_len = self._ffibuilder.new('int *')
-        op_id = self._lib.privid_anti_spoofing(
+        if cells is None:
+            cells = self._cells()
+        result_ptr = cells.result_ptr
+        result_len = cells.result_len
+        op_id = self._invoke(
+            self._lib.privid_anti_spoofing,
             self._session,
             user_config_bytes, len(user_config_bytes),
-            image_bytes, width, height,
+            self._image_buffer(image_bytes), width, height,
             result_ptr, result_len
         )
 
-        result = self._ffibuilder.string(result_ptr[0], result_len[0]).decode('utf-8')
-
-        self._lib.privid_free_char_buffer(result_ptr[0])
+        result = self._read_result(result_ptr, result_len, result_decoder)
 
         return op_id, result
 
@@ -209,32 +534,36 @@ class SessionNative:
         return self._anti_spoofing(image_input.image_data, image_input.width, image_input.height, config_bytes)
 
     def _face_compare_files(self, user_config_bytes: bytes,
-                            image_a: bytes, image_a_width: int, image_a_height: int,
-                            image_b: bytes, image_b_width: int, image_b_height: int) -> tuple[int, str]:
+                            image_a: bytes | np.ndarray, image_a_width: int, image_a_height: int,
+                            image_b: bytes | np.ndarray, image_b_width: int, image_b_height: int,
+                            result_decoder: ResultDecoder | None = None) -> tuple[int, Any]:
         """Internal method to compare two face images
 
         Args:
             user_config_bytes: JSON configuration as UTF-8 encoded bytes
-            image_a: First image data as bytes
+            image_a: First image data as bytes or a contiguous uint8 buffer
             image_a_width: First image width
             image_a_height: First image height
-            image_b: Second image data as bytes
+            image_b: Second image data as bytes or a contiguous uint8 buffer
             image_b_width: Second image width
             image_b_height: Second image height
+            result_decoder: Optional callable decoding the result buffer before it is freed,
+                the JSON result is returned as str when None
         """
-        result_ptr = self._ffibuilder.new('char **')
-        result_len = self._ffibuilder.new('int *')
+        cells = self._cells()
+        result_ptr = cells.result_ptr
+        result_len = cells.result_len
 
-        op_id = self._lib.privid_face_compare_files(
+        op_id = self._invoke(
+            self._lib.privid_face_compare_files,
             self._session,
             user_config_bytes, len(user_config_bytes),
-            image_a, image_a_width, image_a_height,
-            image_b, image_b_width, image_b_height,
+            self._image_buffer(image_a), image_a_width, image_a_height,
+            self._image_buffer(image_b), image_b_width, image_b_height,
             result_ptr, result_len
         )
 
-        result = self._ffibuilder.string(result_ptr[0], result_len[0]).decode('utf-8')
-        self._lib.privid_free_char_buffer(result_ptr[0])
+        result = self._read_result(result_ptr, result_len, result_decoder)
 
         return op_id, result
 
@@ -257,41 +586,52 @@ class SessionNative:
             image_b.image_data, image_b.width, image_b.height
         )
 
-    def _doc_scan_face(self, user_config_bytes: bytes, image: bytes, width: int, height: int) -> tuple[
-        int, str, bytes, bytes]:
+    def _doc_scan_face(self, user_config_bytes: bytes, image: bytes | np.ndarray, width: int, height: int,
+                       result_decoder: ResultDecoder | None = None,
+                       as_array: bool = False) -> tuple[int, Any, bytes | np.ndarray | None, bytes | np.ndarray | None]:
         """Internal method to scan a document for face and extract it
 
         Args:
             user_config_bytes: JSON configuration as UTF-8 encoded bytes
-            image: Image data as bytes
+            image: Image data as bytes or a contiguous uint8 buffer
             width: Image width
             height: Image height
+            result_decoder: Optional callable decoding the result buffer before it is freed,
+                the JSON result is returned as str when None
+            as_array: Return the crops as numpy arrays backed by the native buffers (see `_wrap_buffer`)
+                instead of copies in bytes
         """
-        result_ptr = self._ffibuilder.new('char **')
-        result_len = self._ffibuilder.new('int *')
-        doc_ptr = self._ffibuilder.new('uint8_t **')
-        doc_len = self._ffibuilder.new('int *')
-        face_ptr = self._ffibuilder.new('uint8_t **')
-        face_len = self._ffibuilder.new('int *')
-
-        op_id = self._lib.privid_doc_scan_face(
+        cells = self._cells()
+        result_ptr = cells.result_ptr
+        result_len = cells.result_len
+        doc_ptr = cells.image_ptr
+        doc_len = cells.image_len
+        face_ptr = cells.face_ptr
+        face_len = cells.face_len
+
+        op_id = self._invoke(
+            self._lib.privid_doc_scan_face,
             self._session,
             user_config_bytes, len(user_config_bytes),
-            image, width, height,
+            self._image_buffer(image), width, height,
             doc_ptr, doc_len,
             face_ptr, face_len,
             result_ptr, result_len
         )
 
-        result = self._ffibuilder.string(result_ptr[0], result_len[0]).decode('utf-8')
-        doc = self._ffibuilder.buffer(doc_ptr[0], doc_len[0])
-        doc_bytes = bytes(doc)
-        face = self._ffibuilder.buffer(face_ptr[0], face_len[0])
-        face_bytes = bytes(face)
+        if as_array:
+            doc_array = self._wrap_buffer(doc_ptr, doc_len)
+            face_array = self._wrap_buffer(face_ptr, face_len)
+            result, images = self._read_result(result_ptr, result_len, self._with_output_images(result_decoder))
+            document = images.document.cropped_document_image_info if images.document else None
+            faces = [face.cropped_image_info for face in images.faces or () if face.cropped_image_info]
+            return (op_id, result, self._shape_image(doc_array, document.info if document else None),
+                    self._shape_image(face_array, faces[0].info if faces else None))
 
-        self._lib.privid_free_char_buffer(result_ptr[0])
-        self._lib.privid_free_buffer(doc_ptr[0])
-        self._lib.privid_free_buffer(face_ptr[0])
+        doc_bytes = self._take_buffer(doc_ptr, doc_len)
+        face_bytes = self._take_buffer(face_ptr, face_len)
+
+        result = self._read_result(result_ptr, result_len, result_decoder)
 
         return op_id, result, doc_bytes, face_bytes
 
@@ -300,28 +640,35 @@ class SessionNative:
         config_bytes = user_config.encode('utf-8')
         return self._doc_scan_face(config_bytes, image.image_data, image.width, image.height)
 
-    def _estimate_age(self, image_bytes: bytes, width: int, height: int, user_config_bytes: bytes = b"") -> tuple[
-        int, str]:
+    def _estimate_age(self, image_bytes: bytes | np.ndarray, width: int, height: int,
+                      user_config_bytes: bytes = b"",
+                      cells: ResultCells | None = None,
+                      result_decoder: ResultDecoder | None = None) -> tuple[int, Any]:
         """Internal method to estimate age from a face image
 
         Args:
-            image_bytes: Image data as bytes
+            image_bytes: Image data as bytes or a contiguous uint8 buffer
             width: Image width
             height: Image height
             user_config_bytes: JSON configuration as UTF-8 encoded bytes
+            cells: Output parameters, those of the session for the calling thread when None
+            result_decoder: Optional callable decoding the result buffer before it is freed,
+                the JSON result is returned as str when None
         """
-        result_ptr = self._ffibuilder.new('char **')
-        result_len = self._ffibuilder.new('int *')
+        if cells is None:
+            cells = self._cells()
+        result_ptr = cells.result_ptr
+        result_len = cells.result_len
 
-        op_id = self._lib.privid_estimate_age(
+        op_id = self._invoke(
+            self._lib.privid_estimate_age,
             self._session,
             user_config_bytes, len(user_config_bytes),
-            image_bytes, width, height,
+            self._image_buffer(image_bytes), width, height,
             result_ptr, result_len
         )
 
-        result = self._ffibuilder.string(result_ptr[0], result_len[0]).decode('utf-8')
-        self._lib.privid_free_char_buffer(result_ptr[0])
+        result = self._read_result(result_ptr, result_len, result_decoder)
         return op_id, result
 
     def estimate_age(self, image_input: ImageInputArg, user_config: str = "") -> tuple[int, str]:
@@ -329,30 +676,34 @@ class SessionNative:
         config_bytes = user_config.encode('utf-8')
         return self._estimate_age(image_input.image_data, image_input.width, image_input.height, config_bytes)
 
-    def _enroll_onefa(self, user_config_bytes: bytes, images: bytes,
-                      image_width: int, image_height: int) -> tuple[int, str]:
+    def _enroll_onefa(self, user_config_bytes: bytes, images: bytes | np.ndarray,
+                      image_width: int, image_height: int,
+                      result_decoder: ResultDecoder | None = None) -> tuple[int, Any]:
         """Internal method to enroll one or more face images
 
         Args:
             user_config_bytes: JSON configuration as UTF-8 encoded bytes
-            images: Image data as bytes
+            images: Image data as bytes or a contiguous uint8 buffer
             image_width: Image width
             image_height: Image height
+            result_decoder: Optional callable decoding the result buffer before it is freed,
+                the JSON result is returned as str when None
 
         Note: The new API signature no longer returns best_input image or requires image_count.
         """
-        result_ptr = self._ffibuilder.new('char **')
-        result_len = self._ffibuilder.new('int *')
+        cells = self._cells()
+        result_ptr = cells.result_ptr
+        result_len = cells.result_len
 
-        op_id = self._lib.privid_enroll_onefa(
+        op_id = self._invoke(
+            self._lib.privid_enroll_onefa,
             self._session,
             user_config_bytes, len(user_config_bytes),
-            images, image_width, image_height,
+            self._image_buffer(images), image_width, image_height,
             result_ptr, result_len
         )
 
-        result = self._ffibuilder.string(result_ptr[0], result_len[0]).decode('utf-8')
-        self._lib.privid_free_char_buffer(result_ptr[0])
+        result = self._read_result(result_ptr, result_len, result_decoder)
 
         return op_id, result
 
@@ -369,28 +720,32 @@ class SessionNative:
         config_bytes = user_config.encode('utf-8')
         return self._enroll_onefa(config_bytes, image_input.image_data, image_input.width, image_input.height)
 
-    def _face_predict_onefa(self, user_config_bytes: bytes, images: bytes,
-                            image_width: int, image_height: int) -> tuple[int, str]:
+    def _face_predict_onefa(self, user_config_bytes: bytes, images: bytes | np.ndarray,
+                            image_width: int, image_height: int,
+                            result_decoder: ResultDecoder | None = None) -> tuple[int, Any]:
         """Internal method to predict using enrolled face images
 
         Args:
             user_config_bytes: JSON configuration as UTF-8 encoded bytes
-            images: Image data as bytes
+            images: Image data as bytes or a contiguous uint8 buffer
             image_width: Image width
             image_height: Image height
+            result_decoder: Optional callable decoding the result buffer before it is freed,
+                the JSON result is returned as str when None
         """
-        result_ptr = self._ffibuilder.new('char **')
-        result_len = self._ffibuilder.new('int *')
+        cells = self._cells()
+        result_ptr = cells.result_ptr
+        result_len = cells.result_len
 
-        op_id = self._lib.privid_face_predict_onefa(
+        op_id = self._invoke(
+            self._lib.privid_face_predict_onefa,
             self._session,
             user_config_bytes, len(user_config_bytes),
-            images, image_width, image_height,
+            self._image_buffer(images), image_width, image_height,
             result_ptr, result_len
         )
 
-        result = self._ffibuilder.string(result_ptr[0], result_len[0]).decode('utf-8')
-        self._lib.privid_free_char_buffer(result_ptr[0])
+        result = self._read_result(result_ptr, result_len, result_decoder)
         return op_id, result
 
     def face_predict_onefa(self, user_config: str, image_input: ImageInputArg) -> tuple[int, str]:
@@ -406,24 +761,28 @@ class SessionNative:
         config_bytes = user_config.encode('utf-8')
         return self._face_predict_onefa(config_bytes, image_input.image_data, image_input.width, image_input.height)
 
-    def _user_delete(self, user_config_bytes: bytes, puid_bytes: bytes) -> tuple[int, str]:
+    def _user_delete(self, user_config_bytes: bytes, puid_bytes: bytes,
+                     result_decoder: ResultDecoder | None = None) -> tuple[int, Any]:
         """Internal method to delete a user by PUID
 
         Args:
             user_config_bytes: JSON configuration as UTF-8 encoded bytes
             puid_bytes: PUID as UTF-8 encoded bytes
+            result_decoder: Optional callable decoding the result buffer before it is freed,
+                the JSON result is returned as str when None
         """
-        result_ptr = self._ffibuilder.new('char **')
-        result_len = self._ffibuilder.new('int *')
+        cells = self._cells()
+        result_ptr = cells.result_ptr
+        result_len = cells.result_len
 
-        op_id = self._lib.privid_user_delete(
+        op_id = self._invoke(
+            self._lib.privid_user_delete,
             self._session, user_config_bytes, len(user_config_bytes),
             puid_bytes, len(puid_bytes),
             result_ptr, result_len
         )
 
-        result = self._ffibuilder.string(result_ptr[0], result_len[0]).decode('utf-8')
-        self._lib.privid_free_char_buffer(result_ptr[0])
+        result = self._read_result(result_ptr, result_len, result_decoder)
         return op_id, result
 
     def user_delete(self, user_config: str, puid: str) -> tuple[int, str]:
@@ -459,19 +818,25 @@ class Session:
     try:
         _encoder = msgspec.json.Encoder()
         _result_decoder = msgspec.json.Decoder(CallResult)
+        # Decoders of the result views (see result_views), created on first use
+        _result_decoders = {CallResult: _result_decoder}
     except Exception as e:
         raise SessionError(f"Failed to create msgspec encoder/decoder: {e}")
 
-    def __init__(self, settings: SessionSettings):
+    def __init__(self, settings: SessionSettings, predict_cache: Optional['PredictCache'] = None):
         """Initialize a session with typed settings.
 
         Args:
             settings: SessionSettings struct containing collections, token, etc.
+            predict_cache: Optional cache of the `face_predict_onefa` results, invalidated by the
+                `enroll_onefa` and `user_delete` calls of this session; it can be shared between sessions
 
         Raises:
             SessionError: If session initialization fails
         """
         self._session_native: SessionNative = None
+        self._invalid_handle = False
+        self.predict_cache = predict_cache
 
         # Convert typed settings to JSON bytes for native session using class-level encoder
         settings_bytes = Session._encoder.encode(settings)
@@ -512,10 +877,45 @@ class Session:
         settings = msgspec.convert(settings_dict, SessionSettings)
         return cls(settings)
 
+    def has_valid_handle(self) -> bool:
+        """Check whether the native session handle can still be used.
+
+        Returns:
+            bool: False once the session was closed or an operation returned
+            `API_INVALID_SESSION_HANDLER`, True otherwise
+        """
+        return (self._session_native is not None and bool(self._session_native._session)
+                and not self._invalid_handle and not self._session_native.is_inherited())
+
+    @staticmethod
+    def _result_decoder_for(result_view: type) -> msgspec.json.Decoder:
+        """Return the (cached) decoder of a result type or view."""
+        decoder = Session._result_decoders.get(result_view)
+        if decoder is None:
+            try:
+                decoder = msgspec.json.Decoder(result_view)
+            except Exception as e:
+                raise SessionError(f"Invalid result view {result_view!r}: {e}")
+            Session._result_decoders[result_view] = decoder
+        return decoder
+
+    @staticmethod
+    def _result_decoder_fn(result_view: type = CallResult) -> ResultDecoder:
+        """Return the callable decoding a native result buffer into a result type or view."""
+        return Session._result_decoder_for(result_view).decode
+
+    def _check_result(self, result):
+        """Keep track of invalid session handles reported by an operation result."""
+        if result.call_status.return_status == ReturnStatus.API_INVALID_SESSION_HANDLER:
+            self._invalid_handle = True
+        return result
+
+    @instrumented
     def validate(
             self,
             image: ImageInputArg,
-            config: OperationConfig
+            config: OperationConfigArg,
+            result_view: type = CallResult
     ) -> Tuple[int, CallResult]:
         """Validate a face image with typed configuration.
 
@@ -523,7 +923,8 @@ class Session:
 
         Args:
             image: Input image (path or numpy array wrapped in ImageInputArg)
-            config: Typed operation configuration
+            config: Typed operation configuration, plain or compiled (not modified)
+            result_view: Type to decode the result into, CallResult or a slim view from result_views
 
         Returns:
             Tuple of (operation_id, typed_result)
@@ -531,21 +932,21 @@ class Session:
             - typed_result: CallResult with faces, status, and metadata
 
         """
-        config.input_image_format = image.image_format
-        config_bytes = Session._encoder.encode(config)
-
-        # Call native session
-        op_id, result_json = self._session_native._validate(image.image_data, image.width, image.height, config_bytes)
+        config_bytes = encode_operation_config(Session._encoder, config, image.image_format)
 
-        # Decode result to typed object
-        result = Session._result_decoder.decode(result_json.encode('utf-8'))
+        # Call native session, the result is decoded to a typed object straight from the native buffer
+        op_id, result = self._session_native._validate(image.image_data, image.width, image.height, config_bytes,
+                                                       result_decoder=Session._result_decoder_fn(result_view))
+        self._check_result(result)
 
         return op_id, result
 
+    @instrumented
     def enroll_onefa(
             self,
             image: ImageInputArg,
-            config: OperationConfig
+            config: OperationConfigArg,
+            result_view: type = CallResult
     ) -> Tuple[int, CallResult]:
         """Enroll a face image with typed configuration.
 
@@ -553,7 +954,8 @@ class Session:
 
         Args:
             image: Input face image
-            config: Typed operation configuration
+            config: Typed operation configuration, plain or compiled (not modified)
+            result_view: Type to decode the result into, CallResult or a slim view from result_views
 
         Returns:
             Tuple of (operation_id, typed_result)
@@ -561,25 +963,34 @@ class Session:
             - typed_result: CallResult with enrollment data (PUID, conf_token)
 
         """
-        config.input_image_format = image.image_format
-        config_bytes = Session._encoder.encode(config)
-        op_id, result_json = self._session_native._enroll_onefa(config_bytes, image.image_data, image.width,
-                                                                image.height)
-        result = Session._result_decoder.decode(result_json.encode('utf-8'))
+        config_bytes = encode_operation_config(Session._encoder, config, image.image_format)
+        try:
+            op_id, result = self._session_native._enroll_onefa(config_bytes, image.image_data, image.width,
+                                                               image.height,
+                                                               result_decoder=Session._result_decoder_fn(result_view))
+        finally:
+            if self.predict_cache is not None:
+                self.predict_cache.invalidate(config.collection_name)
+        self._check_result(result)
         return op_id, result
 
+    @instrumented
     def face_predict_onefa(
             self,
             image: ImageInputArg,
-            config: OperationConfig
+            config: OperationConfigArg,
+            result_view: type = CallResult
     ) -> Tuple[int, CallResult]:
         """Predict/authenticate using enrolled face with typed configuration.
 
-        Matches face against enrolled faces in collection. Returns PUID and score.
+        Matches face against enrolled faces in collection. Returns PUID and score. With a
+        `predict_cache`, a prediction already made with the same image, configuration and result
+        view is returned from the cache without calling the native library.
 
         Args:
             image: Input face image to authenticate
-            config: Typed operation configuration
+            config: Typed operation configuration, plain or compiled (not modified)
+            result_view: Type to decode the result into, CallResult or a slim view from result_views
 
         Returns:
             Tuple of (operation_id, typed_result)
@@ -587,18 +998,29 @@ class Session:
             - typed_result: CallResult with prediction data (match, confidence, PUID)
 
         """
-        config.input_image_format = image.image_format
-        config_bytes = Session._encoder.encode(config)
-        op_id, result_json = self._session_native._face_predict_onefa(config_bytes, image.image_data, image.width,
-                                                                      image.height)
-        result = Session._result_decoder.decode(result_json.encode('utf-8'))
+        config_bytes = encode_operation_config(Session._encoder, config, image.image_format)
+        cache = self.predict_cache
+        if cache is not None:
+            key = cache.key(image, config_bytes, config.collection_name, result_view)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+            generation = cache.generation
+        op_id, result = self._session_native._face_predict_onefa(config_bytes, image.image_data, image.width,
+                                                                 image.height,
+                                                                 result_decoder=Session._result_decoder_fn(result_view))
+        self._check_result(result)
+        if cache is not None:
+            cache.put(key, (op_id, result), generation)
         return op_id, result
 
+    @instrumented
     def face_compare_files(
             self,
             image_a: ImageInputArg,
             image_b: ImageInputArg,
-            config: OperationConfig
+            config: OperationConfigArg,
+            result_view: type = CallResult
     ) -> Tuple[int, CallResult]:
         """Compare two face images with typed configuration.
 
@@ -607,7 +1029,8 @@ class Session:
         Args:
             image_a: First face image
             image_b: Second face image
-            config: Typed operation configuration
+            config: Typed operation configuration, plain or compiled (not modified)
+            result_view: Type to decode the result into, CallResult or a slim view from result_views
 
         Returns:
             Tuple of (operation_id, typed_result)
@@ -615,25 +1038,27 @@ class Session:
             - typed_result: CallResult with comparison data (similarity, is_match)
 
         """
-        config.input_image_format = image_a.image_format
-        config_bytes = Session._encoder.encode(config)
-        op_id, result_json = self._session_native._face_compare_files(
+        config_bytes = encode_operation_config(Session._encoder, config, image_a.image_format)
+        op_id, result = self._session_native._face_compare_files(
             config_bytes, image_a.image_data, image_a.width, image_a.height, image_b.image_data, image_b.width,
-            image_b.height
+            image_b.height, result_decoder=Session._result_decoder_fn(result_view)
         )
-        result = Session._result_decoder.decode(result_json.encode('utf-8'))
+        self._check_result(result)
         return op_id, result
 
+    @instrumented
     def estimate_age(
             self,
             image: ImageInputArg,
-            config: OperationConfig
+            config: OperationConfigArg,
+            result_view: type = CallResult
     ) -> Tuple[int, CallResult]:
         """Estimate age from a face image with typed configuration.
 
         Args:
             image: Input face image
-            config: Typed operation configuration
+            config: Typed operation configuration, plain or compiled (not modified)
+            result_view: Type to decode the result into, CallResult or a slim view from result_views
 
         Returns:
             Tuple of (operation_id, typed_result)
@@ -641,48 +1066,58 @@ class Session:
             - typed_result: CallResult with age estimation data
 
         """
-        config.input_image_format = image.image_format
-        config_bytes = Session._encoder.encode(config)
-        op_id, result_json = self._session_native._estimate_age(image.image_data, image.width, image.height,
-                                                                config_bytes)
-        result = Session._result_decoder.decode(result_json.encode('utf-8'))
+        config_bytes = encode_operation_config(Session._encoder, config, image.image_format)
+        op_id, result = self._session_native._estimate_age(image.image_data, image.width, image.height, config_bytes,
+                                                           result_decoder=Session._result_decoder_fn(result_view))
+        self._check_result(result)
         return op_id, result
 
+    @instrumented
     def face_iso(
             self,
             image: ImageInputArg,
-            config: OperationConfig
-    ) -> Tuple[int, CallResult, bytes]:
+            config: OperationConfigArg,
+            result_view: type = CallResult,
+            as_array: bool = False
+    ) -> Tuple[int, CallResult, Union[bytes, np.ndarray, None]]:
         """Process face image according to ISO standards with typed configuration.
 
         Args:
             image: Input face image
-            config: Typed operation configuration
+            config: Typed operation configuration, plain or compiled (not modified)
+            result_view: Type to decode the result into, CallResult or a slim view from result_views
+            as_array: Return the ISO image as a numpy array shaped (height, width, channels) from the
+                result image info and backed by the native buffer, without copy. The buffer is freed when
+                the array and its views are garbage collected; they must not outlive `PrivIDFaceLib.shutdown`.
 
         Returns:
-            Tuple of (operation_id, typed_result, iso_image_bytes)
+            Tuple of (operation_id, typed_result, iso_image)
             - operation_id: Positive on success, negative on error
             - typed_result: CallResult with ISO processing metadata
-            - iso_image_bytes: Raw bytes of ISO-compliant face image
+            - iso_image: Raw bytes of ISO-compliant face image, or its array with `as_array`
+              (None when no image was returned)
 
         """
-        config.input_image_format = image.image_format
-        config_bytes = Session._encoder.encode(config)
-        op_id, result_json, iso_image = self._session_native._face_iso(image.image_data, image.width, image.height,
-                                                                       config_bytes)
-        result = Session._result_decoder.decode(result_json.encode('utf-8'))
+        config_bytes = encode_operation_config(Session._encoder, config, image.image_format)
+        op_id, result, iso_image = self._session_native._face_iso(image.image_data, image.width, image.height,
+                                                                  config_bytes, Session._result_decoder_fn(result_view),
+                                                                  as_array)
+        self._check_result(result)
         return op_id, result, iso_image
 
+    @instrumented
     def anti_spoofing(
             self,
             image: ImageInputArg,
-            config: OperationConfig
+            config: OperationConfigArg,
+            result_view: type = CallResult
     ) -> tuple[int, CallResult]:
         """Perform anti-spoofing detection on a face image with typed configuration.
 
         Args:
             image: Input face image
-            config: Typed operation configuration
+            config: Typed operation configuration, plain or compiled (not modified)
+            result_view: Type to decode the result into, CallResult or a slim view from result_views
 
         Returns:
             Tuple of (operation_id, typed_result)
@@ -690,52 +1125,60 @@ class Session:
             - typed_result: CallResult with age estimation data
 
         """
-        config.input_image_format = image.image_format
-        config_bytes = Session._encoder.encode(config)
+        config_bytes = encode_operation_config(Session._encoder, config, image.image_format)
 
-        op_id, result_json = self._session_native._anti_spoofing(image.image_data, image.width, image.height,
-                                                                 config_bytes)
-        result = Session._result_decoder.decode(result_json.encode('utf-8'))
+        op_id, result = self._session_native._anti_spoofing(image.image_data, image.width, image.height, config_bytes,
+                                                            result_decoder=Session._result_decoder_fn(result_view))
+        self._check_result(result)
         return op_id, result
 
+    @instrumented
     def doc_scan_face(
             self,
             image: ImageInputArg,
-            config: OperationConfig
-    ) -> Tuple[int, CallResult, bytes, bytes]:
+            config: OperationConfigArg,
+            result_view: type = CallResult,
+            as_array: bool = False
+    ) -> Tuple[int, CallResult, Union[bytes, np.ndarray, None], Union[bytes, np.ndarray, None]]:
         """Scan document and extract face with typed configuration.
 
         Args:
             image: Input document image
-            config: Typed operation configuration
+            config: Typed operation configuration, plain or compiled (not modified)
+            result_view: Type to decode the result into, CallResult or a slim view from result_views
+            as_array: Return the crops as numpy arrays backed by the native buffers, without copy
+                (see `face_iso`); the face crop is shaped from the first face with a crop info
 
         Returns:
             Tuple of (operation_id, doc_image, face_image, typed_result)
             - operation_id: Positive on success, negative on error
             - typed_result: CallResult with document and face metadata
-            - doc_image: Cropped document image bytes
-            - face_image: Cropped face from document bytes
+            - doc_image: Cropped document image bytes, or its array with `as_array`
+            - face_image: Cropped face from document bytes, or its array with `as_array`
 
 
         """
-        config.input_image_format = image.image_format
-        config_bytes = Session._encoder.encode(config)
-        op_id, result_json, doc_image, face_image,  = self._session_native._doc_scan_face(
-            config_bytes, image.image_data, image.width, image.height
+        config_bytes = encode_operation_config(Session._encoder, config, image.image_format)
+        op_id, result, doc_image, face_image = self._session_native._doc_scan_face(
+            config_bytes, image.image_data, image.width, image.height,
+            result_decoder=Session._result_decoder_fn(result_view), as_array=as_array
         )
-        result = Session._result_decoder.decode(result_json.encode('utf-8'))
+        self._check_result(result)
         return op_id, result, doc_image, face_image
 
+    @instrumented
     def user_delete(
             self,
             puid: str,
-            config: OperationConfig
+            config: OperationConfigArg,
+            result_view: type = CallResult
     ) -> Tuple[int, CallResult]:
         """Delete a user by PUID with typed configuration.
 
         Args:
             puid: User's unique identifier to delete
-            config: Typed operation configuration
+            config: Typed operation configuration, plain or compiled (not modified)
+            result_view: Type to decode the result into, CallResult or a slim view from result_views
 
         Returns:
             Tuple of (operation_id, typed_result)
@@ -743,13 +1186,155 @@ class Session:
             - typed_result: CallResult with deletion status
 
         """
-        config_bytes = Session._encoder.encode(config)
-        op_id, result_json = self._session_native._user_delete(config_bytes, puid.encode('utf-8'))
-        result = Session._result_decoder.decode(result_json.encode('utf-8'))
+        config_bytes = encode_operation_config(Session._encoder, config)
+        try:
+            op_id, result = self._session_native._user_delete(config_bytes, puid.encode('utf-8'),
+                                                              result_decoder=Session._result_decoder_fn(result_view))
+        finally:
+            if self.predict_cache is not None:
+                self.predict_cache.invalidate(config.collection_name)
+        self._check_result(result)
         return op_id, result
 
-    def __del__(self):
-        """Cleanup when session is destroyed."""
+    def validate_many(
+            self,
+            images: Iterable[Union[ImageInputArg, np.ndarray]],
+            config: OperationConfigArg,
+            image_format: str = 'rgb',
+            pool: Optional['SessionPool'] = None,
+            ordered: bool = True,
+            max_in_flight: Optional[int] = None,
+            result_view: type = CallResult
+    ) -> Iterator[Tuple[int, int, CallResult]]:
+        """Validate many face images with the same configuration.
+
+        See `validate` for the operation itself and `_run_many` for the batch behavior.
+
+        Args:
+            images: Iterable of ImageInputArg or uint8 numpy arrays, consumed lazily
+            config: Typed operation configuration shared by all the images, plain or compiled
+            image_format: Pixel format of the numpy array inputs
+            pool: Optional session pool to spread the work on; this session is used when None
+            ordered: Yield results in input order, otherwise as they complete (pool only)
+            max_in_flight: Maximum number of images submitted to the pool at once (defaults to 2 x pool max size)
+            result_view: Type to decode the results into, CallResult or a slim view from result_views
+
+        Returns:
+            Iterator of (index, operation_id, typed_result) tuples
+
+        Raises:
+            ValueError: If `max_in_flight` is not positive
+        """
+        return self._run_many('_validate', images, config, image_format, pool, ordered, max_in_flight,
+                              result_view)
+
+    def estimate_age_many(
+            self,
+            images: Iterable[Union[ImageInputArg, np.ndarray]],
+            config: OperationConfigArg,
+            image_format: str = 'rgb',
+            pool: Optional['SessionPool'] = None,
+            ordered: bool = True,
+            max_in_flight: Optional[int] = None,
+            result_view: type = CallResult
+    ) -> Iterator[Tuple[int, int, CallResult]]:
+        """Estimate age on many face images with the same configuration.
+
+        Arguments and return value are the same as `validate_many`.
+        """
+        return self._run_many('_estimate_age', images, config, image_format, pool, ordered, max_in_flight,
+                              result_view)
+
+    def anti_spoofing_many(
+            self,
+            images: Iterable[Union[ImageInputArg, np.ndarray]],
+            config: OperationConfigArg,
+            image_format: str = 'rgb',
+            pool: Optional['SessionPool'] = None,
+            ordered: bool = True,
+            max_in_flight: Optional[int] = None,
+            result_view: type = CallResult
+    ) -> Iterator[Tuple[int, int, CallResult]]:
+        """Perform anti-spoofing detection on many face images with the same configuration.
+
+        Arguments and return value are the same as `validate_many`.
+        """
+        return self._run_many('_anti_spoofing', images, config, image_format, pool, ordered, max_in_flight,
+                              result_view)
+
+    def _run_many(self, native_method: str, images, config: OperationConfigArg, image_format: str,
+                  pool: Optional['SessionPool'], ordered: bool,
+                  max_in_flight: Optional[int],
+                  result_view: type = CallResult) -> Iterator[Tuple[int, int, CallResult]]:
+        """Run a single image operation over many images.
+
+        The configuration is encoded once per image format, numpy arrays are wrapped without copy
+        and the native output parameters of each session are reused (see `SessionNative._cells`). Without a pool the
+        images are processed one by one on this session. With a pool they are processed on up to
+        `pool.max_size` sessions in parallel, `max_in_flight` images being submitted at a time.
+
+        Raises:
+            ValueError: If `max_in_flight` is not positive, when called rather than when iterated
+        """
+        if pool is not None:
+            if max_in_flight is None:
+                max_in_flight = 2 * pool.max_size
+            check_max_in_flight(max_in_flight)
+        if not isinstance(config, CompiledOperationConfig):
+            config = CompiledOperationConfig(config)
+        encode_config = config.encode
+
+        def to_image_input(image) -> ImageInputArg:
+            if isinstance(image, ImageInputArg):
+                return image
+            return ImageInputArg(image, image_format, zero_copy=True)
+
+        result_decoder = Session._result_decoder_fn(result_view)
+        # every image is recorded as one operation, e.g. 'validate' for validate_many
+        operation = native_method.lstrip('_')
+
+        def call_native(native_call, image: ImageInputArg, cells: ResultCells) -> Tuple[int, Any]:
+            return native_call(image.image_data, image.width, image.height, encode_config(image.image_format),
+                               cells, result_decoder)
+
+        def call(native_call, image: ImageInputArg, cells: ResultCells) -> Tuple[int, Any]:
+            if Instrumentation.enabled:
+                return Instrumentation.call(operation, call_native, native_call, image, cells)
+            return call_native(native_call, image, cells)
+
+        def run_here() -> Iterator[Tuple[int, int, CallResult]]:
+            cells = self._session_native._cells()
+            native_call = getattr(self._session_native, native_method)
+            for index, image in enumerate(images):
+                op_id, result = call(native_call, to_image_input(image), cells)
+                yield index, op_id, self._check_result(result)
+
+        def run_one(index: int, image: ImageInputArg) -> Tuple[int, int, CallResult]:
+            with pool.session() as session:
+                native = session._session_native
+                op_id, result = call(getattr(native, native_method), image, native._cells())
+                return index, op_id, session._check_result(result)
+
+        def run_pooled() -> Iterator[Tuple[int, int, CallResult]]:
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(max_workers=pool.max_size, thread_name_prefix='cryptonets-batch')
+            try:
+                yield from bounded_results(lambda index, image: executor.submit(run_one, index, to_image_input(image)),
+                                           images, ordered, max_in_flight)
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        return run_here() if pool is None else run_pooled()
+
+    def close(self):
+        """Release the native session handle.
+
+        The session cannot be used anymore after this call.
+        """
         if self._session_native is not None:
             del self._session_native
             self._session_native = None
+
+    def __del__(self):
+        """Cleanup when session is destroyed."""
+        self.close()
@@ -0,0 +1,242 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TYPE_CHECKING
+
+from cryptonets_python_sdk.session import Session, SessionError
+from cryptonets_python_sdk.idl.gen.privateid_types import SessionSettings
+
+if TYPE_CHECKING:
+    from cryptonets_python_sdk.predict_cache import PredictCache
+
+
+class SessionPoolError(SessionError):
+    """Exception for session pool errors"""
+    pass
+
+
+class SessionPoolTimeoutError(SessionPoolError, TimeoutError):
+    """Raised when no session could be acquired before the timeout expired"""
+    pass
+
+
+class SessionPool:
+    """Thread-safe pool of native sessions created from the same settings.
+
+    A native session handle must only be used by one thread at a time. The pool pre-creates
+    `size` sessions, lends them out one caller at a time and creates more on demand up to
+    `max_size`, which bounds the number of concurrent native calls.
+
+    The native calls release the GIL (CFFI drops it around every C call), so sessions leased
+    from the pool by a thread pool run in parallel on several cores.
+
+    Sessions on which an operation returned `API_INVALID_SESSION_HANDLER` (their handle is then
+    invalid) are evicted when returned to the pool. The health check runs when a session is leased:
+    an idle session failing it is evicted then, and another session is leased or created instead.
+
+    Example:
+        >>> pool = SessionPool(settings, size=4)
+        >>> with pool.session(timeout=5.0) as session:
+        ...     op_id, result = session.validate(image, config)
+        >>> op_id, result = pool.run('validate', image, config)
+    """
+
+    def __init__(self, settings: SessionSettings, size: int = 1, max_size: Optional[int] = None,
+                 acquire_timeout: Optional[float] = None,
+                 health_check: Optional[Callable[[Session], bool]] = None,
+                 predict_cache: Optional['PredictCache'] = None):
+        """Create the pool and pre-create `size` sessions.
+
+        Args:
+            settings: Settings used to create every session of the pool
+            size: Number of sessions created upfront
+            max_size: Maximum number of sessions (defaults to `size`)
+            acquire_timeout: Default timeout in seconds for `acquire`, None waits forever
+            health_check: Optional callable returning False for sessions that must be evicted.
+                It is called when a session is leased, in addition to the handle validity check.
+            predict_cache: Optional cache of the prediction results shared by all the sessions of the pool
+
+        Raises:
+            ValueError: If sizes are invalid
+            SessionError: If a session cannot be created
+        """
+        if max_size is None:
+            max_size = max(size, 1)
+        if size < 0 or max_size < 1 or size > max_size:
+            raise ValueError(f"Invalid pool sizes: size={size}, max_size={max_size}")
+        self._settings = settings
+        self._max_size = max_size
+        self._acquire_timeout = acquire_timeout
+        self._health_check = health_check
+        self._predict_cache = predict_cache
+        self._idle: deque[Session] = deque()
+        self._cond = threading.Condition()
+        self._created = 0
+        self._evicted = 0
+        self._closed = False
+        try:
+            for _ in range(size):
+                self._idle.append(self._create_session())
+                self._created += 1
+        except Exception:
+            self.close()
+            raise
+
+    def _create_session(self) -> Session:
+        """Create a new native session from the pool settings."""
+        return Session(self._settings, predict_cache=self._predict_cache)
+
+    def _is_healthy(self, session: Session) -> bool:
+        if not session.has_valid_handle():
+            return False
+        if self._health_check is None:
+            return True
+        try:
+            return bool(self._health_check(session))
+        except Exception:
+            return False
+
+    def _discard(self, session: Session, evicted: bool = True):
+        """Close a session and free its slot (lock must be held)."""
+        self._created -= 1
+        if evicted:
+            self._evicted += 1
+        session.close()
+        self._cond.notify()
+
+    def acquire(self, timeout: Optional[float] = -1) -> Session:
+        """Lease a session from the pool.
+
+        The session must be given back with `release`; prefer the `session()` context manager.
+
+        Args:
+            timeout: Seconds to wait for a free session, None waits forever.
+                Defaults to the pool `acquire_timeout`.
+
+        Returns:
+            Session: A healthy session for the exclusive use of the caller
+
+        Raises:
+            SessionPoolTimeoutError: If no session became available in time
+            SessionPoolError: If the pool is closed
+        """
+        if timeout == -1:
+            timeout = self._acquire_timeout
+        end_time = None if timeout is None else time.monotonic() + timeout
+        while True:
+            session = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise SessionPoolError("Session pool is closed")
+                    if self._idle:
+                        session = self._idle.popleft()
+                        break
+                    if self._created < self._max_size:
+                        # reserve the slot, the session is created outside of the lock
+                        self._created += 1
+                        break
+                    if end_time is None:
+                        self._cond.wait()
+                        continue
+                    remaining = end_time - time.monotonic()
+                    if remaining <= 0:
+                        raise SessionPoolTimeoutError(f"No session available after {timeout} seconds")
+                    self._cond.wait(remaining)
+            if session is None:
+                try:
+                    return self._create_session()
+                except Exception:
+                    with self._cond:
+                        self._created -= 1
+                        self._cond.notify()
+                    raise
+            # the health check may call the native library, run it outside of the lock
+            if self._is_healthy(session):
+                return session
+            with self._cond:
+                self._discard(session)
+
+    def release(self, session: Session, discard: bool = False):
+        """Give a leased session back to the pool.
+
+        Args:
+            session: Session obtained from `acquire`
+            discard: Close the session instead of reusing it
+        """
+        with self._cond:
+            if discard or self._closed or not session.has_valid_handle():
+                self._discard(session, evicted=not self._closed)
+                return
+            self._idle.append(session)
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = -1) -> Iterator[Session]:
+        """Context manager leasing a session for the duration of the block.
+
+        Args:
+            timeout: Seconds to wait for a free session (see `acquire`)
+        """
+        session = self.acquire(timeout)
+        try:
+            yield session
+        finally:
+            self.release(session)
+
+    def run(self, operation: str, *args, timeout: Optional[float] = -1, **kwargs):
+        """Run one `Session` operation on a leased session.
+
+        Args:
+            operation: Name of the `Session` method, e.g. 'validate' or 'face_predict_onefa'
+            *args: Positional arguments of the operation
+            timeout: Seconds to wait for a free session (see `acquire`)
+            **kwargs: Keyword arguments of the operation
+
+        Returns:
+            The return value of the operation
+        """
+        with self.session(timeout) as session:
+            return getattr(session, operation)(*args, **kwargs)
+
+    @property
+    def max_size(self) -> int:
+        """Maximum number of sessions in the pool"""
+        return self._max_size
+
+    @property
+    def size(self) -> int:
+        """Number of sessions currently created (idle or leased)"""
+        with self._cond:
+            return self._created
+
+    @property
+    def idle(self) -> int:
+        """Number of sessions ready to be leased"""
+        with self._cond:
+            return len(self._idle)
+
+    @property
+    def evicted(self) -> int:
+        """Number of sessions evicted since the pool creation"""
+        with self._cond:
+            return self._evicted
+
+    def close(self):
+        """Close all idle sessions; leased sessions are closed when released."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.popleft(), evicted=False)
+            self._cond.notify_all()
+
+    def __enter__(self) -> 'SessionPool':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        if hasattr(self, '_cond'):
+            self.close()
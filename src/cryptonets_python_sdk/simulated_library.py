@@ -0,0 +1,521 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+import msgspec
+from cffi import FFI
+
+from cryptonets_python_sdk.library_loader import LibraryLoadStrategy
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    AgeData,
+    BoxF,
+    CallResult,
+    CallResultHeader,
+    Color,
+    CompareResult,
+    Depth,
+    DocumentData,
+    DocumentResult,
+    DocumentTraits,
+    DocumentOcrAgeData,
+    EnrollData,
+    EnrollResponse,
+    FaceGeometry,
+    FaceId,
+    FaceResult,
+    FaceTraitsFlags,
+    Image,
+    ImageInfo,
+    IsoImageResult,
+    OperationConfig,
+    PointF,
+    PredictData,
+    PredictResponse,
+    PredictUserInformation,
+    ReturnStatus,
+    SessionSettings,
+    SpoofStatus,
+    TrapezeF,
+    UserDeleteResponse,
+)
+
+# Native operations and the operation_type_id reported in their results
+OPERATION_TYPES = {
+    'validate': 1,
+    'estimate_age': 2,
+    'enroll_onefa': 3,
+    'face_predict_onefa': 4,
+    'user_delete': 5,
+    'doc_scan_face': 6,
+    'face_compare_files': 7,
+    'face_iso': 8,
+    'anti_spoofing': 9,
+}
+
+# Stride of the pixels sampled to identify enrolled images
+_DIGEST_STRIDE = 61
+
+_CHANNELS = {'rgb': (3, Color.P_RGB), 'bgr': (3, Color.P_BGR), 'rgba': (4, Color.P_RGBA)}
+
+
+class SimulatedLibraryError(RuntimeError):
+    """Raised by the simulated library where the real one would crash (double free, invalid pointer ...)"""
+    pass
+
+
+class SimulatedLibrary:
+    """Pure Python stand-in for the native library, implementing every function of `api_h.h`.
+
+    Output buffers are allocated with `ffi.new` and tracked by address until they are released with
+    the matching `privid_free_char_buffer` / `privid_free_buffer` call, so leaks and double frees of
+    the Python layer are detected (`outstanding_buffers`, `SimulatedLibraryError`).
+
+    Operations return schema-valid `CallResult` JSON:
+        - validate, anti_spoofing, estimate_age: one face centered in the image
+        - enroll_onefa: enrolls the image in the configured collection, identified by its size and a
+          sample of its pixels
+        - face_predict_onefa: finds images enrolled with the same size and sampled pixels
+        - user_delete: removes the enrollments of a puid
+        - face_compare_files: match when both images have the same pixels
+        - face_iso, doc_scan_face: output images are copies of the input pixels
+
+    Latency is simulated with `time.sleep`, which releases the GIL like the real native calls do.
+    """
+
+    def __init__(self, ffi: FFI, latency: Union[float, Dict[str, float]] = 0.0, latency_jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: ReturnStatus = ReturnStatus.API_GENERIC_ERROR,
+                 init_delay: float = 0.0, model_size: int = 0, seed: Optional[int] = None):
+        self._ffi = ffi
+        self._latency = latency
+        self._latency_jitter = latency_jitter
+        self._error_rate = error_rate
+        self._error_status = ReturnStatus(error_status)
+        self._init_delay = init_delay
+        self._model_size = model_size
+        self._model = b''
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._encoder = msgspec.json.Encoder()
+        self._config_decoder = msgspec.json.Decoder(OperationConfig)
+        self._settings_decoder = msgspec.json.Decoder(SessionSettings)
+        self._version = ffi.new('char[]', b'simulated')
+        self._initialized = False
+        self._log_level = 0
+        self._models_directory = b''
+        self._char_buffers = {}
+        self._buffers = {}
+        self._sessions = {}
+        self._busy_sessions = set()
+        self._operation_id = 0
+        # collection name -> image digest -> (puid, guid)
+        self._enrollments = {}
+        self.calls = {name: 0 for name in OPERATION_TYPES}
+        self.concurrent_session_use = 0
+
+    # ---------------------------------------------------------------- buffers
+
+    @staticmethod
+    def _address(ffi: FFI, ptr) -> int:
+        return int(ffi.cast('uintptr_t', ptr))
+
+    def _new_buffer(self, registry: dict, ctype: str, data: Union[bytes, memoryview]):
+        buffer = self._ffi.new(ctype, len(data) or 1)
+        self._ffi.memmove(buffer, data, len(data))
+        with self._lock:
+            registry[self._address(self._ffi, buffer)] = buffer
+        return buffer
+
+    def _free(self, registry: dict, ptr, function: str):
+        if ptr == self._ffi.NULL:
+            return
+        with self._lock:
+            if registry.pop(self._address(self._ffi, ptr), None) is None:
+                raise SimulatedLibraryError(f"{function}: pointer not allocated by the library or already freed")
+
+    @property
+    def outstanding_buffers(self) -> int:
+        """Number of output buffers returned by the library and not freed yet"""
+        with self._lock:
+            return len(self._char_buffers) + len(self._buffers)
+
+    @property
+    def open_sessions(self) -> int:
+        """Number of initialized and not yet deinitialized sessions"""
+        with self._lock:
+            return len(self._sessions)
+
+    def privid_free_char_buffer(self, buffer):
+        self._free(self._char_buffers, buffer, 'privid_free_char_buffer')
+
+    def privid_free_buffer(self, buffer):
+        self._free(self._buffers, buffer, 'privid_free_buffer')
+
+    # ---------------------------------------------------------------- library
+
+    def privid_get_version(self):
+        return self._version
+
+    def privid_initialize_lib(self, models_directory, models_directory_length, log_level):
+        self._models_directory = self._read(models_directory, models_directory_length)
+        self._log_level = log_level
+        # resident memory standing for the model weights loaded by the real library
+        self._model = b'\x01' * self._model_size
+        if self._init_delay > 0:
+            # the real library loads its models in the background
+            timer = threading.Timer(self._init_delay, self._set_initialized)
+            timer.daemon = True
+            timer.start()
+        else:
+            self._set_initialized()
+
+    def _set_initialized(self):
+        self._initialized = True
+
+    def privid_set_log_level(self, level):
+        self._log_level = level
+        return True
+
+    def privid_get_log_level(self):
+        return self._log_level
+
+    def privid_get_models_cache_directory(self, directory_full_path_out, directory_full_path_out_length):
+        directory_full_path_out[0] = self._new_buffer(self._char_buffers, 'char[]', self._models_directory)
+        directory_full_path_out_length[0] = len(self._models_directory)
+        return True
+
+    def privid_is_library_initialized(self):
+        return self._initialized
+
+    def privid_shutdown_lib(self):
+        self._initialized = False
+        self._model = b''
+
+    # ---------------------------------------------------------------- sessions
+
+    def privid_initialize_session(self, settings_buffer, settings_length, session_ptr_out):
+        try:
+            self._settings_decoder.decode(self._read(settings_buffer, settings_length))
+        except msgspec.MsgspecError:
+            return False
+        handle = self._ffi.new('int *')
+        with self._lock:
+            self._sessions[self._address(self._ffi, handle)] = handle
+        session_ptr_out[0] = handle
+        return True
+
+    def privid_deinitialize_session(self, session_ptr):
+        with self._lock:
+            if self._sessions.pop(self._address(self._ffi, session_ptr), None) is None:
+                raise SimulatedLibraryError("privid_deinitialize_session: invalid or already deinitialized session")
+
+    # ---------------------------------------------------------------- operations
+
+    def privid_validate(self, session_ptr, user_config, user_config_length, image_bytes, image_width, image_height,
+                        result_out, result_out_length):
+        return self._run('validate', session_ptr, user_config, user_config_length, result_out, result_out_length,
+                         lambda config: self._faces_result(config, image_bytes, image_width, image_height))
+
+    def privid_estimate_age(self, session_ptr, user_config, user_config_length, image_bytes, image_width,
+                            image_height, result_out, result_out_length):
+        return self._run('estimate_age', session_ptr, user_config, user_config_length, result_out, result_out_length,
+                         lambda config: self._faces_result(config, image_bytes, image_width, image_height,
+                                                           age=True))
+
+    def privid_anti_spoofing(self, session_ptr, user_config, user_config_length, image_bytes, image_width,
+                             image_height, result_out, result_out_length):
+        return self._run('anti_spoofing', session_ptr, user_config, user_config_length, result_out,
+                         result_out_length,
+                         lambda config: self._faces_result(config, image_bytes, image_width, image_height,
+                                                           spoof_status=SpoofStatus.AS_NO_SPOOF_DETECTED))
+
+    def privid_enroll_onefa(self, session_ptr, user_config, user_config_length, image_bytes, image_width,
+                            image_height, result_out, result_out_length):
+        def operation(config):
+            digest = self._digest(self._image(config, image_bytes, image_width, image_height)[0])
+            with self._lock:
+                collection = self._enrollments.setdefault(self._collection(config), {})
+                puid, guid = collection.setdefault(digest, (f'puid-{digest[:16]}', f'guid-{digest[16:32]}'))
+            return {
+                'faces': [self._face(image_width, image_height)],
+                'enroll': EnrollData(enroll_performed=True, message='Enroll performed',
+                                     api_response=EnrollResponse(status=0, enroll_level=1, guid=guid, puid=puid,
+                                                                 message='Ok', score=1.0)),
+            }
+        return self._run('enroll_onefa', session_ptr, user_config, user_config_length, result_out,
+                         result_out_length, operation)
+
+    def privid_face_predict_onefa(self, session_ptr, user_config, user_config_length, input_image, image_width,
+                                  image_height, result_out, result_out_length):
+        def operation(config):
+            digest = self._digest(self._image(config, input_image, image_width, image_height)[0])
+            with self._lock:
+                ids = self._enrollments.get(self._collection(config), {}).get(digest)
+            if ids is None:
+                response = PredictResponse(status=-1, message='No match found')
+            else:
+                response = PredictResponse(status=0, enroll_level=1, puid=ids[0], guid=ids[1], message='Ok',
+                                           score=1.0,
+                                           PI_list=[PredictUserInformation(guid=ids[1], puid=ids[0], score=1.0)])
+            return {
+                'faces': [self._face(image_width, image_height, ids=ids)],
+                'predict': PredictData(predict_performed=True, message='Predict performed', api_response=response),
+            }
+        return self._run('face_predict_onefa', session_ptr, user_config, user_config_length, result_out,
+                         result_out_length, operation)
+
+    def privid_user_delete(self, session_ptr, user_conf, conf_len, puid, puid_length, operation_result_out,
+                           operation_result_out_len):
+        def operation(config):
+            user = self._read(puid, puid_length).decode('utf-8')
+            with self._lock:
+                collection = self._enrollments.get(self._collection(config), {})
+                deleted = [digest for digest, ids in collection.items() if ids[0] == user]
+                for digest in deleted:
+                    del collection[digest]
+            return {'user_delete': UserDeleteResponse(status=0 if deleted else -1, uuid_count=len(deleted),
+                                                      message='Ok' if deleted else 'User not found')}
+        return self._run('user_delete', session_ptr, user_conf, conf_len, operation_result_out,
+                         operation_result_out_len, operation)
+
+    def privid_doc_scan_face(self, session_ptr, user_config, user_config_length, p_buffer_image_in, image_width,
+                             image_height, cropped_doc_out, cropped_doc_length, cropped_face_out,
+                             cropped_face_length, result_out, result_out_length):
+        cropped_doc_out[0] = self._ffi.NULL
+        cropped_doc_length[0] = 0
+        cropped_face_out[0] = self._ffi.NULL
+        cropped_face_length[0] = 0
+
+        def operation(config):
+            pixels, info = self._image(config, p_buffer_image_in, image_width, image_height)
+            cropped_doc_out[0] = self._new_buffer(self._buffers, 'uint8_t[]', pixels)
+            cropped_doc_length[0] = len(pixels)
+            # top-left quarter of the document as face crop
+            row = image_width * info.channels
+            face_info = msgspec.structs.replace(info, width=image_width // 2, height=image_height // 2)
+            face = b''.join(pixels[y * row:y * row + face_info.width * info.channels]
+                            for y in range(face_info.height))
+            cropped_face_out[0] = self._new_buffer(self._buffers, 'uint8_t[]', face)
+            cropped_face_length[0] = len(face)
+            corners = self._box(image_width, image_height, 0.05)
+            return {
+                'faces': [self._face(image_width, image_height, cropped=Image(info=face_info))],
+                'document': DocumentResult(
+                    detected_document=DocumentData(
+                        document_box=TrapezeF(top_left=corners[0], top_right=PointF(x=corners[1].x, y=corners[0].y),
+                                              bottom_right=corners[1],
+                                              bottom_lef=PointF(x=corners[0].x, y=corners[1].y)),
+                        document_box_center=PointF(x=image_width / 2, y=image_height / 2),
+                        confidence_score=0.99,
+                        document_traits=DocumentTraits.DT_DOC_NO_TRAIT,
+                        mrz_data=[],
+                        ocr_age_data=DocumentOcrAgeData(dob='', age=0)),
+                    cropped_document_image_info=Image(info=info)),
+            }
+        return self._run('doc_scan_face', session_ptr, user_config, user_config_length, result_out,
+                         result_out_length, operation)
+
+    def privid_face_compare_files(self, session_ptr, user_config, user_config_length, p_buffer_files_A, im_width_A,
+                                  im_height_A, p_buffer_files_B, im_width_B, im_height_B, result_out,
+                                  result_out_length):
+        def operation(config):
+            pixels_a = self._image(config, p_buffer_files_A, im_width_A, im_height_A)[0]
+            pixels_b = self._image(config, p_buffer_files_B, im_width_B, im_height_B)[0]
+            same = (im_width_A, im_height_A) == (im_width_B, im_height_B) and pixels_a == pixels_b
+            distance = 0.0 if same else 1.2
+            return {
+                'faces': [self._face(im_width_A, im_height_A), self._face(im_width_B, im_height_B)],
+                'compare': CompareResult(face_detected_a=True, face_detected_b=True,
+                                         similarity_score=1.0 if same else 0.1, is_match=same,
+                                         confidence=0.99, distance_max=distance, distance_mean=distance,
+                                         distance_min=distance, face_thresholds=[0.9, 1.0, 1.1]),
+            }
+        return self._run('face_compare_files', session_ptr, user_config, user_config_length, result_out,
+                         result_out_length, operation)
+
+    def privid_face_iso(self, session_ptr, user_config, user_config_length, image_bytes, image_width, image_height,
+                        output_iso_image_bytes, output_iso_image_bytes_length, result_out, result_out_length):
+        output_iso_image_bytes[0] = self._ffi.NULL
+        output_iso_image_bytes_length[0] = 0
+
+        def operation(config):
+            pixels, info = self._image(config, image_bytes, image_width, image_height)
+            output_iso_image_bytes[0] = self._new_buffer(self._buffers, 'uint8_t[]', pixels)
+            output_iso_image_bytes_length[0] = len(pixels)
+            return {
+                'faces': [self._face(image_width, image_height)],
+                'iso_image': IsoImageResult(success=True, image=Image(info=info)),
+            }
+        return self._run('face_iso', session_ptr, user_config, user_config_length, result_out, result_out_length,
+                         operation)
+
+    # ---------------------------------------------------------------- helpers
+
+    def _read(self, data, length: int) -> bytes:
+        """Read a `const char*` / `const uint8_t*` argument (bytes or CFFI pointer)"""
+        if isinstance(data, bytes):
+            return data[:length]
+        return self._ffi.buffer(data, length)[:]
+
+    def _image(self, config: OperationConfig, image, width: int, height: int) -> Tuple[memoryview, ImageInfo]:
+        """Check an image argument and return a view of its pixels (no copy) and its description"""
+        image_format = config.input_image_format if isinstance(config.input_image_format, str) else 'rgb'
+        channels, color = _CHANNELS.get(image_format.lower(), (None, None))
+        if channels is None:
+            raise _OperationError(ReturnStatus.API_INVALID_CONFIGURATION, f"Invalid image format: {image_format}")
+        size = width * height * channels
+        if width <= 0 or height <= 0 or len(image) < size:
+            raise _OperationError(ReturnStatus.API_INVALID_ARGUMENT, "Invalid image size")
+        pixels = memoryview(image if isinstance(image, bytes) else self._ffi.buffer(image, size))[:size]
+        return pixels, ImageInfo(width=width, height=height, channels=channels, depth=Depth.P_CV_8U, color=color)
+
+    @staticmethod
+    def _digest(pixels: memoryview) -> str:
+        """Identify an image by its size and a sample of its pixels, cheaper than hashing all of them"""
+        digest = hashlib.blake2b(len(pixels).to_bytes(8, 'little'), digest_size=16)
+        digest.update(pixels[::_DIGEST_STRIDE].tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _collection(config: OperationConfig) -> str:
+        return config.collection_name if isinstance(config.collection_name, str) else 'default'
+
+    @staticmethod
+    def _box(width: int, height: int, margin: float) -> Tuple[PointF, PointF]:
+        return (PointF(x=width * margin, y=height * margin),
+                PointF(x=width * (1 - margin), y=height * (1 - margin)))
+
+    @staticmethod
+    def _face(width: int, height: int, spoof_status: SpoofStatus = SpoofStatus.AS_NOT_PERFORMED, age: bool = False,
+              ids: Optional[Tuple[str, str]] = None, cropped: Optional[Image] = None) -> FaceResult:
+        top_left, bottom_right = SimulatedLibrary._box(width, height, 0.25)
+        face = FaceResult(
+            geometry=FaceGeometry(bounding_box=BoxF(top_left=top_left, bottom_right=bottom_right),
+                                  eye_left=PointF(x=width * 0.4, y=height * 0.4),
+                                  eye_right=PointF(x=width * 0.6, y=height * 0.4),
+                                  face_confidence_score=0.99),
+            face_traits_flags=FaceTraitsFlags.FT_FACE_NO_TRAIT,
+            spoof_status=spoof_status,
+        )
+        if age:
+            face.age_data = AgeData(age_confidence_score=0.9, estimated_age=30.0)
+        if ids is not None:
+            face.ids = FaceId(puid=ids[0], guid=ids[1])
+        if cropped is not None:
+            face.cropped_image_info = cropped
+        return face
+
+    def _faces_result(self, config: OperationConfig, image, width: int, height: int, age: bool = False,
+                      spoof_status: SpoofStatus = SpoofStatus.AS_NOT_PERFORMED) -> Dict[str, Any]:
+        self._image(config, image, width, height)
+        return {'faces': [self._face(width, height, spoof_status=spoof_status, age=age)]}
+
+    def _sleep(self, operation: str):
+        latency = self._latency.get(operation, 0.0) if isinstance(self._latency, dict) else self._latency
+        if self._latency_jitter:
+            with self._lock:
+                latency += self._random.uniform(0.0, self._latency_jitter)
+        if latency > 0:
+            time.sleep(latency)
+
+    def _run(self, operation: str, session_ptr, user_config, user_config_length, result_out, result_out_length,
+             build) -> int:
+        """Run a simulated operation and write its `CallResult` JSON to the output parameters."""
+        operation_type_id = OPERATION_TYPES[operation]
+        address = self._address(self._ffi, session_ptr)
+        with self._lock:
+            self.calls[operation] += 1
+            self._operation_id += 1
+            operation_id = self._operation_id
+            valid_session = address in self._sessions
+            if address in self._busy_sessions:
+                # a session handle must not be used by two threads at once
+                self.concurrent_session_use += 1
+            self._busy_sessions.add(address)
+            inject_error = self._error_rate > 0 and self._random.random() < self._error_rate
+        try:
+            self._sleep(operation)
+            if not self._initialized:
+                raise _OperationError(ReturnStatus.API_GENERIC_ERROR, "Library not initialized")
+            if not valid_session:
+                raise _OperationError(ReturnStatus.API_INVALID_SESSION_HANDLER, "Invalid session handle")
+            if inject_error:
+                raise _OperationError(self._error_status, "Simulated error")
+            try:
+                config = self._config_decoder.decode(self._read(user_config, user_config_length) or b'{}')
+            except msgspec.MsgspecError as e:
+                raise _OperationError(ReturnStatus.API_INVALID_CONFIGURATION, f"Invalid configuration: {e}")
+            fields = build(config)
+            header = CallResultHeader(return_status=ReturnStatus.API_NO_ERROR, operation_id=operation_id,
+                                      operation_type_id=operation_type_id, return_message='')
+        except _OperationError as e:
+            fields = {}
+            operation_id = int(e.status)
+            header = CallResultHeader(return_status=e.status, operation_id=operation_id,
+                                      operation_type_id=operation_type_id, return_message=e.message)
+        finally:
+            with self._lock:
+                self._busy_sessions.discard(address)
+        result = self._encoder.encode(CallResult(call_status=header, **fields))
+        result_out[0] = self._new_buffer(self._char_buffers, 'char[]', result)
+        result_out_length[0] = len(result)
+        return operation_id
+
+
+class _OperationError(Exception):
+    def __init__(self, status: ReturnStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class SimulatedLibraryLoadStrategy(LibraryLoadStrategy):
+    """Strategy loading `SimulatedLibrary` instead of the native library.
+
+    Nothing is downloaded and no shared library is loaded, so the Python layer (copies, encoding and
+    decoding, locking, pools ...) can be tested, benchmarked and load tested on any machine.
+
+    Example:
+        >>> strategy = SimulatedLibraryLoadStrategy(latency=0.02, error_rate=0.01, seed=1)
+        >>> PrivIDFaceLib.initialize(strategy)
+        >>> session = Session(settings)
+        >>> strategy.library.outstanding_buffers
+        0
+    """
+
+    def __init__(self, latency: Union[float, Dict[str, float]] = 0.0, latency_jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: ReturnStatus = ReturnStatus.API_GENERIC_ERROR,
+                 init_delay: float = 0.0, model_size: int = 0, seed: Optional[int] = None):
+        """Create the strategy.
+
+        Args:
+            latency: Duration of every operation in seconds, or a dict of durations by operation name
+                (see `OPERATION_TYPES`)
+            latency_jitter: Random duration in seconds added to the latency, between 0 and this value
+            error_rate: Probability for an operation to fail with `error_status`
+            error_status: Status of the injected errors
+            init_delay: Duration of the library initialization in seconds
+            model_size: Bytes of resident memory allocated by the library initialization, like model weights
+            seed: Seed of the latency jitter and error injection random generator
+        """
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError(f"error_rate must be between 0 and 1, got {error_rate}")
+        self._options = dict(latency=latency, latency_jitter=latency_jitter, error_rate=error_rate,
+                             error_status=error_status, init_delay=init_delay, model_size=model_size,
+                             seed=seed)
+        self.library: Optional[SimulatedLibrary] = None
+
+    def load_library(self) -> Tuple[Any, FFI]:
+        """Create the simulated library.
+
+        Returns:
+            Tuple[Any, FFI]: A tuple containing the simulated library and the FFI instance
+        """
+        ffibuilder = FFI()
+        header_path = os.path.join(os.path.dirname(__file__), 'api_h.h')
+        with open(header_path) as f:
+            ffibuilder.cdef(f.read())
+        self.library = SimulatedLibrary(ffibuilder, **self._options)
+        return self.library, ffibuilder
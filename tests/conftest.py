@@ -0,0 +1,23 @@
+"""Fixtures shared by the tests running on the simulated native library."""
+
+import pytest
+
+from cryptonets_python_sdk.library import PrivIDFaceLib
+from cryptonets_python_sdk.simulated_library import SimulatedLibraryLoadStrategy
+from cryptonets_python_sdk.idl.gen.privateid_types import Collection, SessionSettings
+
+SETTINGS = SessionSettings(collections={"default": Collection(named_urls={"base_url": "http://localhost"})},
+                           session_token="token")
+
+
+@pytest.fixture
+def simulated(request):
+    """Initialize the library with a simulated native library, yield its strategy.
+
+    The options of the strategy are given by indirect parametrization, e.g.
+    `@pytest.mark.parametrize("simulated", [{"latency": 0.02}], indirect=True)`.
+    """
+    strategy = SimulatedLibraryLoadStrategy(**getattr(request, "param", {}))
+    PrivIDFaceLib.initialize(strategy)
+    yield strategy
+    PrivIDFaceLib.shutdown()
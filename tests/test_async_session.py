@@ -0,0 +1,134 @@
+"""Unit tests for the AsyncSession class.
+
+Native sessions are replaced by fakes so the executor, timeout,
+cancellation and backpressure logic can be tested without the native library.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from cryptonets_python_sdk.async_session import AsyncSession, AsyncSessionBusyError
+from cryptonets_python_sdk.session_pool import SessionPool
+
+
+class FakeSession:
+    """Stand-in for Session whose operations block until released."""
+
+    gate = None
+
+    def has_valid_handle(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+    def validate(self, image, config, result_view=None):
+        if FakeSession.gate is not None:
+            FakeSession.gate.wait(5.0)
+        return 1, (image, config)
+
+    def user_delete(self, puid, config, result_view=None):
+        return 2, puid
+
+
+class FakeSessionPool(SessionPool):
+    def _create_session(self):
+        return FakeSession()
+
+
+@pytest.fixture(autouse=True)
+def reset_gate():
+    FakeSession.gate = None
+    yield
+    if FakeSession.gate is not None:
+        FakeSession.gate.set()
+    FakeSession.gate = None
+
+
+class TestAsyncSession:
+    """Test awaitable operations."""
+
+    def test_operations_are_awaitable(self):
+        """Test that operations are forwarded to a pooled session."""
+        async def main():
+            async with AsyncSession(pool=FakeSessionPool(None, size=2)) as session:
+                results = await asyncio.gather(*(session.validate(i, 'cfg') for i in range(10)))
+                deleted = await session.user_delete('puid', 'cfg')
+            return results, deleted
+
+        results, deleted = asyncio.run(main())
+        assert [value for _, value in results] == [(i, 'cfg') for i in range(10)]
+        assert deleted == (2, 'puid')
+
+    def test_timeout(self):
+        """Test that a per-call timeout raises TimeoutError."""
+        FakeSession.gate = threading.Event()
+
+        async def main():
+            session = AsyncSession(pool=FakeSessionPool(None, size=1))
+            with pytest.raises(asyncio.TimeoutError):
+                await session.validate('img', 'cfg', timeout=0.05)
+            FakeSession.gate.set()
+            # the slot is released once the native call completes
+            for _ in range(100):
+                if session.pending == 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert session.pending == 0
+            session.close()
+
+        asyncio.run(main())
+
+    def test_cancelled_queued_call_releases_slot(self):
+        """Test that cancelling a queued call frees its queue slot."""
+        FakeSession.gate = threading.Event()
+
+        async def main():
+            session = AsyncSession(pool=FakeSessionPool(None, size=1), max_pending=2)
+            running = asyncio.ensure_future(session.validate('a', 'cfg'))
+            queued = asyncio.ensure_future(session.validate('b', 'cfg'))
+            await asyncio.sleep(0.05)
+            assert session.pending == 2
+            queued.cancel()
+            await asyncio.sleep(0.05)
+            assert session.pending == 1
+            FakeSession.gate.set()
+            assert (await running)[1] == ('a', 'cfg')
+            session.close()
+
+        asyncio.run(main())
+
+    def test_reject_when_full(self):
+        """Test that a full queue rejects calls when configured to."""
+        FakeSession.gate = threading.Event()
+
+        async def main():
+            session = AsyncSession(pool=FakeSessionPool(None, size=1), max_pending=1, reject_when_full=True)
+            running = asyncio.ensure_future(session.validate('a', 'cfg'))
+            await asyncio.sleep(0.05)
+            with pytest.raises(AsyncSessionBusyError):
+                await session.validate('b', 'cfg')
+            FakeSession.gate.set()
+            await running
+            session.close()
+
+        asyncio.run(main())
+
+    def test_backpressure_waits(self):
+        """Test that a full queue makes callers wait instead of failing."""
+        FakeSession.gate = threading.Event()
+
+        async def main():
+            session = AsyncSession(pool=FakeSessionPool(None, size=1), max_pending=1)
+            first = asyncio.ensure_future(session.validate('a', 'cfg'))
+            second = asyncio.ensure_future(session.validate('b', 'cfg'))
+            await asyncio.sleep(0.05)
+            assert not second.done()
+            assert session.pending == 1
+            FakeSession.gate.set()
+            assert [r[1][0] for r in await asyncio.gather(first, second)] == ['a', 'b']
+            session.close()
+
+        asyncio.run(main())
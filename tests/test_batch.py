@@ -0,0 +1,182 @@
+"""Tests of the batch operations (validate_many, estimate_age_many, anti_spoofing_many) on the simulated library.
+
+The native validate call is wrapped to control the duration of each image (its width, in milliseconds), to
+fail on a given image and to track the calls in progress.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from cryptonets_python_sdk.session import Session, SessionNative
+from cryptonets_python_sdk.session_pool import SessionPool
+from cryptonets_python_sdk.idl.gen.privateid_types import OperationConfig
+
+from conftest import SETTINGS
+
+FAIL_WIDTH = 7
+
+
+def _image(milliseconds: int) -> np.ndarray:
+    """Image whose validation lasts `milliseconds` (its width)."""
+    return np.zeros((4, milliseconds, 3), dtype=np.uint8)
+
+
+class NativeCalls:
+    """Wrapper of SessionNative._validate sleeping and failing according to the image width."""
+
+    def __init__(self, validate):
+        self._validate = validate
+        self._lock = threading.Lock()
+        self.started = 0
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, native, image_bytes, width, height, *args):
+        with self._lock:
+            self.started += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            if width == FAIL_WIDTH:
+                raise RuntimeError("native failure")
+            time.sleep(width / 1000)
+            return self._validate(native, image_bytes, width, height, *args)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+class CountingIterator:
+    """Iterator over images counting how many were consumed."""
+
+    def __init__(self, images):
+        self._images = iter(images)
+        self.consumed = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        image = next(self._images)
+        self.consumed += 1
+        return image
+
+
+def _batch_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("cryptonets-batch")]
+
+
+@pytest.fixture
+def native_calls(simulated, monkeypatch):
+    """Wrap the native validate call of the simulated library, return the wrapper."""
+    calls = NativeCalls(SessionNative._validate)
+    monkeypatch.setattr(SessionNative, "_validate", lambda native, *args: calls(native, *args))
+    return calls
+
+
+class TestBatchOperations:
+    """Test ordering, bounding, tagging, errors and early closing of the batch operations."""
+
+    def test_single_session(self, native_calls):
+        """Test that without a pool the images are processed one by one, in order, on the session."""
+        session = Session(SETTINGS)
+        results = list(session.validate_many([_image(3), _image(1), _image(2)], OperationConfig()))
+        assert [index for index, _, _ in results] == [0, 1, 2]
+        assert native_calls.started == 3 and native_calls.max_running == 1
+        assert _batch_threads() == []
+
+    def test_tagging(self, native_calls):
+        """Test that every result is tagged with its input index and its operation id."""
+        session = Session(SETTINGS)
+        with SessionPool(SETTINGS, size=2) as pool:
+            results = list(session.validate_many([_image(1) for _ in range(5)], OperationConfig(), pool=pool))
+        assert [index for index, _, _ in results] == list(range(5))
+        assert len({op_id for _, op_id, _ in results}) == 5
+        assert all(op_id == result.call_status.operation_id for _, op_id, result in results)
+
+    @pytest.mark.parametrize("operation", ["estimate_age_many", "anti_spoofing_many"])
+    def test_other_operations(self, native_calls, operation):
+        """Test the other batch operations on the single-session and pool paths."""
+        session = Session(SETTINGS)
+        images = [_image(1) for _ in range(4)]
+        assert [index for index, _, _ in getattr(session, operation)(images, OperationConfig())] == [0, 1, 2, 3]
+        with SessionPool(SETTINGS, size=2) as pool:
+            results = list(getattr(session, operation)(images, OperationConfig(), pool=pool))
+        assert [index for index, _, _ in results] == [0, 1, 2, 3]
+
+    def test_ordered(self, native_calls):
+        """Test that pooled results are yielded in input order even when a later image completes first."""
+        session = Session(SETTINGS)
+        with SessionPool(SETTINGS, size=2) as pool:
+            results = list(session.validate_many([_image(80), _image(1), _image(1)], OperationConfig(), pool=pool))
+        assert [index for index, _, _ in results] == [0, 1, 2]
+
+    def test_unordered(self, native_calls):
+        """Test that with ordered=False pooled results are yielded as they complete."""
+        session = Session(SETTINGS)
+        with SessionPool(SETTINGS, size=2) as pool:
+            results = list(session.validate_many([_image(150), _image(1), _image(1)], OperationConfig(), pool=pool,
+                                                 ordered=False))
+        # the images completed together are yielded in any order
+        assert results[-1][0] == 0 and sorted(index for index, _, _ in results) == [0, 1, 2]
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_max_in_flight(self, native_calls, ordered):
+        """Test that at most max_in_flight images are consumed ahead of the results, and pool.max_size run."""
+        session = Session(SETTINGS)
+        images = CountingIterator([_image(5) for _ in range(12)])
+        received = 0
+        with SessionPool(SETTINGS, size=2) as pool:
+            for _ in session.validate_many(images, OperationConfig(), pool=pool, ordered=ordered, max_in_flight=3):
+                received += 1
+                assert images.consumed - received < 3
+        assert received == 12
+        assert native_calls.max_running <= 2
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_invalid_max_in_flight(self, native_calls, ordered):
+        """Test that a max_in_flight lower than 1 is rejected when the batch is created."""
+        session = Session(SETTINGS)
+        with SessionPool(SETTINGS, size=2) as pool:
+            for max_in_flight in (0, -1):
+                with pytest.raises(ValueError, match="max_in_flight"):
+                    session.validate_many([_image(1)], OperationConfig(), pool=pool, ordered=ordered,
+                                          max_in_flight=max_in_flight)
+        assert native_calls.started == 0
+
+    def test_error_mid_stream(self, native_calls):
+        """Test that an exception raised for one image propagates once the previous results are yielded."""
+        session = Session(SETTINGS)
+        images = [_image(1), _image(1), _image(FAIL_WIDTH), _image(1), _image(1)]
+        received = []
+        with SessionPool(SETTINGS, size=2) as pool:
+            with pytest.raises(RuntimeError, match="native failure"):
+                for index, _, _ in session.validate_many(images, OperationConfig(), pool=pool, max_in_flight=2):
+                    received.append(index)
+            assert pool.idle == pool.size
+        assert received == [0, 1]
+        assert native_calls.running == 0 and _batch_threads() == []
+
+        received = []
+        with pytest.raises(RuntimeError, match="native failure"):
+            for index, _, _ in session.validate_many(images, OperationConfig()):
+                received.append(index)
+        assert received == [0, 1]
+
+    def test_close_early(self, native_calls):
+        """Test that closing the generator cancels the queued images and waits for the running ones."""
+        session = Session(SETTINGS)
+        images = CountingIterator([_image(20) for _ in range(20)])
+        with SessionPool(SETTINGS, size=2) as pool:
+            results = session.validate_many(images, OperationConfig(), pool=pool, max_in_flight=6)
+            next(results)
+            results.close()
+            assert native_calls.running == 0
+            assert _batch_threads() == []
+            assert pool.idle == pool.size
+            started = native_calls.started
+        assert images.consumed == 6
+        assert started < 6
@@ -0,0 +1,110 @@
+"""Tests of the bulk enrollment engine, on the simulated native library."""
+
+import json
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from cryptonets_python_sdk.bulk_enrollment import (
+    BulkEnrollment,
+    BulkEnrollmentError,
+    load_checkpoint,
+    read_manifest,
+)
+from cryptonets_python_sdk.library import PrivIDFaceLib
+from cryptonets_python_sdk.simulated_library import SimulatedLibraryLoadStrategy
+from cryptonets_python_sdk.idl.gen.privateid_types import OperationConfig
+
+from conftest import SETTINGS
+
+CONFIG = OperationConfig(collection_name="default")
+
+
+def _gallery(directory, count: int, manifest: str = "gallery.csv") -> str:
+    """Write `count` distinct PNG images and their manifest, return the manifest path."""
+    rows = []
+    for index in range(count):
+        name = f"user{index}.png"
+        pixels = np.random.default_rng(index).integers(0, 255, size=(24, 32, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(directory / name)
+        rows.append((name, f"user-{index}"))
+    path = directory / manifest
+    if manifest.endswith(".csv"):
+        path.write_text("path,identifier\n" + "".join(f"{name},{identifier}\n" for name, identifier in rows))
+    else:
+        path.write_text("".join(json.dumps({"path": name, "identifier": identifier}) + "\n"
+                                for name, identifier in rows))
+    return str(path)
+
+
+class TestBulkEnrollment:
+    """Test enrollment, checkpoints and resume."""
+
+    @pytest.mark.parametrize("decode_workers", [0, 2])
+    def test_enroll(self, simulated, tmp_path, decode_workers):
+        """Test that every row is enrolled and recorded with its PUID."""
+        manifest = _gallery(tmp_path, 6)
+        checkpoint = str(tmp_path / "checkpoint.jsonl")
+        reports = []
+        report = BulkEnrollment(SETTINGS, CONFIG, checkpoint, pool_size=2, decode_workers=decode_workers,
+                                progress=reports.append).run(manifest)
+        assert (report.total, report.enrolled, report.failed, report.skipped) == (6, 6, 0, 0)
+        assert reports[-1].enrolled == 6
+        records = load_checkpoint(checkpoint)
+        assert len(records) == 6
+        assert all(record.status == "enrolled" and record.puid for record in records.values())
+        assert simulated.library.calls["enroll_onefa"] == 6
+
+    def test_resume(self, simulated, tmp_path):
+        """Test that a run after a crash skips the recorded rows and ignores a truncated last line."""
+        manifest = _gallery(tmp_path, 8)
+        checkpoint = tmp_path / "checkpoint.jsonl"
+        BulkEnrollment(SETTINGS, CONFIG, str(checkpoint), decode_workers=0).run(manifest)
+        lines = checkpoint.read_bytes().splitlines(keepends=True)
+        checkpoint.write_bytes(b"".join(lines[:3]) + lines[3][:20])
+
+        report = BulkEnrollment(SETTINGS, CONFIG, str(checkpoint), decode_workers=0).run(manifest)
+        assert (report.enrolled, report.skipped) == (5, 3)
+        assert simulated.library.calls["enroll_onefa"] == 13
+        assert all(record.status == "enrolled" for record in load_checkpoint(str(checkpoint)).values())
+
+    @pytest.mark.parametrize("simulated", [{"error_rate": 1.0}], indirect=True)
+    def test_failures(self, simulated, tmp_path):
+        """Test that unreadable images and failed enrollments are recorded, and retried by the next run."""
+        manifest = tmp_path / "gallery.jsonl"
+        _gallery(tmp_path, 2, manifest.name)
+        with open(manifest, "a") as f:
+            f.write('{"path": "missing.png", "identifier": "ghost"}\n')
+        checkpoint = str(tmp_path / "checkpoint.jsonl")
+        report = BulkEnrollment(SETTINGS, CONFIG, checkpoint, decode_workers=0).run(str(manifest))
+        assert (report.enrolled, report.failed) == (0, 3)
+        records = load_checkpoint(checkpoint)
+        assert all(record.status == "failed" and record.error for record in records.values())
+
+        PrivIDFaceLib.shutdown()
+        PrivIDFaceLib.initialize(SimulatedLibraryLoadStrategy())
+        report = BulkEnrollment(SETTINGS, CONFIG, checkpoint, decode_workers=0).run(str(manifest))
+        assert (report.enrolled, report.failed, report.skipped) == (2, 1, 0)
+        report = BulkEnrollment(SETTINGS, CONFIG, checkpoint, decode_workers=0, retry_failed=False).run(str(manifest))
+        assert (report.processed, report.skipped) == (0, 3)
+
+    def test_report(self):
+        """Test the throughput and ETA computation."""
+        from cryptonets_python_sdk.bulk_enrollment import BulkEnrollmentReport
+        report = BulkEnrollmentReport(total=100, enrolled=15, failed=5, skipped=30, elapsed=2.0)
+        assert report.rate == 10.0
+        assert report.eta == 5.0
+        assert BulkEnrollmentReport(None, 1, 0, 0, 1.0).eta is None
+
+    def test_manifest(self, tmp_path):
+        """Test that manifest paths are resolved against its directory and unknown formats are rejected."""
+        manifest = tmp_path / "gallery.csv"
+        manifest.write_text("image,user\na.png,1\n")
+        rows = list(read_manifest(str(manifest), path_column="image", identifier_column="user"))
+        assert rows[0].path == os.path.join(str(tmp_path), "a.png") and rows[0].identifier == "1"
+        with pytest.raises(BulkEnrollmentError):
+            list(read_manifest(str(manifest)))
+        with pytest.raises(BulkEnrollmentError):
+            list(read_manifest(str(tmp_path / "gallery.txt")))
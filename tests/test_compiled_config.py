@@ -0,0 +1,73 @@
+"""Unit tests for CompiledOperationConfig and configuration encoding."""
+
+import msgspec
+import pytest
+
+from cryptonets_python_sdk.compiled_config import CompiledOperationConfig, encode_operation_config
+from cryptonets_python_sdk.idl.gen.privateid_types import OperationConfig
+
+encoder = msgspec.json.Encoder()
+
+
+class TestCompiledOperationConfig:
+    """Test compilation, caching and immutability."""
+
+    def test_encode_sets_image_format(self):
+        """Test that the image format is part of the encoded configuration."""
+        compiled = CompiledOperationConfig(OperationConfig(collection_name="default"))
+        decoded = msgspec.json.decode(compiled.encode("bgr"))
+        assert decoded == {"input_image_format": "bgr", "collection_name": "default"}
+
+    def test_encoding_is_cached(self):
+        """Test that each image format is encoded once."""
+        compiled = CompiledOperationConfig(OperationConfig(neighbors=3), image_formats=["rgb"])
+        assert compiled.encode("rgb") is compiled.encode("rgb")
+        assert compiled.encode("rgba") is not compiled.encode("rgb")
+
+    def test_encode_msgpack(self):
+        """Test that the msgpack encoding is computed once and decodes to the configuration."""
+        compiled = CompiledOperationConfig(OperationConfig(collection_name="default", neighbors=3))
+        assert compiled.encode_msgpack() is compiled.encode_msgpack()
+        assert msgspec.msgpack.decode(compiled.encode_msgpack(), type=OperationConfig) == compiled.config
+
+    def test_encode_without_format_keeps_config_value(self):
+        """Test that no image format keeps the compiled value."""
+        compiled = CompiledOperationConfig(OperationConfig(input_image_format="rgba"))
+        assert msgspec.json.decode(compiled.encode()) == {"input_image_format": "rgba"}
+
+    def test_snapshot_of_config(self):
+        """Test that later changes to the source configuration are ignored."""
+        config = OperationConfig(neighbors=3)
+        compiled = CompiledOperationConfig(config)
+        config.neighbors = 5
+        assert compiled.config.neighbors == 3
+        compiled.config.neighbors = 7
+        assert compiled.config.neighbors == 3
+
+    def test_immutable(self):
+        """Test that attributes cannot be set."""
+        compiled = CompiledOperationConfig(OperationConfig())
+        with pytest.raises(AttributeError):
+            compiled.collection_name = "other"
+
+    def test_rejects_other_types(self):
+        """Test that only OperationConfig can be compiled."""
+        with pytest.raises(TypeError):
+            CompiledOperationConfig({"neighbors": 3})
+
+
+class TestEncodeOperationConfig:
+    """Test encoding of plain and compiled configurations."""
+
+    def test_plain_config_not_mutated(self):
+        """Test that encoding a plain configuration does not change it."""
+        config = OperationConfig(neighbors=3)
+        encoded = encode_operation_config(encoder, config, "rgb")
+        assert msgspec.json.decode(encoded) == {"input_image_format": "rgb", "neighbors": 3}
+        assert config.input_image_format is msgspec.UNSET
+
+    def test_compiled_and_plain_encode_alike(self):
+        """Test that compiled and plain configurations produce the same JSON."""
+        config = OperationConfig(neighbors=3, anti_spoofing_threshold=0.8)
+        compiled = CompiledOperationConfig(config)
+        assert encode_operation_config(encoder, compiled, "rgb") == encode_operation_config(encoder, config, "rgb")
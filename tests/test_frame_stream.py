@@ -0,0 +1,127 @@
+"""Tests of FrameStream, on the simulated native library."""
+
+import time
+
+import numpy as np
+import pytest
+
+from cryptonets_python_sdk.frame_stream import FrameStream
+from cryptonets_python_sdk.result_views import StatusView
+from cryptonets_python_sdk.session import Session
+from cryptonets_python_sdk.idl.gen.privateid_types import OperationConfig, ReturnStatus
+
+from conftest import SETTINGS
+
+
+def _frames(count: int, interval: float = 0.0, shape=(48, 64, 3)):
+    """Frames filled with their index, yielded every `interval` seconds from a reused buffer."""
+    buffer = np.empty(shape, dtype=np.uint8)
+    for index in range(count):
+        if interval:
+            time.sleep(interval)
+        buffer.fill(index)
+        yield buffer
+
+
+@pytest.fixture
+def session(simulated):
+    """Session on the simulated native library."""
+    session = Session(SETTINGS)
+    yield session
+    session.close()
+
+
+@pytest.mark.parametrize("simulated", [{"latency": 0.02}], indirect=True)
+class TestFrameStream:
+    """Test frame dropping, sampling and result tagging."""
+
+    def test_every_frame_of_a_slow_source(self, session):
+        """Test that every frame is processed when the source is slower than the native calls."""
+        stream = FrameStream(session, OperationConfig(), operation="anti_spoofing")
+        results = list(stream.process(_frames(5, interval=0.04)))
+        assert [result.index for result in results] == list(range(5))
+        assert all(result.result.call_status.return_status == ReturnStatus.API_NO_ERROR for result in results)
+        assert all(0 < result.latency < 1 for result in results)
+        assert stream.processed == 5 and stream.dropped == 0 and stream.skipped == 0
+
+    def test_latest_frame_wins(self, session):
+        """Test that stale frames are dropped when the source is faster than the native calls."""
+        stream = FrameStream(session, OperationConfig(), result_view=StatusView)
+        results = list(stream.process(_frames(20, interval=0.002)))
+        indexes = [result.index for result in results]
+        assert indexes == sorted(indexes)
+        assert indexes[-1] == 19
+        assert stream.dropped > 0
+        assert stream.processed + stream.dropped == 20
+
+    def test_frames_copied(self, session):
+        """Test that the frames are copied, the source reusing its buffer does not alter them."""
+        seen = []
+
+        def call(image, config, result_view):
+            seen.append(int(image.image_array[0, 0, 0]))
+            time.sleep(0.01)
+            return 1, None
+
+        stream = FrameStream(session, OperationConfig())
+        stream._call = call
+        results = list(stream.process(_frames(10)))
+        assert seen == [result.index for result in results]
+
+    def test_timestamps(self, session):
+        """Test that the results are tagged with the timestamps yielded by the source."""
+        clock = time.monotonic
+        stamps = []
+
+        def frames():
+            for frame in _frames(3, interval=0.03):
+                stamps.append(clock())
+                yield stamps[-1], frame
+
+        results = list(FrameStream(session, OperationConfig(), clock=clock).process(frames()))
+        assert [result.timestamp for result in results] == stamps
+
+    def test_adaptive_sampling(self, session):
+        """Test that frames are skipped while the latency is above the target, and the interval shrinks below it."""
+        stream = FrameStream(session, OperationConfig(), target_latency=0.005)
+        list(stream.process(_frames(30, interval=0.005)))
+        interval = stream.sample_interval
+        assert interval > 0
+        assert stream.skipped > 0
+        stream._target_latency = 10.0
+        list(stream.process(_frames(10, interval=0.01)))
+        assert stream.sample_interval < interval
+
+    def test_shape_change(self, session):
+        """Test that a frame of another shape fails the stream."""
+        def frames():
+            yield np.zeros((48, 64, 3), dtype=np.uint8)
+            time.sleep(0.05)
+            yield np.zeros((32, 32, 3), dtype=np.uint8)
+
+        with pytest.raises(ValueError, match="shape"):
+            list(FrameStream(session, OperationConfig()).process(frames()))
+
+    def test_stop_closes_source(self, session):
+        """Test that breaking out of the results closes the source generator."""
+        closed = []
+
+        def frames():
+            try:
+                yield from _frames(1000, interval=0.005)
+            finally:
+                closed.append(True)
+
+        for _ in FrameStream(session, OperationConfig()).process(frames()):
+            break
+        deadline = time.monotonic() + 2
+        while not closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert closed
+
+    def test_invalid_arguments(self, session):
+        """Test that unsupported operations and latencies are rejected."""
+        with pytest.raises(ValueError):
+            FrameStream(session, OperationConfig(), operation="face_iso")
+        with pytest.raises(ValueError):
+            FrameStream(session, OperationConfig(), target_latency=0)
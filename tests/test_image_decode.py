@@ -0,0 +1,254 @@
+"""Unit tests for the ImageDecoder class.
+
+Images are generated with Pillow in a temporary directory, the tests
+run with the Pillow backend, and with the optional backends when installed.
+"""
+
+import io
+
+import exifread
+import numpy as np
+import pytest
+from PIL import Image
+
+from cryptonets_python_sdk.img_utils import ImageDecoder, ImageUtils
+from cryptonets_python_sdk.session import ImageInputArg
+
+
+def _gradient(width: int, height: int) -> np.ndarray:
+    x = np.linspace(0, 255, width, dtype=np.uint8)
+    y = np.linspace(0, 255, height, dtype=np.uint8)
+    array = np.zeros((height, width, 3), dtype=np.uint8)
+    array[..., 0] = x[None, :]
+    array[..., 1] = y[:, None]
+    array[..., 2] = 128
+    return array
+
+
+@pytest.fixture
+def jpeg_path(tmp_path):
+    path = tmp_path / "image.jpg"
+    Image.fromarray(_gradient(400, 300)).save(path, quality=95)
+    return str(path)
+
+
+def _save_rotated(tmp_path, orientation: int) -> str:
+    path = tmp_path / f"rotated_{orientation}.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    Image.fromarray(_gradient(400, 300)).save(path, quality=95, exif=exif)
+    return str(path)
+
+
+@pytest.fixture
+def rotated_jpeg_path(tmp_path):
+    return _save_rotated(tmp_path, 6)
+
+
+@pytest.fixture
+def rgba_png_path(tmp_path):
+    path = tmp_path / "image.png"
+    array = np.dstack([_gradient(40, 30), np.full((30, 40), 200, dtype=np.uint8)])
+    Image.fromarray(array, "RGBA").save(path)
+    return str(path)
+
+
+@pytest.fixture(params=ImageDecoder.available_backends())
+def decoder(request):
+    return ImageDecoder(request.param)
+
+
+class TestImageDecoder:
+    """Test decoding image files."""
+
+    def test_full_size(self, decoder, jpeg_path):
+        """Test that images are decoded at full size by default."""
+        array, pixel_format = decoder.decode(jpeg_path, "rgb")
+        assert array.shape == (300, 400, 3)
+        assert array.dtype == np.uint8
+        assert pixel_format == "rgb"
+        # JPEG is lossy, compare with a tolerance
+        assert np.abs(array.astype(int) - _gradient(400, 300)).mean() < 4
+
+    def test_max_side(self, decoder, jpeg_path):
+        """Test that the longest side is reduced to max_side."""
+        array, _ = decoder.decode(jpeg_path, "rgb", max_side=100)
+        assert array.shape == (75, 100, 3)
+        assert abs(int(array[40, 99, 0]) - 255) < 16
+
+    def test_max_side_larger_than_image(self, decoder, jpeg_path):
+        """Test that images are never upscaled."""
+        array, _ = decoder.decode(jpeg_path, "rgb", max_side=1000)
+        assert array.shape == (300, 400, 3)
+
+    def test_bgr(self, decoder, jpeg_path):
+        """Test that bgr output reverses the channels."""
+        rgb, _ = decoder.decode(jpeg_path, "rgb")
+        bgr, pixel_format = decoder.decode(jpeg_path, "bgr")
+        assert pixel_format == "bgr"
+        assert np.array_equal(rgb, bgr[..., ::-1])
+
+    def test_exif_rotation(self, decoder, rotated_jpeg_path):
+        """Test that the EXIF orientation is applied."""
+        array, _ = decoder.decode(rotated_jpeg_path, "rgb")
+        assert array.shape == (400, 300, 3)
+        array, _ = decoder.decode(rotated_jpeg_path, "rgb", apply_rotation=False)
+        assert array.shape == (300, 400, 3)
+
+    def test_out_buffer(self, decoder, jpeg_path):
+        """Test that the pixels are written to a preallocated buffer."""
+        out = np.zeros(1000 * 1000 * 3, dtype=np.uint8)
+        array, _ = decoder.decode(jpeg_path, "rgb", max_side=200, out=out)
+        assert array.shape == (150, 200, 3)
+        assert np.shares_memory(array, out)
+        assert np.array_equal(array, decoder.decode(jpeg_path, "rgb", max_side=200)[0])
+
+    @pytest.mark.parametrize("pixel_format", ["bgr", "rgba"])
+    def test_out_buffer_formats(self, decoder, jpeg_path, pixel_format):
+        """Test that the pixels written to the buffer match a decode without buffer."""
+        out = np.zeros(1000 * 1000 * 4, dtype=np.uint8)
+        array, _ = decoder.decode(jpeg_path, pixel_format, out=out)
+        assert array.flags.c_contiguous and np.shares_memory(array, out)
+        assert np.array_equal(array, decoder.decode(jpeg_path, pixel_format)[0])
+
+    def test_out_buffer_rotated(self, decoder, rotated_jpeg_path):
+        """Test that rotated images are written to the buffer in their final orientation."""
+        out = np.zeros(1000 * 1000 * 3, dtype=np.uint8)
+        array, _ = decoder.decode(rotated_jpeg_path, "rgb", out=out)
+        assert array.shape == (400, 300, 3) and array.flags.c_contiguous and np.shares_memory(array, out)
+        assert np.array_equal(array, decoder.decode(rotated_jpeg_path, "rgb")[0])
+
+    def test_out_buffer_too_small(self, decoder, jpeg_path):
+        """Test that a too small buffer is rejected."""
+        with pytest.raises(ValueError):
+            decoder.decode(jpeg_path, "rgb", out=np.zeros(10, dtype=np.uint8))
+
+    def test_convert_rgba_to_rgb(self, decoder, rgba_png_path):
+        """Test that the requested pixel format is applied."""
+        array, pixel_format = decoder.decode(rgba_png_path, "rgb")
+        assert array.shape == (30, 40, 3)
+        assert pixel_format == "rgb"
+
+    def test_file_format_kept(self, rgba_png_path):
+        """Test that an empty format keeps the file pixel format."""
+        array, pixel_format = ImageDecoder("pil").decode(rgba_png_path)
+        assert array.shape == (30, 40, 4)
+        assert pixel_format == "rgba"
+
+    def test_missing_file(self, tmp_path):
+        """Test that a missing file raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            ImageDecoder().decode(str(tmp_path / "missing.jpg"), "rgb")
+
+    def test_invalid_backend(self):
+        """Test that unknown backends are rejected."""
+        with pytest.raises(ValueError):
+            ImageDecoder("magick")
+
+
+class TestExifOrientation:
+    """Test reading and applying the EXIF orientation."""
+
+    @pytest.mark.parametrize("orientation,k", [(1, 0), (3, 2), (6, 3), (8, 1)])
+    def test_orientation_applied(self, tmp_path, orientation, k):
+        """Test that each orientation is applied with the matching rotation."""
+        path = _save_rotated(tmp_path, orientation)
+        plain, _ = ImageDecoder("pil").decode(path, "rgb", apply_rotation=False)
+        array, _ = ImageDecoder("pil").decode(path, "rgb")
+        assert np.array_equal(array, np.rot90(plain, k))
+
+    def test_rotation_is_a_view(self):
+        """Test that the rotation does not copy the pixels."""
+        array = _gradient(40, 30)
+        rotated = ImageUtils._rotate_array(array, 6)
+        assert rotated.shape == (40, 30, 3)
+        assert np.shares_memory(rotated, array)
+
+    def test_read_from_open_image(self, rotated_jpeg_path, monkeypatch):
+        """Test that the file is not parsed again by exifread."""
+        def process_file(*args, **kwargs):
+            raise AssertionError("exifread should not be used")
+
+        monkeypatch.setattr(exifread, "process_file", process_file)
+        with Image.open(rotated_jpeg_path) as image:
+            assert ImageUtils._get_exif_orientation(image, rotated_jpeg_path) == 6
+
+    def test_bounded_exifread_fallback(self, rotated_jpeg_path, monkeypatch):
+        """Test that exifread stops at the orientation tag when Pillow cannot parse the EXIF block."""
+        calls = []
+        process_file = exifread.process_file
+
+        def recording_process_file(f, **kwargs):
+            calls.append(kwargs)
+            return process_file(f, **kwargs)
+
+        def getexif(self):
+            raise SyntaxError("malformed EXIF")
+
+        monkeypatch.setattr(exifread, "process_file", recording_process_file)
+        monkeypatch.setattr(Image.Image, "getexif", getexif)
+        with Image.open(rotated_jpeg_path) as image:
+            assert ImageUtils._get_exif_orientation(image, rotated_jpeg_path) == 6
+        assert calls == [{"stop_tag": "Orientation", "details": False}]
+
+
+class TestImageInputArgFromFile:
+    """Test ImageInputArg construction from image files."""
+
+    def test_max_side(self, jpeg_path):
+        """Test that max_side is forwarded to the decoder."""
+        image = ImageInputArg(jpeg_path, "rgb", max_side=200)
+        assert (image.width, image.height) == (200, 150)
+        assert len(image.image_data) == 200 * 150 * 3
+
+    def test_image_path_to_numpy_array(self, jpeg_path):
+        """Test the ImageUtils entry point."""
+        array, pixel_format = ImageUtils.image_path_to_numpy_array(jpeg_path, "bgr", max_side=80)
+        assert array.shape == (60, 80, 3)
+        assert pixel_format == "bgr"
+
+
+class TestImageInputArgFromMemory:
+    """Test ImageInputArg construction from encoded images held in memory."""
+
+    def test_from_bytes(self, jpeg_path):
+        """Test that bytes decode like the file they were read from."""
+        with open(jpeg_path, "rb") as f:
+            data = f.read()
+        image = ImageInputArg.from_bytes(data, "rgb")
+        assert (image.width, image.height) == (400, 300)
+        assert image.image_data == ImageInputArg(jpeg_path, "rgb").image_data
+
+    def test_from_stream(self, rotated_jpeg_path):
+        """Test that streams are decoded with the EXIF orientation."""
+        with open(rotated_jpeg_path, "rb") as f:
+            image = ImageInputArg.from_stream(f, "bgr", max_side=200, zero_copy=True)
+        assert (image.width, image.height) == (150, 200)
+        assert image.image_format == "bgr"
+        assert isinstance(image.image_data, np.ndarray)
+
+    def test_from_memoryview(self, jpeg_path):
+        """Test that buffer protocol objects are accepted."""
+        with open(jpeg_path, "rb") as f:
+            data = bytearray(f.read())
+        image = ImageInputArg.from_memoryview(memoryview(data), "rgba")
+        assert image.image_array.shape == (300, 400, 4)
+
+    def test_from_memory_all_backends(self, decoder, jpeg_path):
+        """Test that every backend decodes in-memory buffers."""
+        with open(jpeg_path, "rb") as f:
+            data = f.read()
+        from_file, _ = decoder.decode(jpeg_path, "rgb", max_side=100)
+        for source in (data, memoryview(data), io.BytesIO(data)):
+            array, _ = decoder.decode(source, "rgb", max_side=100)
+            assert np.array_equal(array, from_file)
+
+    def test_invalid_data(self):
+        """Test that data which is not an image is rejected."""
+        with pytest.raises(OSError):
+            ImageInputArg.from_bytes(b"not an image", "rgb")
+
+    def test_invalid_format(self):
+        """Test that the pixel format is checked before decoding."""
+        with pytest.raises(ValueError):
+            ImageInputArg.from_bytes(b"", "yuv")
@@ -0,0 +1,95 @@
+"""Unit tests for the ImageInputArg class.
+
+This module tests how image inputs are validated and how their pixel
+buffers are prepared for the native library calls.
+"""
+
+import numpy as np
+import pytest
+from cffi import FFI
+
+from cryptonets_python_sdk.session import ImageInputArg, SessionNative
+
+
+def _native_without_session() -> SessionNative:
+    """Build a SessionNative shell that only carries an FFI instance."""
+    native = SessionNative.__new__(SessionNative)
+    native._session = None
+    native._ffibuilder = FFI()
+    return native
+
+
+class TestImageInputArgFromArray:
+    """Test ImageInputArg construction from numpy arrays."""
+
+    def test_default_copies_to_bytes(self):
+        """Test that the default mode copies pixels into a bytes object."""
+        array = np.zeros((4, 6, 3), dtype=np.uint8)
+        image = ImageInputArg(array, "rgb")
+        assert isinstance(image.image_data, bytes)
+        assert len(image.image_data) == array.nbytes
+        assert image.width == 6
+        assert image.height == 4
+
+    def test_zero_copy_shares_memory(self):
+        """Test that zero-copy mode keeps the caller's contiguous array."""
+        array = np.zeros((4, 6, 3), dtype=np.uint8)
+        image = ImageInputArg(array, "rgb", zero_copy=True)
+        assert image.image_data is array
+
+    def test_zero_copy_non_contiguous_view(self):
+        """Test that non-contiguous views are made contiguous once."""
+        array = np.arange(8 * 6 * 3, dtype=np.uint8).reshape((8, 6, 3))
+        view = array[::2]
+        image = ImageInputArg(view, "bgr", zero_copy=True)
+        assert image.image_data.flags.c_contiguous
+        assert not np.shares_memory(image.image_data, array)
+        assert np.array_equal(image.image_data, view)
+        assert image.height == 4
+
+    def test_empty_format_rejected(self):
+        """Test that an empty image format is rejected for arrays."""
+        with pytest.raises(ValueError):
+            ImageInputArg(np.zeros((4, 6, 3), dtype=np.uint8), "")
+
+    def test_invalid_dtype_rejected(self):
+        """Test that non uint8 arrays are rejected."""
+        with pytest.raises(ValueError):
+            ImageInputArg(np.zeros((4, 6, 3), dtype=np.float32), "rgb")
+
+    def test_invalid_input_type_rejected(self):
+        """Test that unsupported input types are rejected."""
+        with pytest.raises(ValueError):
+            ImageInputArg(12, "rgb")
+
+
+class TestSessionNativeImageBuffer:
+    """Test SessionNative._image_buffer conversions."""
+
+    def test_bytes_passed_through(self):
+        """Test that bytes are passed to CFFI as is."""
+        native = _native_without_session()
+        data = b"\x00\x01\x02"
+        assert native._image_buffer(data) is data
+
+    def test_array_not_copied(self):
+        """Test that a contiguous array is exposed without copy."""
+        native = _native_without_session()
+        array = np.zeros((2, 2, 3), dtype=np.uint8)
+        pointer = native._image_buffer(array)
+        array[0, 0, 0] = 42
+        assert pointer[0] == 42
+        assert len(pointer) == array.nbytes
+
+    def test_non_contiguous_array_made_contiguous(self):
+        """Test that a non-contiguous view is converted before being exposed."""
+        native = _native_without_session()
+        array = np.arange(4 * 2 * 3, dtype=np.uint8).reshape((4, 2, 3))
+        pointer = native._image_buffer(array[::2])
+        assert bytes(native._ffibuilder.buffer(pointer)) == array[::2].tobytes()
+
+    def test_memoryview_supported(self):
+        """Test that other buffer protocol objects are accepted."""
+        native = _native_without_session()
+        pointer = native._image_buffer(memoryview(bytearray(b"\x07\x08")))
+        assert pointer[1] == 8
@@ -0,0 +1,41 @@
+"""Tests of the modules imported by `import cryptonets_python_sdk.session`, measured with `python -X importtime`."""
+
+import subprocess
+import sys
+
+# modules only needed to download the native files, to decode encoded images or by the pooled batch operations
+LAZY_MODULES = ("boto3", "botocore", "yaml", "PIL", "exifread", "subprocess", "importlib.metadata",
+                "concurrent.futures", "hashlib", "tempfile")
+
+# import time budget of the SDK modules, numpy, msgspec and cffi excluded: about 80 ms on a developer laptop,
+# 170 ms when the modules above were imported eagerly
+IMPORT_BUDGET_SECONDS = 0.15
+
+
+def _import_times(module: str) -> dict:
+    """Import `module` in a fresh interpreter and return the cumulative import time of every module, in seconds."""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+class TestImportTime:
+    """Test the startup cost of the session module."""
+
+    def test_lazy_modules(self):
+        """Test that the heavy optional modules are not imported with the session module."""
+        times = _import_times("cryptonets_python_sdk.session")
+        assert "cryptonets_python_sdk.session" in times
+        assert [name for name in LAZY_MODULES if name in times] == []
+
+    def test_budget(self):
+        """Test the import time of the SDK modules, excluding their third-party dependencies."""
+        times = _import_times("cryptonets_python_sdk.session")
+        own = times["cryptonets_python_sdk.session"] - sum(times.get(name, 0.0) for name in ("numpy", "msgspec", "cffi"))
+        assert own < IMPORT_BUDGET_SECONDS
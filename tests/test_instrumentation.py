@@ -0,0 +1,203 @@
+"""Tests of the per-operation instrumentation, on the simulated native library."""
+
+import warnings
+
+import numpy as np
+import pytest
+
+from cryptonets_python_sdk.instrumentation import (
+    PHASES,
+    Instrumentation,
+    MetricsRegistry,
+    OpenTelemetryExporter,
+    OperationRecord,
+)
+from cryptonets_python_sdk.session import ImageInputArg, Session
+from cryptonets_python_sdk.session_pool import SessionPool
+from cryptonets_python_sdk.idl.gen.privateid_types import OperationConfig, ReturnStatus
+
+from conftest import SETTINGS
+
+
+def _image(width: int = 64, height: int = 48) -> ImageInputArg:
+    return ImageInputArg(np.zeros((height, width, 3), dtype=np.uint8), "rgb", zero_copy=True)
+
+
+@pytest.fixture
+def records(simulated):
+    """Collect the operation records of the simulated library."""
+    collected = []
+    Instrumentation.add_listener(collected.append)
+    yield collected
+    Instrumentation.clear()
+
+
+class TestInstrumentation:
+    """Test the records produced by Session operations."""
+
+    def test_disabled_by_default(self):
+        """Test that nothing is recorded without listeners."""
+        assert not Instrumentation.enabled
+
+    @pytest.mark.parametrize("simulated", [{"latency": 0.002}], indirect=True)
+    def test_record(self, records):
+        """Test that an operation records its phases, sizes and status."""
+        session = Session(SETTINGS)
+        op_id, result = session.validate(_image(), OperationConfig())
+
+        assert len(records) == 1
+        record = records[0]
+        assert record.operation == "validate"
+        assert record.op_id == op_id
+        assert record.return_status == ReturnStatus.API_NO_ERROR
+        assert record.operation_type_id == result.call_status.operation_type_id
+        assert record.native >= 0.002
+        assert record.total >= record.encode + record.native + record.copy + record.decode
+        assert all(getattr(record, phase) >= 0 for phase in PHASES)
+        assert record.bytes_in > 64 * 48 * 3
+        assert record.bytes_out > 0
+        assert Instrumentation.current() is None
+
+    def test_output_images_counted(self, records):
+        """Test that output images are counted in the returned bytes."""
+        session = Session(SETTINGS)
+        _, _, iso_image = session.face_iso(_image(), OperationConfig())
+        assert records[0].operation == "face_iso"
+        assert records[0].bytes_out > len(iso_image)
+
+    def test_error_status(self, records):
+        """Test that error results are recorded with their status."""
+        session = Session(SETTINGS)
+        image = _image()
+        image.width *= 2
+        session.validate(image, OperationConfig())
+        assert records[0].return_status == ReturnStatus.API_INVALID_ARGUMENT
+        assert records[0].status_label == "API_INVALID_ARGUMENT"
+
+    def test_exception_recorded(self, records):
+        """Test that operations raising an exception are recorded with the exception name."""
+        session = Session(SETTINGS)
+        with pytest.raises(AttributeError):
+            session.validate(None, OperationConfig())
+        assert records[0].error == "AttributeError"
+        assert records[0].status_label == "AttributeError"
+
+    @pytest.mark.parametrize("simulated", [{"latency": 0.002}], indirect=True)
+    def test_batch_records_every_image(self, records):
+        """Test that batch operations record one operation per image, with or without a pool."""
+        session = Session(SETTINGS)
+        images = [_image().image_array for _ in range(3)]
+        list(session.validate_many(images, OperationConfig()))
+        with SessionPool(SETTINGS, size=2) as pool:
+            list(session.estimate_age_many(images, OperationConfig(), pool=pool))
+        assert [record.operation for record in records] == ["validate"] * 3 + ["estimate_age"] * 3
+        assert all(record.native > 0 for record in records)
+
+    def test_failing_listener(self, records):
+        """Test that a failing listener does not fail the operation."""
+        def failing(record):
+            raise RuntimeError("listener bug")
+
+        Instrumentation.add_listener(failing)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            op_id, _ = Session(SETTINGS).validate(_image(), OperationConfig())
+        assert op_id > 0
+        assert len(records) == 1
+        assert issubclass(caught[0].category, RuntimeWarning)
+
+    def test_remove_listener(self, records):
+        """Test that removing the last listener disables the instrumentation."""
+        Instrumentation.remove_listener(records.append)
+        assert not Instrumentation.enabled
+        Session(SETTINGS).validate(_image(), OperationConfig())
+        assert records == []
+
+
+def _record(operation: str, total: float, status=ReturnStatus.API_NO_ERROR) -> OperationRecord:
+    record = OperationRecord(operation)
+    record.total = record.native = total
+    record.return_status = status
+    record.bytes_in = 100
+    record.bytes_out = 10
+    return record
+
+
+class TestMetricsRegistry:
+    """Test the aggregation and the Prometheus rendering."""
+
+    def test_snapshot(self):
+        """Test that records are aggregated per operation, phase and status."""
+        registry = MetricsRegistry(buckets=(0.01, 0.1))
+        registry(_record("validate", 0.005))
+        registry(_record("validate", 0.05))
+        registry(_record("validate", 1.0, ReturnStatus.API_NETWORK_ERROR))
+
+        snapshot = registry.snapshot()
+        assert snapshot["durations"]["validate"]["total"]["buckets"] == [1, 1, 1]
+        assert snapshot["durations"]["validate"]["total"]["count"] == 3
+        assert snapshot["durations"]["validate"]["total"]["sum"] == pytest.approx(1.055)
+        assert snapshot["calls"]["validate"] == {"API_NO_ERROR": 2, "API_NETWORK_ERROR": 1}
+        assert snapshot["bytes"]["validate"] == {"in": 300, "out": 30}
+
+        registry.reset()
+        assert registry.snapshot()["calls"] == {}
+
+    def test_prometheus_text(self):
+        """Test the Prometheus text format of the histograms and counters."""
+        registry = MetricsRegistry(buckets=(0.01, 0.1))
+        registry(_record("face_predict_onefa", 0.005))
+        registry(_record("face_predict_onefa", 0.05))
+
+        lines = registry.prometheus_text().splitlines()
+        assert "# TYPE cryptonets_operation_duration_seconds histogram" in lines
+        labels = 'operation="face_predict_onefa",phase="native"'
+        assert f'cryptonets_operation_duration_seconds_bucket{{{labels},le="0.01"}} 1' in lines
+        assert f'cryptonets_operation_duration_seconds_bucket{{{labels},le="0.1"}} 2' in lines
+        assert f'cryptonets_operation_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+        assert f'cryptonets_operation_duration_seconds_count{{{labels}}} 2' in lines
+        assert 'cryptonets_operations_total{operation="face_predict_onefa",status="API_NO_ERROR"} 2' in lines
+        assert 'cryptonets_operation_bytes_total{operation="face_predict_onefa",direction="in"} 200' in lines
+
+    def test_invalid_buckets(self):
+        """Test that unsorted buckets are rejected."""
+        with pytest.raises(ValueError):
+            MetricsRegistry(buckets=(0.1, 0.01))
+
+
+class FakeInstrument:
+    def __init__(self):
+        self.values = []
+
+    def record(self, value, attributes):
+        self.values.append((value, attributes))
+
+    add = record
+
+
+class FakeMeter:
+    def __init__(self):
+        self.instruments = {}
+
+    def _create(self, name, unit, description):
+        self.instruments[name] = FakeInstrument()
+        return self.instruments[name]
+
+    create_histogram = create_counter = _create
+
+
+class TestOpenTelemetryExporter:
+    """Test the OpenTelemetry exporter with a fake meter."""
+
+    def test_export(self):
+        """Test that every phase, the status and the sizes are recorded."""
+        meter = FakeMeter()
+        exporter = OpenTelemetryExporter(meter)
+        exporter(_record("validate", 0.02))
+
+        durations = meter.instruments["cryptonets.operation.duration"].values
+        assert len(durations) == len(PHASES)
+        assert (0.02, {"operation": "validate", "phase": "native"}) in durations
+        assert meter.instruments["cryptonets.operations"].values == [
+            (1, {"operation": "validate", "status": "API_NO_ERROR"})]
+        assert (100, {"operation": "validate", "direction": "in"}) in meter.instruments["cryptonets.operation.io"].values
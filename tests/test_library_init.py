@@ -0,0 +1,173 @@
+"""Tests of the blocking and background initialization of PrivIDFaceLib, on the simulated native library."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from cryptonets_python_sdk.library import PrivIDFaceLib
+from cryptonets_python_sdk.library_loader import LibraryLoadError, LibraryLoadStrategy
+from cryptonets_python_sdk.simulated_library import SimulatedLibraryLoadStrategy
+
+
+class BlockingStrategy(SimulatedLibraryLoadStrategy):
+    """Simulated strategy whose load blocks until `release` is set, like a slow download."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.release = threading.Event()
+        self.loads = 0
+
+    def load_library(self):
+        self.loads += 1
+        self.release.wait(5)
+        return super().load_library()
+
+
+class FailingStrategy(LibraryLoadStrategy):
+    """Strategy failing to load the library."""
+
+    def load_library(self):
+        raise OSError("cannot open shared object file")
+
+
+class InterruptedStrategy(LibraryLoadStrategy):
+    """Strategy whose load is interrupted by a BaseException."""
+
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+    def load_library(self):
+        raise self.exception
+
+
+class ShutdownCountingStrategy(SimulatedLibraryLoadStrategy):
+    """Simulated strategy counting the privid_shutdown_lib calls."""
+
+    shutdowns = 0
+
+    def load_library(self):
+        lib, ffibuilder = super().load_library()
+        shutdown_lib = lib.privid_shutdown_lib
+
+        def counting_shutdown():
+            self.shutdowns += 1
+            shutdown_lib()
+
+        lib.privid_shutdown_lib = counting_shutdown
+        return lib, ffibuilder
+
+
+@pytest.fixture(autouse=True)
+def shutdown():
+    yield
+    PrivIDFaceLib.shutdown()
+
+
+class TestInitialize:
+    """Test the blocking initialization."""
+
+    def test_polls_until_initialized(self):
+        """Test that the initialization waits for the native library."""
+        PrivIDFaceLib.initialize(SimulatedLibraryLoadStrategy(init_delay=0.03))
+        assert PrivIDFaceLib.is_initialized()
+        assert PrivIDFaceLib.get_native_sdk_version() == "simulated"
+
+    def test_backoff(self):
+        """Test that the polls start fast and back off, instead of fixed 100 ms steps."""
+        class Lib:
+            def __init__(self):
+                self.ready_at = time.monotonic() + 0.02
+                self.polls = 0
+
+            def privid_is_library_initialized(self):
+                self.polls += 1
+                return time.monotonic() >= self.ready_at
+
+        lib = Lib()
+        PrivIDFaceLib._wait_initialized(lib, timeout=1.0)
+        assert time.monotonic() - lib.ready_at < PrivIDFaceLib.INIT_POLL_MAX_DELAY
+        assert 3 <= lib.polls <= 12
+
+    def test_timeout(self):
+        """Test that a native library never reporting it is initialized fails the initialization and is shut down."""
+        strategy = ShutdownCountingStrategy(init_delay=1.0)
+        with pytest.raises(LibraryLoadError, match="not initialized after"):
+            PrivIDFaceLib.initialize(strategy, timeout=0.05)
+        assert not PrivIDFaceLib.is_initialized()
+        assert strategy.shutdowns == 1
+
+    def test_interrupted(self):
+        """Test that an interrupted initialization is re-raised and does not block the next ones."""
+        with pytest.raises(KeyboardInterrupt):
+            PrivIDFaceLib.initialize(InterruptedStrategy(KeyboardInterrupt()))
+        assert PrivIDFaceLib._init_future is None
+        PrivIDFaceLib.initialize(SimulatedLibraryLoadStrategy(), timeout=5)
+        assert PrivIDFaceLib.is_initialized()
+
+    def test_load_error(self):
+        """Test that load errors are reported and a later initialization can succeed."""
+        with pytest.raises(LibraryLoadError, match="cannot open shared object file"):
+            PrivIDFaceLib.initialize(FailingStrategy())
+        assert not PrivIDFaceLib.is_initialized()
+        PrivIDFaceLib.initialize(SimulatedLibraryLoadStrategy())
+        assert PrivIDFaceLib.is_initialized()
+
+
+class TestInitializeAsync:
+    """Test the background initialization."""
+
+    def test_lock_not_held(self):
+        """Test that the library can be queried while it is loading."""
+        strategy = BlockingStrategy()
+        future = PrivIDFaceLib.initialize_async(strategy)
+        assert not future.done()
+        assert not PrivIDFaceLib.is_initialized()
+        strategy.release.set()
+        assert future.result(timeout=5) is None
+        assert PrivIDFaceLib.is_initialized()
+
+    def test_shared_initialization(self):
+        """Test that concurrent calls share one initialization and later calls return a completed future."""
+        strategy = BlockingStrategy()
+        futures = [PrivIDFaceLib.initialize_async(strategy) for _ in range(3)]
+        assert futures[0] is futures[1] is futures[2]
+        waiter = threading.Thread(target=PrivIDFaceLib.initialize)
+        waiter.start()
+        strategy.release.set()
+        waiter.join(5)
+        assert not waiter.is_alive()
+        assert strategy.loads == 1
+        assert PrivIDFaceLib.initialize_async().done()
+
+    def test_failure(self):
+        """Test that the future holds the initialization error."""
+        future = PrivIDFaceLib.initialize_async(SimulatedLibraryLoadStrategy(init_delay=1.0), timeout=0.05)
+        assert isinstance(future.exception(timeout=5), LibraryLoadError)
+        assert not PrivIDFaceLib.is_initialized()
+
+    # the SystemExit is re-raised in the initialization thread
+    @pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+    def test_interrupted(self):
+        """Test that a BaseException in the initialization thread completes the future."""
+        future = PrivIDFaceLib.initialize_async(InterruptedStrategy(SystemExit()))
+        assert isinstance(future.exception(timeout=5), LibraryLoadError)
+        assert PrivIDFaceLib.initialize_async(SimulatedLibraryLoadStrategy()).result(timeout=5) is None
+
+    def test_shutdown_waits(self):
+        """Test that a shutdown during the initialization waits for it."""
+        strategy = BlockingStrategy()
+        PrivIDFaceLib.initialize_async(strategy)
+        threading.Timer(0.05, strategy.release.set).start()
+        PrivIDFaceLib.shutdown()
+        assert not PrivIDFaceLib.is_initialized()
+        assert not strategy.library.privid_is_library_initialized()
+
+    def test_asyncio(self):
+        """Test that the future can be awaited from a coroutine."""
+        async def main():
+            await asyncio.wrap_future(PrivIDFaceLib.initialize_async(SimulatedLibraryLoadStrategy(init_delay=0.01)))
+            return PrivIDFaceLib.is_initialized()
+
+        assert asyncio.run(main())
@@ -0,0 +1,353 @@
+"""Tests of the native file downloads of DefaultLibraryLoadStrategy, against an in-memory S3 stand-in."""
+
+import hashlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from cryptonets_python_sdk.library_loader import (
+    DefaultLibraryLoadStrategy,
+    FileLock,
+    LibraryLoadError,
+    SystemInfoUtility,
+)
+
+BUCKET = "bucket"
+VERSION = "1.0.0"
+
+
+class FailingBody:
+    """Response body raising after `fail_after` bytes, like a dropped connection."""
+
+    def __init__(self, data: bytes, fail_after: int):
+        self._stream = io.BytesIO(data)
+        self._remaining = fail_after
+
+    def read(self, amt=None):
+        if self._remaining <= 0:
+            raise ConnectionResetError("connection reset")
+        chunk = self._stream.read(min(amt, self._remaining))
+        self._remaining -= len(chunk)
+        return chunk
+
+
+class FakeS3Client:
+    """Minimal S3 client serving objects from a dict (head_object and ranged get_object)."""
+
+    def __init__(self, objects, latency: float = 0.0):
+        self.objects = objects
+        self.latency = latency
+        self.gets = []
+        self.failures = {}
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def head_object(self, Bucket, Key):
+        return {"ContentLength": len(self.objects[Key])}
+
+    def get_object(self, Bucket, Key, Range=None):
+        with self._lock:
+            self.gets.append((Key, Range))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.active -= 1
+        data = self.objects[Key]
+        if Range is not None:
+            data = data[int(Range[len("bytes="):-1]):]
+        fail_after = self.failures.pop(Key, None)
+        if fail_after is not None:
+            return {"Body": FailingBody(data, fail_after)}
+        return {"Body": io.BytesIO(data)}
+
+
+def _platform_manifest(files):
+    """Manifest listing `files` for the current platform, and the S3 key of every file."""
+    strategy = DefaultLibraryLoadStrategy()
+    system_info = SystemInfoUtility.get_system_info()
+    entries = [{"filename": name, "sha256": hashlib.sha256(data).hexdigest()} for name, data in files.items()]
+    os_name = system_info["os"]
+    if os_name == "Linux":
+        linux_info = system_info["linux_info"]
+        section = {linux_info["id"].lower(): {linux_info["version_id"]: {system_info["architecture"]: entries}}}
+    elif os_name == "Windows":
+        section = {system_info["architecture"]: entries}
+    else:
+        section = {"universal": entries}
+    manifest = {"metadata": {"latest": VERSION, "s3_python_sdk_bucket": BUCKET, "base_path": "base"},
+                "versions": {VERSION: {os_name: section}}}
+    keys = {name: strategy._construct_s3_key_for_file("base", VERSION, system_info, name) for name in files}
+    return manifest, keys
+
+
+@pytest.fixture
+def files():
+    return {f"model_{i}.bin": os.urandom(200_000 + i) for i in range(4)}
+
+
+@pytest.fixture
+def s3(files):
+    manifest, keys = _platform_manifest(files)
+    client = FakeS3Client({keys[name]: data for name, data in files.items()})
+    return manifest, keys, client
+
+
+def _strategy(client, **options) -> DefaultLibraryLoadStrategy:
+    strategy = DefaultLibraryLoadStrategy(s3_client=client, retry_delay=0, **options)
+    strategy.DOWNLOAD_CHUNK_SIZE = 16 * 1024
+    return strategy
+
+
+def _assert_cached(cache_dir, files):
+    for name, data in files.items():
+        with open(os.path.join(cache_dir, name), "rb") as f:
+            assert f.read() == data
+    assert not [name for name in os.listdir(cache_dir) if name.endswith(".part")]
+
+
+class TestDownloads:
+    """Test downloading the manifest files to the cache directory."""
+
+    def test_concurrent_download(self, tmp_path, files, s3):
+        """Test that missing files are downloaded in parallel and verified."""
+        manifest, _, client = s3
+        client.latency = 0.05
+        _strategy(client, max_workers=4)._ensure_files_from_manifest(manifest, str(tmp_path))
+        _assert_cached(tmp_path, files)
+        assert len(client.gets) == len(files)
+        assert client.max_active > 1
+
+    def test_cached_files_not_downloaded(self, tmp_path, files, s3):
+        """Test that verified cached files are reused."""
+        manifest, _, client = s3
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        assert len(client.gets) == len(files)
+
+    def test_resume_after_connection_error(self, tmp_path, files, s3):
+        """Test that an interrupted download resumes with a ranged GET."""
+        manifest, keys, client = s3
+        client.failures[keys["model_0.bin"]] = 50_000
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        _assert_cached(tmp_path, files)
+        assert (keys["model_0.bin"], "bytes=50000-") in client.gets
+
+    def test_resume_part_file(self, tmp_path, files, s3):
+        """Test that the part file left by an interrupted process is resumed."""
+        manifest, keys, client = s3
+        with open(tmp_path / "model_1.bin.part", "wb") as f:
+            f.write(files["model_1.bin"][:1000])
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        _assert_cached(tmp_path, files)
+        assert (keys["model_1.bin"], "bytes=1000-") in client.gets
+
+    def test_corrupted_file_downloaded_again(self, tmp_path, files, s3):
+        """Test that a cached file not matching its checksum is replaced."""
+        manifest, keys, client = s3
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        with open(tmp_path / "model_2.bin", "r+b") as f:
+            f.truncate(10)
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        _assert_cached(tmp_path, files)
+        assert [key for key, _ in client.gets].count(keys["model_2.bin"]) == 2
+
+    def test_checksum_mismatch(self, tmp_path, files, s3):
+        """Test that an object not matching the manifest checksum is never moved into the cache."""
+        manifest, keys, client = s3
+        client.objects[keys["model_3.bin"]] = b"tampered"
+        with pytest.raises(LibraryLoadError):
+            _strategy(client, retries=1)._ensure_files_from_manifest(manifest, str(tmp_path))
+        assert not os.path.exists(tmp_path / "model_3.bin")
+
+    def test_retries_exhausted(self, tmp_path, files, s3):
+        """Test that a download failing at every attempt raises LibraryLoadError."""
+        manifest, keys, client = s3
+        client.objects = {}
+        with pytest.raises(LibraryLoadError):
+            _strategy(client, retries=2)._ensure_files_from_manifest(manifest, str(tmp_path))
+
+    def test_concurrent_processes_download_once(self, tmp_path, files, s3):
+        """Test that loaders starting together share the downloads through the lock file."""
+        manifest, _, client = s3
+        client.latency = 0.05
+        errors = []
+
+        def ensure():
+            try:
+                _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=ensure) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+        _assert_cached(tmp_path, files)
+        assert len(client.gets) == len(files)
+
+
+class TestVerification:
+    """Test the checksum verification of cached files."""
+
+    @pytest.fixture
+    def hashed(self, monkeypatch):
+        """Record the files hashed."""
+        hashed = []
+        file_sha256 = DefaultLibraryLoadStrategy._file_sha256
+
+        def recording_file_sha256(file_path):
+            hashed.append(os.path.basename(file_path))
+            return file_sha256(file_path)
+
+        monkeypatch.setattr(DefaultLibraryLoadStrategy, "_file_sha256", staticmethod(recording_file_sha256))
+        return hashed
+
+    def test_chunked_hash(self, tmp_path):
+        """Test that files are hashed correctly."""
+        data = os.urandom(3 * 1024 * 1024 + 5)
+        path = tmp_path / "file"
+        path.write_bytes(data)
+        assert DefaultLibraryLoadStrategy._file_sha256(str(path)) == hashlib.sha256(data).hexdigest()
+
+    def test_unchanged_files_not_hashed(self, tmp_path, files, s3, hashed):
+        """Test that later loads skip hashing the files verified after their download."""
+        manifest, _, client = s3
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        assert sorted(hashed) == sorted(name + ".part" for name in files)
+        assert os.path.exists(tmp_path / DefaultLibraryLoadStrategy.VERIFIED_FILE_NAME)
+
+        hashed.clear()
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        assert hashed == []
+
+    def test_modified_file_hashed(self, tmp_path, files, s3, hashed):
+        """Test that a file modified in place, with the same size, is hashed and downloaded again."""
+        manifest, keys, client = s3
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        path = tmp_path / "model_0.bin"
+        path.write_bytes(bytes(len(files["model_0.bin"])))
+        os.utime(path, ns=(0, 0))
+
+        hashed.clear()
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        assert "model_0.bin" in hashed
+        _assert_cached(tmp_path, files)
+
+    def test_full_verification(self, tmp_path, files, s3, hashed):
+        """Test that verify='full' hashes every file."""
+        manifest, _, client = s3
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        hashed.clear()
+        _strategy(client, verify="full")._ensure_files_from_manifest(manifest, str(tmp_path))
+        assert sorted(hashed) == sorted(files)
+
+    def test_unreadable_sidecar(self, tmp_path, files, s3, hashed):
+        """Test that an unreadable sidecar only causes the files to be hashed again."""
+        manifest, _, client = s3
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        (tmp_path / DefaultLibraryLoadStrategy.VERIFIED_FILE_NAME).write_text("{not json")
+        hashed.clear()
+        _strategy(client)._ensure_files_from_manifest(manifest, str(tmp_path))
+        assert sorted(hashed) == sorted(files)
+        assert len(client.gets) == len(files)
+
+    def test_invalid_mode(self):
+        """Test that unknown verification modes are rejected."""
+        with pytest.raises(ValueError):
+            DefaultLibraryLoadStrategy(verify="none")
+
+
+def _shared_library():
+    """Path of a shared library that can be opened with dlopen, or None."""
+    try:
+        import _ctypes_test
+    except ImportError:
+        return None
+    return _ctypes_test.__file__
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Cache directory holding a stand-in native library, the manifest resolution is recorded."""
+    library = _shared_library()
+    if library is None:
+        pytest.skip("no shared library to load")
+    system_info = SystemInfoUtility.get_system_info()
+    filename = SystemInfoUtility.get_lib_os_library_filename(DefaultLibraryLoadStrategy.LIB_NAME, system_info)
+    shutil.copy(library, tmp_path / filename)
+    monkeypatch.setattr(SystemInfoUtility, "get_package_cache_directory", staticmethod(lambda *args: str(tmp_path)))
+    resolutions = []
+    monkeypatch.setattr(DefaultLibraryLoadStrategy, "_read_manifest", lambda self, version: resolutions.append(version))
+    monkeypatch.setattr(DefaultLibraryLoadStrategy, "_ensure_files_from_manifest",
+                        lambda self, manifest, cache_dir: None)
+    return tmp_path / filename, resolutions
+
+
+class TestResolvedIndex:
+    """Test the warm start path of DefaultLibraryLoadStrategy."""
+
+    def test_warm_start(self, cache):
+        """Test that a second load opens the recorded library without resolving the manifest."""
+        library_path, resolutions = cache
+        lib, ffi = DefaultLibraryLoadStrategy().load_library()
+        assert hasattr(ffi, "dlopen")
+        assert len(resolutions) == 1
+        assert os.path.exists(library_path.parent / DefaultLibraryLoadStrategy.RESOLVED_INDEX_FILE_NAME)
+
+        DefaultLibraryLoadStrategy().load_library()
+        assert len(resolutions) == 1
+
+    def test_changed_library_resolved_again(self, cache):
+        """Test that the index is not used once a recorded file changed."""
+        library_path, resolutions = cache
+        DefaultLibraryLoadStrategy().load_library()
+        os.utime(library_path, ns=(0, 0))
+        DefaultLibraryLoadStrategy().load_library()
+        assert len(resolutions) == 2
+
+    def test_full_verification_resolves(self, cache):
+        """Test that verify='full' never uses the index."""
+        _, resolutions = cache
+        DefaultLibraryLoadStrategy().load_library()
+        DefaultLibraryLoadStrategy(verify="full").load_library()
+        assert len(resolutions) == 2
+
+    def test_unreadable_index(self, cache):
+        """Test that an unreadable index falls back to the manifest resolution."""
+        library_path, resolutions = cache
+        DefaultLibraryLoadStrategy().load_library()
+        (library_path.parent / DefaultLibraryLoadStrategy.RESOLVED_INDEX_FILE_NAME).write_text("[]")
+        DefaultLibraryLoadStrategy().load_library()
+        assert len(resolutions) == 2
+
+    def test_lazy_imports(self):
+        """Test that boto3 and yaml are not imported with the loader."""
+        code = ("import sys, cryptonets_python_sdk.library_loader; "
+                "print(sorted(name for name in ('boto3', 'botocore', 'yaml') if name in sys.modules))")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        assert output.strip() == "[]"
+
+
+class TestFileLock:
+    """Test the cross-process file lock."""
+
+    def test_timeout(self, tmp_path):
+        """Test that a held lock times out."""
+        path = str(tmp_path / "lock")
+        with FileLock(path):
+            with pytest.raises(LibraryLoadError):
+                FileLock(path, timeout=0.2, poll_interval=0.05).acquire()
+        with FileLock(path, timeout=0.2):
+            pass
@@ -0,0 +1,84 @@
+"""Tests of the output images returned as arrays backed by the native buffers, on the simulated library."""
+
+import gc
+
+import numpy as np
+import pytest
+
+from cryptonets_python_sdk.process_pool_session import ProcessPoolSession
+from cryptonets_python_sdk.result_views import StatusView
+from cryptonets_python_sdk.session import ImageInputArg, Session
+from cryptonets_python_sdk.simulated_library import SimulatedLibraryLoadStrategy
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    CallResult,
+    OperationConfig,
+    ReturnStatus,
+)
+
+from conftest import SETTINGS
+
+
+
+def _image(seed: int = 0, width: int = 64, height: int = 48) -> ImageInputArg:
+    pixels = np.random.default_rng(seed).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    return ImageInputArg(pixels, "rgb", zero_copy=True)
+
+
+class TestOutputArrays:
+    """Test face_iso and doc_scan_face with as_array."""
+
+    def test_face_iso(self, simulated):
+        """Test that the ISO image is shaped from its info and holds the native buffer until released."""
+        session = Session(SETTINGS)
+        image = _image()
+        op_id, result, iso_image = session.face_iso(image, OperationConfig(), as_array=True)
+        assert op_id > 0
+        assert isinstance(result, CallResult)
+        assert iso_image.shape == (48, 64, 3) and iso_image.dtype == np.uint8
+        assert np.array_equal(iso_image, image.image_array)
+        assert simulated.library.outstanding_buffers == 1
+
+        del iso_image
+        gc.collect()
+        assert simulated.library.outstanding_buffers == 0
+        session.close()
+
+    def test_doc_scan_face(self, simulated):
+        """Test that the document and face crops are shaped from their infos."""
+        session = Session(SETTINGS)
+        _, result, document, face = session.doc_scan_face(_image(), OperationConfig(), as_array=True)
+        assert result.call_status.return_status == ReturnStatus.API_NO_ERROR
+        assert document.shape == (48, 64, 3)
+        assert face.shape == (24, 32, 3)
+        assert simulated.library.outstanding_buffers == 2
+
+        del document, face
+        gc.collect()
+        assert simulated.library.outstanding_buffers == 0
+        session.close()
+
+    def test_result_view(self, simulated):
+        """Test that the image infos are decoded when the caller asked for a slim view."""
+        session = Session(SETTINGS)
+        _, result, iso_image = session.face_iso(_image(), OperationConfig(), result_view=StatusView, as_array=True)
+        assert isinstance(result, StatusView)
+        assert iso_image.shape == (48, 64, 3)
+        session.close()
+
+    def test_bytes_by_default(self, simulated):
+        """Test that the output images are copied to bytes without as_array."""
+        session = Session(SETTINGS)
+        image = _image()
+        _, _, iso_image = session.face_iso(image, OperationConfig())
+        assert iso_image == image.image_array.tobytes()
+        assert simulated.library.outstanding_buffers == 0
+        session.close()
+
+    def test_process_pool(self):
+        """Test that the arrays are returned from the worker processes."""
+        with ProcessPoolSession(SETTINGS, workers=1, load_strategy=SimulatedLibraryLoadStrategy()) as pool:
+            image = _image()
+            _, _, iso_image = pool.face_iso(image, OperationConfig(), as_array=True)
+            assert np.array_equal(iso_image, image.image_array)
+            _, _, _, face = pool.doc_scan_face(image, OperationConfig(), as_array=True)
+            assert face.shape == (24, 32, 3)
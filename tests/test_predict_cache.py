@@ -0,0 +1,177 @@
+"""Tests of PredictCache, on the simulated native library."""
+
+import numpy as np
+import pytest
+
+from cryptonets_python_sdk.predict_cache import PredictCache
+from cryptonets_python_sdk.result_views import PredictView
+from cryptonets_python_sdk.session import ImageInputArg, Session
+from cryptonets_python_sdk.session_pool import SessionPool
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    CallResult,
+    CallResultHeader,
+    OperationConfig,
+    ReturnStatus,
+)
+
+from conftest import SETTINGS
+
+CONFIG = OperationConfig(collection_name="default")
+
+
+def _image(seed: int = 0, width: int = 64, height: int = 48) -> ImageInputArg:
+    pixels = np.random.default_rng(seed).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    return ImageInputArg(pixels, "rgb", zero_copy=True)
+
+
+def _ok_result() -> CallResult:
+    return CallResult(call_status=CallResultHeader(return_status=ReturnStatus.API_NO_ERROR, operation_id=1,
+                                                   operation_type_id=1))
+
+
+class FakeClock:
+    """Clock advanced by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestPredictCache:
+    """Test the cache through Session.face_predict_onefa."""
+
+    def test_hit(self, simulated):
+        """Test that a repeated prediction is served from the cache."""
+        cache = PredictCache()
+        session = Session(SETTINGS, predict_cache=cache)
+        image = _image()
+        op_id, result = session.face_predict_onefa(image, CONFIG)
+        assert session.face_predict_onefa(_image(), CONFIG) == (op_id, result)
+        assert simulated.library.calls["face_predict_onefa"] == 1
+        assert cache.hits == 1 and cache.misses == 1
+
+    def test_hit_is_a_copy(self, simulated):
+        """Test that every hit returns its own result, whose changes do not reach the cache."""
+        cache = PredictCache()
+        session = Session(SETTINGS, predict_cache=cache)
+        _, result = session.face_predict_onefa(_image(), CONFIG)
+        _, hit = session.face_predict_onefa(_image(), CONFIG)
+        assert hit is not result
+        hit.call_status.return_status = ReturnStatus.API_NETWORK_ERROR
+        result.call_status.operation_id = -1
+        _, hit = session.face_predict_onefa(_image(), CONFIG)
+        assert hit.call_status.return_status == ReturnStatus.API_NO_ERROR
+        assert hit.call_status.operation_id > 0
+
+    def test_key_parts(self, simulated):
+        """Test that another image, configuration or result view misses."""
+        cache = PredictCache()
+        session = Session(SETTINGS, predict_cache=cache)
+        session.face_predict_onefa(_image(), CONFIG)
+        session.face_predict_onefa(_image(1), CONFIG)
+        session.face_predict_onefa(_image(), OperationConfig(collection_name="default", neighbors=3))
+        session.face_predict_onefa(_image(), CONFIG, result_view=PredictView)
+        assert cache.misses == 4 and cache.hits == 0
+
+    def test_invalidated_by_enroll_and_delete(self, simulated):
+        """Test that enrollments and deletions drop the entries of their collection."""
+        cache = PredictCache()
+        session = Session(SETTINGS, predict_cache=cache)
+        image = _image()
+        _, result = session.face_predict_onefa(image, CONFIG)
+        assert result.call_status.return_status == ReturnStatus.API_NO_ERROR
+        assert result.predict.api_response.status != 0
+        _, enrolled = session.enroll_onefa(image, CONFIG)
+        puid = enrolled.enroll.api_response.puid
+        assert cache.invalidations == 1 and len(cache) == 0
+        _, result = session.face_predict_onefa(image, CONFIG)
+        assert result.predict.api_response.puid == puid
+        session.user_delete(puid, CONFIG)
+        assert len(cache) == 0
+        _, result = session.face_predict_onefa(image, CONFIG)
+        assert result.predict.api_response.status != 0
+
+    def test_invalidate_collections(self):
+        """Test that a named collection keeps the other collections, an unnamed one drops everything."""
+        cache = PredictCache()
+        image = _image()
+        for collection in ("a", "b", None):
+            cache.put(cache.key(image, b"{}", collection, object), (1, _ok_result()))
+        cache.invalidate("a")
+        assert len(cache) == 1
+        cache.invalidate(None)
+        assert len(cache) == 0
+        assert cache.invalidations == 3
+
+    def test_invalidated_during_prediction(self):
+        """Test that a result is not cached when its collection changed while it was predicted."""
+        cache = PredictCache()
+        key = cache.key(_image(), b"{}", "default", object)
+        generation = cache.generation
+        cache.invalidate("other")
+        cache.put(key, (1, _ok_result()), generation)
+        assert len(cache) == 0
+
+    @pytest.mark.parametrize("simulated", [{"error_rate": 1.0}], indirect=True)
+    def test_errors_not_cached(self, simulated):
+        """Test that failed predictions are not cached."""
+        cache = PredictCache()
+        session = Session(SETTINGS, predict_cache=cache)
+        session.face_predict_onefa(_image(), CONFIG)
+        assert len(cache) == 0
+
+    def test_ttl_and_lru(self):
+        """Test that entries expire after the TTL and the least recently used entry is evicted."""
+        clock = FakeClock()
+        cache = PredictCache(max_entries=2, ttl=5.0, clock=clock)
+        keys = [cache.key(_image(seed), b"{}", "default", object) for seed in range(3)]
+        cache.put(keys[0], (1, _ok_result()))
+        cache.put(keys[1], (2, _ok_result()))
+        assert cache.get(keys[0])[0] == 1
+        cache.put(keys[2], (3, _ok_result()))
+        assert cache.get(keys[1]) is None
+        assert cache.evictions == 1
+        clock.now = 6.0
+        assert cache.get(keys[0]) is None
+        assert cache.expirations == 1
+
+    def test_near_identical_frames_miss(self):
+        """Test that a frame differing by one pixel value does not match, whatever the cached identity."""
+        frame = _image().image_array
+        noisy = frame.copy()
+        noisy[0, 0, 0] ^= 1
+        cache = PredictCache()
+        assert cache.key(ImageInputArg(frame, "rgb", zero_copy=True), b"{}", "default", object) != \
+            cache.key(ImageInputArg(noisy, "rgb", zero_copy=True), b"{}", "default", object)
+        assert cache.key(ImageInputArg(frame, "rgb", zero_copy=True), b"{}", "default", object) == \
+            cache.key(ImageInputArg(frame.copy(), "rgb", zero_copy=True), b"{}", "default", object)
+
+    def test_shared_by_pool(self, simulated):
+        """Test that the sessions of a pool share the cache."""
+        cache = PredictCache()
+        with SessionPool(SETTINGS, size=2, predict_cache=cache) as pool:
+            with pool.session() as first, pool.session() as second:
+                first.face_predict_onefa(_image(), CONFIG)
+                second.face_predict_onefa(_image(), CONFIG)
+        assert cache.hits == 1
+
+    def test_metrics(self):
+        """Test the statistics and their Prometheus rendering."""
+        cache = PredictCache()
+        key = cache.key(_image(), b"{}", "default", object)
+        cache.get(key)
+        cache.put(key, (1, _ok_result()))
+        cache.get(key)
+        assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5, "evictions": 0,
+                                 "expirations": 0, "invalidations": 0}
+        text = cache.prometheus_text()
+        assert 'cryptonets_predict_cache_lookups_total{result="hit"} 1' in text
+        assert 'cryptonets_predict_cache_removals_total{reason="eviction"} 0' in text
+
+    def test_invalid_arguments(self):
+        """Test that invalid sizes and TTLs are rejected."""
+        for kwargs in ({"max_entries": 0}, {"ttl": 0}):
+            with pytest.raises(ValueError):
+                PredictCache(**kwargs)
@@ -0,0 +1,108 @@
+"""Tests of the pre-fork mode, on the simulated native library."""
+
+import gc
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+from cryptonets_python_sdk import prefork
+from cryptonets_python_sdk.library import PrivIDError, PrivIDFaceLib
+from cryptonets_python_sdk.session import ImageInputArg, Session, SessionError
+from cryptonets_python_sdk.session_pool import SessionPool
+from cryptonets_python_sdk.simulated_library import SimulatedLibraryLoadStrategy
+from cryptonets_python_sdk.idl.gen.privateid_types import OperationConfig
+
+from conftest import SETTINGS
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+
+
+def _image() -> ImageInputArg:
+    return ImageInputArg(np.zeros((48, 64, 3), dtype=np.uint8), "rgb", zero_copy=True)
+
+
+def run_in_child(check) -> int:
+    """Run `check` in a forked child and return its exit code: 0 on success, 1 on failure."""
+    with warnings.catch_warnings():
+        # the test process may be running threads of other tests, the child does not use them
+        warnings.simplefilter("ignore", DeprecationWarning)
+        pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            check()
+            code = 0
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+@pytest.fixture
+def strategy(simulated):
+    """Prepare the simulated library, without freezing the test process objects."""
+    prefork.prepare(SETTINGS, simulated, freeze=False)
+    return simulated
+
+
+class TestPrefork:
+    """Test the warm-up in the master and the sessions in the children."""
+
+    def test_warm_up(self, strategy):
+        """Test that the warm-up operations ran and their session was released."""
+        assert PrivIDFaceLib.is_initialized()
+        assert all(strategy.library.calls[operation] == 1 for operation in prefork.WARM_UP_OPERATIONS)
+        assert strategy.library.open_sessions == 0
+
+    def test_child_creates_sessions(self, strategy):
+        """Test that a child uses the inherited library with its own sessions."""
+        def check():
+            prefork.post_fork()
+            op_id, _ = Session(SETTINGS).validate(_image(), OperationConfig())
+            assert op_id > 0
+
+        assert run_in_child(check) == 0
+
+    def test_parent_session_rejected(self, strategy):
+        """Test that a session created before the fork cannot be used, nor deinitialized, by the child."""
+        session = Session(SETTINGS)
+
+        def check():
+            assert not session.has_valid_handle()
+            with pytest.raises(SessionError):
+                session.validate(_image(), OperationConfig())
+            sessions = strategy.library.open_sessions
+            session.close()
+            assert strategy.library.open_sessions == sessions
+
+        assert run_in_child(check) == 0
+        assert session.has_valid_handle()
+        assert session.validate(_image(), OperationConfig())[0] > 0
+
+    def test_pool_recreates_sessions(self, strategy):
+        """Test that a pool created before the fork replaces its sessions in the child."""
+        pool = SessionPool(SETTINGS, size=2)
+
+        def check():
+            with pool.session() as session:
+                assert session.validate(_image(), OperationConfig())[0] > 0
+            assert pool.evicted == 2
+
+        assert run_in_child(check) == 0
+        pool.close()
+
+    def test_post_fork_in_master(self, strategy):
+        """Test that post_fork fails when it is not called in a forked child."""
+        with pytest.raises(PrivIDError):
+            prefork.post_fork()
+
+    def test_freeze(self):
+        """Test that the objects of the master are moved to the permanent generation."""
+        try:
+            prefork.prepare(load_strategy=SimulatedLibraryLoadStrategy())
+            assert gc.get_freeze_count() > 0
+        finally:
+            gc.unfreeze()
+            PrivIDFaceLib.shutdown()
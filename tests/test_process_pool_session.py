@@ -0,0 +1,190 @@
+"""Tests of ProcessPoolSession, with worker processes running the simulated native library."""
+
+import os
+import signal
+import threading
+
+import numpy as np
+import pytest
+
+from cryptonets_python_sdk.process_pool_session import (
+    ProcessPoolSession,
+    ProcessPoolSessionError,
+    ProcessPoolTimeoutError,
+    WorkerCrashedError,
+)
+from cryptonets_python_sdk.compiled_config import CompiledOperationConfig
+from cryptonets_python_sdk.library_loader import LibraryLoadStrategy
+from cryptonets_python_sdk.result_views import StatusView
+from cryptonets_python_sdk.session import ImageInputArg
+from cryptonets_python_sdk.simulated_library import SimulatedLibraryLoadStrategy
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    CallResult,
+    OperationConfig,
+    ReturnStatus,
+)
+
+from conftest import SETTINGS
+
+
+class FailingStrategy(LibraryLoadStrategy):
+    """Strategy failing to load the library in the workers."""
+
+    def load_library(self):
+        raise OSError("cannot open shared object file")
+
+
+def _image(seed: int = 0, width: int = 64, height: int = 48) -> ImageInputArg:
+    pixels = np.random.default_rng(seed).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    return ImageInputArg(pixels, "rgb", zero_copy=True)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    """Two workers on the simulated library, shared by the tests of the module."""
+    with ProcessPoolSession(SETTINGS, workers=2, load_strategy=SimulatedLibraryLoadStrategy()) as pool:
+        yield pool
+
+
+class TestOperations:
+    """Test the Session method surface."""
+
+    def test_validate(self, pool):
+        """Test that an operation returns the typed result of the worker session."""
+        op_id, result = pool.validate(_image(), OperationConfig())
+        assert op_id > 0
+        assert isinstance(result, CallResult)
+        assert result.call_status.return_status == ReturnStatus.API_NO_ERROR
+
+    def test_result_view_and_output_images(self, pool):
+        """Test that result views are honored and output images are returned."""
+        op_id, result, iso_image = pool.face_iso(_image(), OperationConfig(), result_view=StatusView)
+        assert isinstance(result, StatusView)
+        assert len(iso_image) > 0
+        _, _, doc_image, face_image = pool.doc_scan_face(_image(), OperationConfig())
+        assert len(doc_image) > 0 and len(face_image) > 0
+
+    def test_two_images_and_string_argument(self, pool):
+        """Test face_compare_files and user_delete."""
+        _, result = pool.face_compare_files(_image(1), _image(1), OperationConfig())
+        assert result.call_status.return_status == ReturnStatus.API_NO_ERROR
+        op_id, _ = pool.user_delete("puid", OperationConfig(collection_name="default"))
+        assert op_id > 0
+
+    def test_enroll_predict(self, pool):
+        """Test that enrollments are visible from the worker that made them."""
+        config = OperationConfig(collection_name="default")
+        _, enrolled = pool.enroll_onefa(_image(2), config)
+        assert enrolled.call_status.return_status == ReturnStatus.API_NO_ERROR
+
+    def test_large_image(self, pool):
+        """Test that the shared memory segment grows for images larger than its size."""
+        image = ImageInputArg(np.zeros((1600, 1200, 3), dtype=np.uint8), "rgb")
+        for _ in range(3):
+            _, result = pool.estimate_age(image, OperationConfig())
+            assert result.call_status.return_status == ReturnStatus.API_NO_ERROR
+
+    def test_worker_exception(self, pool):
+        """Test that exceptions raised in the worker are raised by the call."""
+        with pytest.raises(Exception, match="Expected `int`"):
+            pool.validate(_image(), OperationConfig(), result_view=int)
+        assert pool.validate(_image(), OperationConfig())[0] > 0
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_many(self, pool, ordered):
+        """Test that batch operations return one result per image."""
+        images = [_image(seed).image_array for seed in range(7)]
+        results = list(pool.anti_spoofing_many(images, OperationConfig(), ordered=ordered, max_in_flight=3))
+        indexes = [index for index, _, _ in results]
+        assert sorted(indexes) == list(range(7))
+        if ordered:
+            assert indexes == list(range(7))
+        assert all(result.call_status.return_status == ReturnStatus.API_NO_ERROR for _, _, result in results)
+
+    def test_many_unordered_drain(self, pool, monkeypatch):
+        """Test that with ordered=False the last images in flight are also yielded as they complete."""
+        import time
+
+        def call(operation, images, args, config, result_view):
+            time.sleep(images[0].width / 1000)
+            return images[0].width, None
+
+        monkeypatch.setattr(pool, "_call", call)
+        images = [np.zeros((2, width, 3), dtype=np.uint8) for width in (150, 1, 1)]
+        results = list(pool.validate_many(images, OperationConfig(), ordered=False, max_in_flight=10))
+        assert results[-1][0] == 0 and sorted(index for index, _, _ in results) == [0, 1, 2]
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_many_invalid_max_in_flight(self, pool, ordered):
+        """Test that a max_in_flight lower than 1 is rejected when the batch is created."""
+        with pytest.raises(ValueError, match="max_in_flight"):
+            pool.validate_many([_image().image_array], OperationConfig(), ordered=ordered, max_in_flight=0)
+
+    def test_compiled_config(self, pool):
+        """Test that a compiled configuration is sent with its cached msgpack encoding."""
+        compiled = CompiledOperationConfig(OperationConfig(collection_name="default"))
+        _, result = pool.validate(_image(), compiled)
+        assert result.call_status.return_status == ReturnStatus.API_NO_ERROR
+        assert compiled.encode_msgpack() is compiled.encode_msgpack()
+
+    def test_threads(self, pool):
+        """Test that calls can be made from several threads."""
+        errors = []
+
+        def run():
+            try:
+                for _ in range(5):
+                    pool.validate(_image(), OperationConfig())
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert errors == []
+
+
+class TestWorkerLifecycle:
+    """Test the worker restarts."""
+
+    def test_crash(self):
+        """Test that a worker killed during a call is restarted."""
+        strategy = SimulatedLibraryLoadStrategy(latency=2.0)
+        with ProcessPoolSession(SETTINGS, workers=1, load_strategy=strategy) as pool:
+            pid = pool._idle[0].process.pid
+            threading.Timer(0.2, os.kill, (pid, signal.SIGKILL)).start()
+            with pytest.raises(WorkerCrashedError):
+                pool.validate(_image(), OperationConfig())
+            assert pool.restarts == 1
+            assert pool._idle[0].process.pid != pid
+
+    def test_timeout(self):
+        """Test that a call exceeding the timeout kills and restarts its worker."""
+        strategy = SimulatedLibraryLoadStrategy(latency={"validate": 5.0})
+        with ProcessPoolSession(SETTINGS, workers=1, load_strategy=strategy, call_timeout=0.2) as pool:
+            with pytest.raises(ProcessPoolTimeoutError):
+                pool.validate(_image(), OperationConfig())
+            assert pool.restarts == 1
+            assert pool.estimate_age(_image(), OperationConfig())[0] > 0
+
+    def test_max_tasks(self):
+        """Test that workers are recycled after max_tasks_per_worker calls."""
+        with ProcessPoolSession(SETTINGS, workers=1, load_strategy=SimulatedLibraryLoadStrategy(),
+                                max_tasks_per_worker=2) as pool:
+            for _ in range(5):
+                pool.validate(_image(), OperationConfig())
+            assert pool.restarts == 2
+
+    def test_initialization_failure(self):
+        """Test that a worker failing to initialize fails the pool creation."""
+        with pytest.raises(ProcessPoolSessionError, match="cannot open shared object file"):
+            ProcessPoolSession(SETTINGS, workers=1, load_strategy=FailingStrategy())
+
+    def test_closed(self):
+        """Test that a closed pool rejects calls."""
+        pool = ProcessPoolSession(SETTINGS, workers=1, load_strategy=SimulatedLibraryLoadStrategy())
+        pool.close()
+        with pytest.raises(ProcessPoolSessionError):
+            pool.validate(_image(), OperationConfig())
@@ -0,0 +1,124 @@
+"""Unit tests for the slim CallResult views."""
+
+import msgspec
+import pytest
+from cffi import FFI
+
+from cryptonets_python_sdk.session import Session, SessionError, SessionNative
+from cryptonets_python_sdk.result_views import FacesView, PredictView, StatusView
+from cryptonets_python_sdk.idl.gen.privateid_types import (
+    BoxF,
+    CallResult,
+    CallResultHeader,
+    FaceGeometry,
+    FaceResult,
+    FaceTraitsFlags,
+    PointF,
+    PredictData,
+    PredictResponse,
+    PredictUserInformation,
+    ReturnStatus,
+    SpoofStatus,
+)
+
+
+def _predict_result_json() -> bytes:
+    point = PointF(x=1.0, y=2.0)
+    face = FaceResult(
+        geometry=FaceGeometry(bounding_box=BoxF(top_left=point, bottom_right=point), eye_left=point,
+                              eye_right=point, face_confidence_score=0.9),
+        face_traits_flags=FaceTraitsFlags.FT_FACE_TOO_CLOSE,
+        spoof_status=SpoofStatus.AS_NO_SPOOF_DETECTED,
+    )
+    result = CallResult(
+        call_status=CallResultHeader(return_status=ReturnStatus.API_NO_ERROR, operation_id=7, operation_type_id=3),
+        faces=[face],
+        predict=PredictData(
+            predict_performed=True, message="ok",
+            api_response=PredictResponse(status=0, puid="puid-1", guid="guid-1", score=0.8,
+                                         PI_list=[PredictUserInformation(guid="g", puid="p", score=0.1)]),
+        ),
+    )
+    return msgspec.json.encode(result)
+
+
+class FakeLib:
+    """Stand-in for the native library recording the freed buffers."""
+
+    def __init__(self):
+        self.freed = []
+
+    def privid_free_char_buffer(self, buffer):
+        self.freed.append(buffer)
+
+
+def _native_with_result(payload: bytes):
+    """Build a SessionNative shell and output cells holding `payload` as native result."""
+    native = SessionNative.__new__(SessionNative)
+    native._session = None
+    native._ffibuilder = FFI()
+    native._lib = FakeLib()
+    buffer = native._ffibuilder.new('char[]', payload)
+    result_ptr = native._ffibuilder.new('char **', buffer)
+    result_len = native._ffibuilder.new('int *', len(payload))
+    return native, buffer, result_ptr, result_len
+
+
+class TestResultViews:
+    """Test decoding results into views."""
+
+    def test_predict_view(self):
+        """Test that the predict view keeps the status and the predicted user."""
+        result = Session._result_decoder_for(PredictView).decode(_predict_result_json())
+        assert isinstance(result, PredictView)
+        assert result.call_status.operation_id == 7
+        assert result.predict.api_response.puid == "puid-1"
+        assert not hasattr(result, "faces")
+
+    def test_status_view(self):
+        """Test that the status view only decodes the header."""
+        result = Session._result_decoder_for(StatusView).decode(_predict_result_json())
+        assert result.call_status.return_status == ReturnStatus.API_NO_ERROR
+
+    def test_faces_view(self):
+        """Test that the faces view keeps traits and spoof status."""
+        result = Session._result_decoder_for(FacesView).decode(_predict_result_json())
+        assert result.faces[0].face_traits_flags == FaceTraitsFlags.FT_FACE_TOO_CLOSE
+        assert result.faces[0].spoof_status == SpoofStatus.AS_NO_SPOOF_DETECTED
+
+    def test_full_result_is_default(self):
+        """Test that CallResult uses the class-level decoder."""
+        assert Session._result_decoder_for(CallResult) is Session._result_decoder
+
+    def test_decoders_are_cached(self):
+        """Test that view decoders are created once."""
+        assert Session._result_decoder_for(PredictView) is Session._result_decoder_for(PredictView)
+
+    def test_invalid_view(self):
+        """Test that unsupported view types are rejected."""
+        with pytest.raises(SessionError):
+            Session._result_decoder_for(object())
+
+
+class TestReadResult:
+    """Test reading native results."""
+
+    def test_decoded_from_native_buffer(self):
+        """Test that a decoder reads the native buffer and the buffer is freed."""
+        native, buffer, result_ptr, result_len = _native_with_result(_predict_result_json())
+        result = native._read_result(result_ptr, result_len, Session._result_decoder_for(PredictView).decode)
+        assert result.predict.api_response.puid == "puid-1"
+        assert native._lib.freed == [buffer]
+
+    def test_string_without_decoder(self):
+        """Test that the result is returned as a string without decoder."""
+        native, buffer, result_ptr, result_len = _native_with_result(_predict_result_json())
+        assert native._read_result(result_ptr, result_len) == _predict_result_json().decode('utf-8')
+        assert native._lib.freed == [buffer]
+
+    def test_freed_when_decoding_fails(self):
+        """Test that the native buffer is freed when the result cannot be decoded."""
+        native, buffer, result_ptr, result_len = _native_with_result(b"{not json")
+        with pytest.raises(msgspec.DecodeError):
+            native._read_result(result_ptr, result_len, Session._result_decoder.decode)
+        assert native._lib.freed == [buffer]
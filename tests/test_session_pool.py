@@ -0,0 +1,141 @@
+"""Unit tests for the SessionPool class.
+
+The native library is not needed: sessions are replaced by light fakes
+through the `_create_session` extension point.
+"""
+
+import threading
+import time
+
+import pytest
+
+from cryptonets_python_sdk.session_pool import SessionPool, SessionPoolError, SessionPoolTimeoutError
+
+
+class FakeSession:
+    """Stand-in for Session exposing the members used by the pool."""
+
+    def __init__(self):
+        self.valid = True
+        self.closed = False
+        self.sick = False
+
+    def has_valid_handle(self) -> bool:
+        return self.valid and not self.closed
+
+    def close(self):
+        self.closed = True
+
+    def validate(self, value):
+        time.sleep(0.01)
+        return 1, value
+
+
+class FakeSessionPool(SessionPool):
+    def _create_session(self):
+        return FakeSession()
+
+
+class TestSessionPool:
+    """Test leasing, bounding and eviction."""
+
+    def test_pre_creates_sessions(self):
+        """Test that `size` sessions are created upfront."""
+        pool = FakeSessionPool(settings=None, size=3)
+        assert pool.size == 3
+        assert pool.idle == 3
+
+    def test_invalid_sizes(self):
+        """Test that inconsistent sizes are rejected."""
+        with pytest.raises(ValueError):
+            FakeSessionPool(settings=None, size=3, max_size=2)
+
+    def test_session_context_manager_returns_session(self):
+        """Test that a leased session goes back to the pool."""
+        pool = FakeSessionPool(settings=None, size=1)
+        with pool.session() as session:
+            assert pool.idle == 0
+        assert pool.idle == 1
+        with pool.session() as other:
+            assert other is session
+
+    def test_grows_up_to_max_size(self):
+        """Test lazy creation up to max_size."""
+        pool = FakeSessionPool(settings=None, size=1, max_size=2)
+        first = pool.acquire()
+        second = pool.acquire()
+        assert first is not second
+        assert pool.size == 2
+        with pytest.raises(SessionPoolTimeoutError):
+            pool.acquire(timeout=0.05)
+        pool.release(first)
+        pool.release(second)
+
+    def test_acquire_waits_for_release(self):
+        """Test that a blocked acquire is served by a release."""
+        pool = FakeSessionPool(settings=None, size=1)
+        session = pool.acquire()
+        threading.Timer(0.05, pool.release, args=(session,)).start()
+        assert pool.acquire(timeout=2.0) is session
+
+    def test_invalid_handle_evicted(self):
+        """Test that sessions with an invalid handle are evicted on release."""
+        pool = FakeSessionPool(settings=None, size=1)
+        with pool.session() as session:
+            session.valid = False
+        assert session.closed
+        assert pool.evicted == 1
+        assert pool.size == 0
+        with pool.session() as replacement:
+            assert replacement is not session
+
+    def test_health_check_evicts(self):
+        """Test that sessions failing the health check are replaced on acquire."""
+        pool = FakeSessionPool(settings=None, size=1, health_check=lambda s: not getattr(s, 'sick', False))
+        with pool.session() as session:
+            session.sick = True
+        with pool.session() as replacement:
+            assert replacement is not session
+        assert pool.evicted == 1
+
+    def test_health_check_runs_on_acquire_only(self):
+        """Test that the health check runs when a session is leased, not when it is returned."""
+        checked = []
+        pool = FakeSessionPool(settings=None, size=1, health_check=lambda s: checked.append(s) or not s.sick)
+        session = pool.acquire()
+        assert checked == [session]
+        session.sick = True
+        pool.release(session)
+        assert checked == [session]
+        assert pool.idle == 1 and pool.evicted == 0 and not session.closed
+        replacement = pool.acquire()
+        assert replacement is not session and session.closed
+        assert pool.evicted == 1
+        pool.release(replacement)
+
+    def test_run_bounds_concurrency(self):
+        """Test that concurrent callers share max_size sessions."""
+        pool = FakeSessionPool(settings=None, size=2)
+        results = []
+
+        def worker(i):
+            results.append(pool.run('validate', i, timeout=5.0))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(value for _, value in results) == list(range(8))
+        assert pool.size == 2
+
+    def test_closed_pool(self):
+        """Test that a closed pool refuses new leases and closes sessions."""
+        pool = FakeSessionPool(settings=None, size=1)
+        session = pool.acquire()
+        pool.close()
+        with pytest.raises(SessionPoolError):
+            pool.acquire()
+        pool.release(session)
+        assert session.closed
+        assert pool.evicted == 0
@@ -0,0 +1,181 @@
+"""Tests of the Python layer running on the simulated native library.
+
+The SimulatedLibraryLoadStrategy replaces the native library, so sessions,
+batches and pools are exercised end to end without downloading anything.
+"""
+
+import gc
+import threading
+
+import numpy as np
+import pytest
+
+from cryptonets_python_sdk.library import PrivIDFaceLib
+from cryptonets_python_sdk.session import ImageInputArg, Session, SessionError, SessionNative
+from cryptonets_python_sdk.session_pool import SessionPool
+from cryptonets_python_sdk.simulated_library import SimulatedLibraryError, SimulatedLibraryLoadStrategy
+from cryptonets_python_sdk.idl.gen.privateid_types import OperationConfig, ReturnStatus
+
+from conftest import SETTINGS
+
+
+def _image(seed: int = 0, width: int = 64, height: int = 48) -> ImageInputArg:
+    pixels = np.random.default_rng(seed).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    return ImageInputArg(pixels, "rgb", zero_copy=True)
+
+
+class TestSimulatedLibrary:
+    """Test the simulated native library through Session."""
+
+    def test_version(self, simulated):
+        """Test that the library initializes."""
+        assert PrivIDFaceLib.get_native_sdk_version() == "simulated"
+
+    def test_operations(self, simulated):
+        """Test that every operation returns a successful typed result and frees its buffers."""
+        session = Session(SETTINGS)
+        image = _image()
+        config = OperationConfig()
+
+        for operation in (session.validate, session.estimate_age, session.anti_spoofing):
+            op_id, result = operation(image, config)
+            assert op_id > 0
+            assert result.call_status.return_status == ReturnStatus.API_NO_ERROR
+            assert len(result.faces) == 1
+        _, result, iso_image = session.face_iso(image, config)
+        assert iso_image == image.image_array.tobytes()
+        assert result.iso_image.image.info.width == 64
+        _, result, document, face = session.doc_scan_face(image, config)
+        assert len(document) == 64 * 48 * 3
+        assert len(face) == 32 * 24 * 3
+        _, result = session.face_compare_files(image, image, config)
+        assert result.compare.is_match
+        assert simulated.library.outstanding_buffers == 0
+        session.close()
+        assert simulated.library.open_sessions == 0
+
+    def test_enroll_predict_delete(self, simulated):
+        """Test that enrolled images are predicted until their user is deleted."""
+        session = Session(SETTINGS)
+        config = OperationConfig(collection_name="default")
+        _, enrolled = session.enroll_onefa(_image(1), config)
+        puid = enrolled.enroll.api_response.puid
+
+        _, predicted = session.face_predict_onefa(_image(1), config)
+        assert predicted.predict.api_response.puid == puid
+        _, predicted = session.face_predict_onefa(_image(2), config)
+        assert predicted.predict.api_response.status != 0
+
+        _, deleted = session.user_delete(puid, config)
+        assert deleted.user_delete.uuid_count == 1
+        _, predicted = session.face_predict_onefa(_image(1), config)
+        assert predicted.predict.api_response.status != 0
+
+    def test_string_api(self, simulated):
+        """Test that SessionNative returns the JSON result as a string."""
+        session = Session(SETTINGS)
+        op_id, result_json = session._session_native.validate(_image(), '{"input_image_format":"rgb"}')
+        assert op_id > 0
+        assert result_json.startswith('{"call_status"')
+
+    def test_invalid_image_size(self, simulated):
+        """Test that a too small image buffer is reported as an invalid argument."""
+        session = Session(SETTINGS)
+        image = _image()
+        image.width *= 2
+        op_id, result = session.validate(image, OperationConfig())
+        assert op_id < 0
+        assert result.call_status.return_status == ReturnStatus.API_INVALID_ARGUMENT
+
+    def test_invalid_settings(self, simulated):
+        """Test that sessions are not created from settings that do not match the schema."""
+        with pytest.raises(SessionError):
+            SessionNative(b'{"session_token": 1}')
+
+    def test_double_free_detected(self, simulated):
+        """Test that freeing a result buffer twice is reported."""
+        session = Session(SETTINGS)
+        ffi = PrivIDFaceLib._ffibuilder
+        result_ptr = ffi.new('char **')
+        result_len = ffi.new('int *')
+        simulated.library.privid_validate(session._session_native._session, b'', 0, b'\0' * 12, 2, 2,
+                                          result_ptr, result_len)
+        simulated.library.privid_free_char_buffer(result_ptr[0])
+        with pytest.raises(SimulatedLibraryError):
+            simulated.library.privid_free_char_buffer(result_ptr[0])
+
+
+class TestOutputCells:
+    """Test the output parameters reused by the calls of a session."""
+
+    def test_reused_by_calls(self, simulated):
+        """Test that the calls of a thread reuse the same cells, reset once their buffers are freed."""
+        session = Session(SETTINGS)
+        native = session._session_native
+        session.validate(_image(), OperationConfig())
+        cells = native._cells()
+        session.face_iso(_image(), OperationConfig())
+        session.doc_scan_face(_image(), OperationConfig(), as_array=True)
+        assert native._cells() is cells
+        ffi = PrivIDFaceLib._ffibuilder
+        assert all(pointer[0] == ffi.NULL for pointer in (cells.result_ptr, cells.image_ptr, cells.face_ptr))
+        gc.collect()
+        assert simulated.library.outstanding_buffers == 0
+
+    def test_one_set_per_thread(self, simulated):
+        """Test that each thread using a session gets its own cells."""
+        native = Session(SETTINGS)._session_native
+        cells = []
+        thread = threading.Thread(target=lambda: cells.append(native._cells()))
+        thread.start()
+        thread.join()
+        assert cells[0] is not native._cells()
+
+
+class TestSimulatedFaults:
+    """Test latency and error injection."""
+
+    @pytest.mark.parametrize("simulated", [{"error_rate": 1.0, "error_status": ReturnStatus.API_NETWORK_ERROR}],
+                             indirect=True)
+    def test_error_injection(self, simulated):
+        """Test that injected errors are returned as error results."""
+        op_id, result = Session(SETTINGS).validate(_image(), OperationConfig())
+        assert op_id == ReturnStatus.API_NETWORK_ERROR
+        assert result.call_status.return_status == ReturnStatus.API_NETWORK_ERROR
+
+    @pytest.mark.parametrize("simulated",
+                             [{"error_rate": 1.0, "error_status": ReturnStatus.API_INVALID_SESSION_HANDLER}],
+                             indirect=True)
+    def test_invalid_handle_evicted_from_pool(self, simulated):
+        """Test that the pool discards sessions reporting an invalid handle."""
+        with SessionPool(SETTINGS, size=1) as pool:
+            pool.run('validate', _image(), OperationConfig())
+            assert pool.evicted == 1
+
+    @pytest.mark.parametrize("simulated", [{"latency": 0.05}], indirect=True)
+    def test_pool_runs_concurrently(self, simulated):
+        """Test that a pool runs simulated calls in parallel, one thread per session at a time."""
+        images = [_image(i).image_array for i in range(8)]
+        with SessionPool(SETTINGS, size=4) as pool:
+            session = Session(SETTINGS)
+            results = list(session.validate_many(images, OperationConfig(), pool=pool))
+        assert [index for index, _, _ in results] == list(range(8))
+        assert all(result.call_status.return_status == ReturnStatus.API_NO_ERROR for _, _, result in results)
+        assert simulated.library.concurrent_session_use == 0
+        assert simulated.library.outstanding_buffers == 0
+
+    @pytest.mark.parametrize("simulated", [{"latency": 0.05}], indirect=True)
+    def test_shared_session_detected(self, simulated):
+        """Test that using one session from several threads at once is detected."""
+        session = Session(SETTINGS)
+        threads = [threading.Thread(target=session.validate, args=(_image(), OperationConfig())) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert simulated.library.concurrent_session_use == 1
+
+    def test_invalid_error_rate(self):
+        """Test that error rates outside [0, 1] are rejected."""
+        with pytest.raises(ValueError):
+            SimulatedLibraryLoadStrategy(error_rate=2.0)